@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.contrib.auth.models import Group, User
 from rest_framework import serializers
 
@@ -7,6 +8,25 @@ from decks.models import Card
 # API serializers. They define what fields of the referred model they will return.
 # `__all__` also includes the field `url`, which will be a link to the object's detail
 
+STAT_FIELDS = [
+    "main_cost",
+    "recall_cost",
+    "forest_power",
+    "mountain_power",
+    "ocean_power",
+    "reserve_count",
+    "permanent_count",
+]
+
+
+def localized_fields(*fields: str) -> list[str]:
+    """Return the given translated fields followed by each of their translations."""
+    return [
+        name
+        for field in fields
+        for name in (field, *(f"{field}_{code}" for code, _ in settings.LANGUAGES))
+    ]
+
 
 class UserSerializer(serializers.HyperlinkedModelSerializer):
     class Meta:
@@ -21,6 +41,40 @@ class GroupSerializer(serializers.HyperlinkedModelSerializer):
 
 
 class CardSerializer(serializers.HyperlinkedModelSerializer):
+    # The stats used to be stored in a single JSON field, which is kept in the
+    # responses alongside their columns
+    stats = serializers.SerializerMethodField()
+
     class Meta:
         model = Card
-        fields = "__all__"
+        fields = [
+            "url",
+            "card_code",
+            "family_code",
+            *localized_fields("name"),
+            "faction",
+            "type",
+            "rarity",
+            *localized_fields("image_url"),
+            "display_image_url",
+            *localized_fields("main_effect", "echo_effect"),
+            "is_promo",
+            "is_alt_art",
+            "is_legal",
+            "stats",
+            *STAT_FIELDS,
+            "last_price",
+            "created_at",
+            "set",
+            "subtypes",
+        ]
+
+    def get_stats(self, card: Card) -> dict[str, int]:
+        """Rebuild the stats of the card as they were stored, skipping the ones that
+        don't apply to its type.
+        """
+        return {
+            field: getattr(card, field)
+            for field in STAT_FIELDS
+            if getattr(card, field) is not None
+        }
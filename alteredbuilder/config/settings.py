@@ -169,6 +169,7 @@ TEMPLATES = [
                 "django.contrib.messages.context_processors.messages",
                 "config.context_processors.add_version",
                 "notifications.context_processors.add_notifications",
+                "profiles.context_processors.add_viewer",
                 # "config.context_processors.add_release_date",
             ],
         },
@@ -232,6 +233,19 @@ AUTHENTICATION_BACKENDS = [
 USER_AGENT_BASE = "AjordatBot/1.0 (Altered TCG Builder; {}; https://altered.ajordat.com; altered-tcg-builder@ajordat.com)"
 ALTERED_API_BASE_URL = "https://api.altered.gg"
 ALTERED_API_ITEMS_PER_PAGE = 36
+# Maximum amount of seconds to wait for each request to the API
+ALTERED_API_TIMEOUT = 5
+# Seconds a job importing unique cards can go without progress before it's considered
+# lost (e.g. its process was stopped), and amount of times it's run before giving up
+CARD_IMPORT_JOB_TIMEOUT = 2 * 60
+CARD_IMPORT_JOB_MAX_ATTEMPTS = 3
+# Amount of days the daily card prices are kept once they've been aggregated
+CARD_PRICE_RETENTION_DAYS = 180
+# Seconds the amount of results of a listing is cached for each combination of filters
+RESULT_COUNT_CACHE_TIMEOUT = 5 * 60
+# Above this amount of rows estimated by the planner, the estimate is displayed instead
+# of counting the results
+RESULT_COUNT_ESTIMATE_THRESHOLD = 10_000
 
 
 if DEBUG or not SERVICE_PUBLIC_URL:
@@ -268,6 +282,12 @@ else:
 
 # Only keep the hits for 30d on the database
 HITCOUNT_KEEP_HIT_IN_DATABASE = {"days": 30}
+# The deck hits and private link accesses are buffered by each process and written in
+# batches once the buffer holds this amount of events or after this amount of seconds
+HIT_BUFFER_FLUSH_SIZE = 200
+HIT_BUFFER_FLUSH_INTERVAL = 30
+# Events received while the buffer is full (e.g. the database is unavailable) are dropped
+HIT_BUFFER_MAX_EVENTS = 5000
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
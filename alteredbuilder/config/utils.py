@@ -2,6 +2,7 @@ from http import HTTPStatus
 import json
 import math
 import random
+import threading
 import time
 from typing import Any, Generator
 from urllib.error import HTTPError, URLError
@@ -18,6 +19,26 @@ def get_user_agent(task: str) -> str:
     return settings.USER_AGENT_BASE.format(task)
 
 
+class RateLimiter:
+    """Spaces out the requests made by multiple threads, so that altogether they
+    don't exceed a maximum rate.
+    """
+
+    def __init__(self, requests_per_second: float) -> None:
+        self.interval = 1 / requests_per_second
+        self._next_request = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Block until the calling thread is allowed to make a request."""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_request - now
+            self._next_request = max(now, self._next_request) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
 def altered_api_paginator(
     endpoint: str,
     user_agent_task,
@@ -25,6 +46,20 @@ def altered_api_paginator(
     locale: str = "en-us",
     auth_token: bool = False,
 ) -> Generator[dict[str, Any], None, None]:
+    for page in altered_api_pages(
+        endpoint, user_agent_task, params, locale, auth_token
+    ):
+        yield from page
+
+
+def altered_api_pages(
+    endpoint: str,
+    user_agent_task,
+    params: list[tuple[str, str]] = None,
+    locale: str = "en-us",
+    auth_token: bool = False,
+    rate_limiter: RateLimiter = None,
+) -> Generator[list[dict[str, Any]], None, None]:
     headers = {
         "Accept-Language": locale,
         "User-Agent": get_user_agent(user_agent_task),
@@ -44,21 +79,24 @@ def altered_api_paginator(
             query_params += "&" + "&".join([f"{k}={v}" for k, v in params])
 
         # Query the API
-        data = fetch_with_backoff(url + query_params, headers)
+        data = fetch_with_backoff(
+            url + query_params, headers, rate_limiter=rate_limiter
+        )
 
         total_items = min(data["hydra:totalItems"], total_items)
         page_count = min(
             math.ceil(total_items / settings.ALTERED_API_ITEMS_PER_PAGE), page_count
         )
 
-        for item in data["hydra:member"]:
-            yield item
+        yield data["hydra:member"]
 
         page_index += 1
 
 
-def fetch_with_backoff(url, headers, max_retries=5):
+def fetch_with_backoff(url, headers, max_retries=5, rate_limiter=None):
     for attempt in range(max_retries):
+        if rate_limiter:
+            rate_limiter.wait()
         try:
             with urlopen(Request(url, headers=headers)) as response:
                 return json.loads(response.read().decode("utf8"))
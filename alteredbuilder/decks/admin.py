@@ -8,6 +8,7 @@ from django.http import HttpRequest
 from django.template.response import TemplateResponse
 from django.utils.html import format_html
 
+from decks.card_catalog import bump_catalog_version
 from decks.forms import ChangeDeckOwnerForm
 from decks.models import (
     BannedCard,
@@ -256,30 +257,24 @@ class CardAdmin(admin.ModelAdmin):
             fieldsets.append(lang_fieldset)
         return fieldsets
 
-    @admin.display
-    def reserve_count(self, obj: Card):
-        return obj.stats["reserve_count"]
-
-    @admin.display
-    def permanent_count(self, obj: Card):
-        return obj.stats["permanent_count"]
+    def save_model(self, request: HttpRequest, obj: Card, form, change: bool) -> None:
+        super().save_model(request, obj, form, change)
+        if form.has_changed():
+            bump_catalog_version(modified=change)
 
     @admin.display
     def mana_cost(self, obj: Card):
-        return obj.stats["main_cost"], obj.stats["recall_cost"]
+        return obj.main_cost, obj.recall_cost
 
     @admin.display
     def power(self, obj: Card):
-        return (
-            obj.stats["forest_power"],
-            obj.stats["mountain_power"],
-            obj.stats["ocean_power"],
-        )
+        return obj.forest_power, obj.mountain_power, obj.ocean_power
 
     @admin.action(description="Change rarity to common")
     def change_rarity_to_common(self, request, queryset: QuerySet[Card]):
         updated = queryset.update(rarity=Card.Rarity.COMMON)
 
+        bump_catalog_version()
         self.message_user(request, f"{updated} card(s) updated to common rarity.")
 
     @admin.action(description="Copy display image")
@@ -295,12 +290,14 @@ class CardAdmin(admin.ModelAdmin):
     def make_legal(self, request, queryset: QuerySet[Card]):
         updated = queryset.update(is_legal=True)
 
+        bump_catalog_version()
         self.message_user(request, f"{updated} card(s) are now legal.")
 
     @admin.action(description="Ban cards")
     def make_illegal(self, request, queryset: QuerySet[Card]):
         updated = queryset.update(is_legal=False)
 
+        bump_catalog_version()
         self.message_user(request, f"{updated} card(s) have been banned.")
 
 
@@ -0,0 +1,263 @@
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+import threading
+import time
+
+from cachetools import LRUCache
+from django.conf import settings
+from django.db.models import F, QuerySet
+from django.utils import timezone
+from django.utils.translation import get_language
+
+from decks.models import ALTERED_TCG_URL, Card, CardCatalogVersion
+
+
+# Seconds a process trusts its catalog before checking the version stamp again
+CATALOG_VERSION_CHECK_INTERVAL = 5
+# Unique cards are only loaded on demand, so the amount kept in memory is bounded
+MAX_CATALOG_UNIQUES = 50_000
+RECORD_FIELDS = [
+    "reference",
+    "card_code",
+    "family_code",
+    "type",
+    "rarity",
+    "faction",
+    "is_legal",
+    "is_promo",
+    "is_alt_art",
+    "set__code",
+    "main_cost",
+    "recall_cost",
+    "forest_power",
+    "mountain_power",
+    "ocean_power",
+    "reserve_count",
+    "permanent_count",
+]
+LOCALIZED_FIELDS = [
+    f"{field}_{code}"
+    for field in ["name", "image_url"]
+    for code, _ in settings.LANGUAGES
+]
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class CardRecord:
+    """Immutable copy of the metadata of a Card. It exposes the same attributes and
+    code getters as the model, so it can be used wherever a Card is only read.
+    """
+
+    reference: str
+    card_code: str
+    family_code: str
+    type: str
+    rarity: str
+    faction: str
+    is_legal: bool
+    is_promo: bool
+    is_alt_art: bool
+    set_code: str | None
+    main_cost: int | None
+    recall_cost: int | None
+    forest_power: int | None
+    mountain_power: int | None
+    ocean_power: int | None
+    reserve_count: int | None
+    permanent_count: int | None
+    names: dict[str, str]
+    image_urls: dict[str, str]
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "CardRecord":
+        values = dict(zip(RECORD_FIELDS + LOCALIZED_FIELDS, row))
+        return cls(
+            *(values[field] for field in RECORD_FIELDS),
+            names={code: values[f"name_{code}"] for code, _ in settings.LANGUAGES},
+            image_urls={
+                code: values[f"image_url_{code}"] for code, _ in settings.LANGUAGES
+            },
+        )
+
+    @property
+    def name(self) -> str:
+        return self._localize(self.names)
+
+    @property
+    def image_url(self) -> str:
+        return self._localize(self.image_urls)
+
+    def _localize(self, values: dict[str, str]) -> str:
+        # Empty translations fall back to the default language, like the model does
+        return values.get(get_language()) or values[settings.LANGUAGE_CODE] or ""
+
+    def get_rarity_display(self) -> str:
+        return Card.Rarity(self.rarity).label
+
+    def get_official_link(self) -> str:
+        return f"{ALTERED_TCG_URL}/cards/{self.reference}"
+
+    def get_family_code(self) -> str:
+        return self.family_code
+
+    def get_card_code(self) -> str:
+        return self.card_code
+
+
+@dataclass(slots=True)
+class CatalogState:
+    version: int
+    pool_version: int
+    checked_at: float
+    records: dict[str, CardRecord]
+    uniques: LRUCache
+    by_card_code: dict[str, tuple[CardRecord, ...]]
+    by_family_code: dict[str, tuple[CardRecord, ...]]
+
+
+class CardCatalog:
+    """In-memory catalog of the cards, shared by every thread of the process.
+
+    The non-unique cards are loaded with a single query the first time the catalog is
+    used, and indexed by reference, card code and family code. Unique cards are loaded
+    on demand and are only indexed by reference. The whole catalog is discarded when
+    the version stamp stored in the database changes, either because cards were added
+    or modified.
+    """
+
+    def __init__(self) -> None:
+        self._state: CatalogState | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        """Version stamp of the existing cards' data the catalog was loaded from."""
+        return self._get_state().version
+
+    def get(self, reference: str) -> CardRecord | None:
+        """Retrieve the record of a card.
+
+        Args:
+            reference (str): The card's reference.
+
+        Returns:
+            CardRecord | None: The card's record, or None if it doesn't exist.
+        """
+        return self.get_many([reference]).get(reference)
+
+    def get_many(self, references: Iterable[str]) -> dict[str, CardRecord]:
+        """Retrieve the records of multiple cards. The cards missing from the catalog
+        are retrieved with a single query.
+
+        Args:
+            references (Iterable[str]): The references of the cards.
+
+        Returns:
+            dict[str, CardRecord]: The records found, by reference.
+        """
+        state = self._get_state()
+        records = {}
+        missing_references = []
+        with self._lock:
+            for reference in set(references):
+                if reference in state.records:
+                    records[reference] = state.records[reference]
+                elif reference in state.uniques:
+                    records[reference] = state.uniques[reference]
+                else:
+                    missing_references.append(reference)
+
+        if missing_references:
+            fetched_records = self._fetch(
+                Card.objects.filter(reference__in=missing_references)
+            )
+            with self._lock:
+                state.uniques.update(fetched_records)
+            records.update(fetched_records)
+
+        return records
+
+    def by_card_code(self, card_code: str) -> tuple[CardRecord, ...]:
+        """Retrieve the non-unique cards sharing a card code (e.g. `AX_04_C`)."""
+        return self._get_state().by_card_code.get(card_code, ())
+
+    def by_family_code(self, family_code: str) -> tuple[CardRecord, ...]:
+        """Retrieve the non-unique cards sharing a family code (e.g. `AX_04`)."""
+        return self._get_state().by_family_code.get(family_code, ())
+
+    def clear(self) -> None:
+        """Discard the catalog, so that it's loaded again the next time it's used."""
+        with self._lock:
+            self._state = None
+
+    def _get_state(self) -> CatalogState:
+        state = self._state
+        now = time.monotonic()
+        if state and now - state.checked_at < CATALOG_VERSION_CHECK_INTERVAL:
+            return state
+
+        version, pool_version = get_catalog_version()
+        if state and (state.version, state.pool_version) == (version, pool_version):
+            state.checked_at = now
+            return state
+
+        state = self._load(version, pool_version)
+        with self._lock:
+            self._state = state
+        return state
+
+    def _load(self, version: int, pool_version: int) -> CatalogState:
+        records = self._fetch(Card.objects.exclude(rarity=Card.Rarity.UNIQUE))
+        by_card_code = defaultdict(list)
+        by_family_code = defaultdict(list)
+        for record in records.values():
+            by_card_code[record.card_code].append(record)
+            by_family_code[record.family_code].append(record)
+
+        return CatalogState(
+            version=version,
+            pool_version=pool_version,
+            checked_at=time.monotonic(),
+            records=records,
+            uniques=LRUCache(maxsize=MAX_CATALOG_UNIQUES),
+            by_card_code={code: tuple(cards) for code, cards in by_card_code.items()},
+            by_family_code={
+                code: tuple(cards) for code, cards in by_family_code.items()
+            },
+        )
+
+    @staticmethod
+    def _fetch(qs: QuerySet[Card]) -> dict[str, CardRecord]:
+        rows = qs.order_by("reference").values_list(*RECORD_FIELDS, *LOCALIZED_FIELDS)
+        return {row[0]: CardRecord.from_row(row) for row in rows}
+
+
+def get_catalog_version() -> tuple[int, int]:
+    """Retrieve the version stamps of the existing cards' data and of the card pool."""
+    return CardCatalogVersion.objects.order_by("id").values_list(
+        "version", "pool_version"
+    ).first() or (0, 0)
+
+
+def bump_catalog_version(modified: bool = True) -> None:
+    """Increase the version stamp of the card pool, so that every process reloads its
+    catalog. It must be called after adding or modifying cards.
+
+    Args:
+        modified (bool, optional): Whether existing cards were modified, which
+            invalidates the data derived from them (e.g. the decks' snapshots). If
+            cards were only added, that data is still valid. Defaults to True.
+    """
+    increment = int(modified)
+    updated = CardCatalogVersion.objects.update(
+        version=F("version") + increment,
+        pool_version=F("pool_version") + 1,
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        CardCatalogVersion.objects.create(version=increment, pool_version=1)
+    card_catalog.clear()
+
+
+card_catalog = CardCatalog()
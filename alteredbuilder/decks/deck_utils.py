@@ -1,43 +1,90 @@
 from collections import defaultdict
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from datetime import timedelta
 from http import HTTPStatus
+from logging import getLogger
 import re
+import threading
+import time
 
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.db import IntegrityError, transaction
-from django.db.models import Exists, F, IntegerField, OuterRef, Q, Subquery
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import IntegrityError, connection, transaction
+from django.db.models import (
+    Exists,
+    F,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+)
+from django.db.models.functions import Coalesce, NullIf
 from django.db.models.query import QuerySet
+from django.utils import timezone
 from django.utils.translation import activate, gettext_lazy as _
+from modeltranslation.utils import get_language
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
 
 from api.utils import locale_agnostic
 from config.utils import get_altered_api_locale, get_user_agent
+from decks.card_catalog import CardRecord, card_catalog
 from decks.game_modes import (
+    GAME_MODES,
     DraftGameMode,
     GameMode,
     Singleton,
     StandardGameMode,
+    get_deck_summary,
+    get_error_lists,
     update_deck_legality,
 )
 from decks.models import (
     BannedCard,
     Card,
+    CardImportJob,
     CardInDeck,
-    CardPrice,
     Deck,
+    DeckSnapshot,
+    DeckSummary,
     FavoriteCard,
     LovePoint,
     Subtype,
+    DECK_SEARCH_CONFIG,
+    SEARCH_CONFIGS,
+    card_code_from_reference,
+    card_search_vector,
+    family_code_from_reference,
 )
 from decks.exceptions import AlteredAPIError, CardAlreadyExists, MalformedDeckException
 
 
+logger = getLogger(__name__)
+
 # Altered's API endpoint
-ALTERED_TCG_API_URL = "https://api.altered.gg/cards"
-HEADERS = {"User-Agent": get_user_agent("UniqueCardImporter")}
+CARDS_API_ENDPOINT = "/cards"
+# Maximum amount of unique cards of a job fetched at the same time
+MAX_CONCURRENT_IMPORTS = 4
+# Shared session to reuse the connections to the API across imports. Its connection
+# pool is thread-safe, and it's sized to keep a connection for each concurrent request
+SESSION = requests.Session()
+SESSION.headers.update({"User-Agent": get_user_agent("UniqueCardImporter")})
+SESSION.mount(
+    "https://",
+    HTTPAdapter(pool_maxsize=MAX_CONCURRENT_IMPORTS * len(settings.LANGUAGES)),
+)
+# Jobs importing unique cards are processed one at a time in the background
+IMPORT_JOB_EXECUTOR = ThreadPoolExecutor(max_workers=1)
+# Jobs waiting in this process' executor. The running job refreshes them while they
+# wait, so they aren't mistaken for lost jobs
+QUEUED_IMPORT_JOBS: set[int] = set()
+QUEUED_IMPORT_JOBS_LOCK = threading.Lock()
 # The API currently returns a private image link for unique cards in these languages
 IMAGE_ERROR_LOCALES = ["es", "it", "de"]
-
 OPERATOR_TO_HTML = {
     ":": ":",
     "=": " =",
@@ -46,6 +93,22 @@ OPERATOR_TO_HTML = {
     ">": " &gt;",
     ">=": " &ge;",
 }
+OPERATOR_TO_LOOKUP = {
+    ":": "",
+    "=": "",
+    "<": "__lt",
+    "<=": "__lte",
+    ">": "__gt",
+    ">=": "__gte",
+}
+# Card fields filtered by the numeric filters of the card query syntax
+STAT_FILTERS = {
+    "hc": ("main_cost", _("hand cost")),
+    "rc": ("recall_cost", _("reserve cost")),
+    "fp": ("forest_power", _("forest power")),
+    "mp": ("mountain_power", _("mountain power")),
+    "op": ("ocean_power", _("ocean power")),
+}
 TRIGGER_TRANSLATION = {
     "etb": "{J}",
     "hand": "{H}",
@@ -56,36 +119,24 @@ TRIGGER_TRANSLATION = {
 }
 
 
-@transaction.atomic
-def create_new_deck(user: User, deck_form: dict) -> Deck:
-    """Method to validate the clean data from a DecklistForm and create it if all input
-    is valid.
+def parse_decklist(decklist: str) -> tuple[dict[str, int], dict[str, int]]:
+    """Parse a text decklist into the quantity of each reference. Repeated references
+    are merged into a single entry.
 
     Args:
-        user (User): The Deck's owner.
-        deck_form (dict): Clean data from a DecklistForm.
+        decklist (str): Text decklist with a quantity and a reference on each line.
 
     Raises:
-        MalformedDeckException: If the decklist is invalid.
+        MalformedDeckException: If a line does not follow the expected format.
 
     Returns:
-        Deck: The resulting object.
+        tuple[dict[str, int], dict[str, int]]: The total quantity of each reference and
+            the amount of lines in which each reference appears.
     """
-    decklist = deck_form["decklist"]
-    deck = Deck.objects.create(
-        name=deck_form["name"],
-        owner=user,
-        is_public=deck_form["is_public"],
-        description=deck_form["description"],
-    )
-    has_hero = False
+    quantities = defaultdict(int)
+    occurrences = defaultdict(int)
 
     for line in decklist.splitlines():
-        # For each line, it is needed to:
-        # * Validate its format
-        # * Search the card reference on the database
-        #   - If it's a Hero, assign it to the Deck's Hero
-        #   - Otherwise append it to the list of cards
         try:
             count, reference = line.split()
             count = int(count)
@@ -97,63 +148,103 @@ def create_new_deck(user: User, deck_form: dict) -> Deck:
                 _("Failed to unpack '%(line)s'")
                 % {"line": line}
             )
+        quantities[reference] += count
+        occurrences[reference] += 1
+
+    return dict(quantities), dict(occurrences)
+
+
+@transaction.atomic
+def create_new_deck(user: User, deck_form: dict) -> Deck:
+    """Method to validate the clean data from a DecklistForm and create it if all input
+    is valid.
+
+    The whole decklist is parsed before touching the database, so that all the known
+    cards are resolved with the card catalog and linked with a single insert.
+
+    Args:
+        user (User): The Deck's owner.
+        deck_form (dict): Clean data from a DecklistForm.
+
+    Raises:
+        MalformedDeckException: If the decklist is invalid.
+
+    Returns:
+        Deck: The resulting object.
+    """
+    quantities, occurrences = parse_decklist(deck_form["decklist"])
 
+    cards: dict[str, Card | CardRecord] = card_catalog.get_many(quantities)
+    for reference in quantities:
+        if reference in cards:
+            continue
         try:
-            card = Card.objects.get(reference=reference)
-        except Card.DoesNotExist:
-            try:
-                card = import_unique_card(reference)
-                FavoriteCard.objects.get_or_create(user=user, card=card)
-                print(f"Created card '{reference}'")
-            except AlteredAPIError:
-                # The Card's reference needs to exist on the database
-                raise MalformedDeckException(
-                    _("Card '%(reference)s' wasn't found and couldn't be imported")
-                    % {"reference": reference}
-                )
+            # Unique cards might not be in the database yet
+            card = import_unique_card(reference)
+            FavoriteCard.objects.get_or_create(user=user, card=card)
+            print(f"Created card '{reference}'")
+        except AlteredAPIError:
+            # The Card's reference needs to exist on the database
+            raise MalformedDeckException(
+                _("Card '%(reference)s' wasn't found and couldn't be imported")
+                % {"reference": reference}
+            )
+        cards[reference] = card
 
-        if card.type == Card.Type.HERO:
-            if not has_hero:
-                deck.hero = card
-                has_hero = True
-            else:
-                # The Deck model requires to have exactly one Hero per Deck
-                raise MalformedDeckException(
-                    _("Multiple heroes present in the decklist")
-                )
-        else:
-            if CardInDeck.objects.filter(deck=deck, card=card).exists():
-                # If the card is already linked to the deck, increase its quantity
-                cid = CardInDeck.objects.get(deck=deck, card=card)
-                cid.quantity = F("quantity") + count
-                cid.save(update_fields=["quantity"])
-            else:
-                # Link the Card with the Deck
-                CardInDeck.objects.create(deck=deck, card=card, quantity=count)
+    heroes = [card for card in cards.values() if card.type == Card.Type.HERO]
+    if sum(occurrences[hero.reference] for hero in heroes) > 1:
+        # The Deck model requires to have exactly one Hero per Deck
+        raise MalformedDeckException(_("Multiple heroes present in the decklist"))
+
+    decklist = {
+        reference: quantity
+        for reference, quantity in quantities.items()
+        if cards[reference].type != Card.Type.HERO
+    }
+    deck = Deck.objects.create(
+        name=deck_form["name"],
+        owner=user,
+        is_public=deck_form["is_public"],
+        description=deck_form["description"],
+        hero_id=heroes[0].reference if heroes else None,
+    )
+    CardInDeck.objects.bulk_create(
+        [
+            CardInDeck(deck=deck, card_id=reference, quantity=quantity)
+            for reference, quantity in decklist.items()
+        ]
+    )
 
-    update_deck_legality(deck)
+    summary = DeckSummary(deck=deck, catalog_version=card_catalog.version)
+    for reference, quantity in decklist.items():
+        summary.add_card(cards[reference], quantity)
+    summary.save()
+    build_deck_snapshot(deck, decklist)
+    deck.total_price = get_deck_total_price(deck, decklist)
+    deck.card_codes = get_deck_card_codes(deck, decklist)
+    update_deck_legality(deck, summary)
     deck.save()
 
     return deck
 
 
-def get_deck_details(deck: Deck) -> dict:
+def build_deck_snapshot(
+    deck: Deck, quantities: dict[str, int] | None = None
+) -> DeckSnapshot:
+    """Compute the detail of a Deck's decklist and store it as the Deck's snapshot.
 
-    cid_queryset: QuerySet[CardInDeck] = deck.cardindeck_set
-    decklist = (
-        cid_queryset.select_related("card")
-        .prefetch_related("card__prices")
-        .annotate(
-            last_price=Subquery(
-                CardPrice.objects.filter(card=OuterRef("card__pk"))
-                .order_by("-date")
-                .values("price")[:1],
-                output_field=IntegerField(),
-            )
-        )
-        .order_by("card__reference")
-        .all()
-    )
+    Args:
+        deck (Deck): The Deck to describe.
+        quantities (dict[str, int], optional): The quantity of each card of the Deck,
+            excluding its hero. If it's not provided, it's retrieved from the database.
+
+    Returns:
+        DeckSnapshot: The Deck's updated snapshot.
+    """
+    if quantities is None:
+        quantities = dict(deck.cardindeck_set.values_list("card_id", "quantity"))
+    cards = card_catalog.get_many(quantities)
+    references = sorted(reference for reference in quantities if reference in cards)
 
     hand_counter = defaultdict(int)
     recall_counter = defaultdict(int)
@@ -168,61 +259,161 @@ def get_deck_details(deck: Deck) -> dict:
         Card.Type.LANDMARK_PERMANENT: [[], 0],
         Card.Type.EXPEDITION_PERMANENT: [[], 0],
     }
-    for cid in decklist:
+    for reference in references:
+        card = cards[reference]
+        quantity = quantities[reference]
         # Append the card to its own type card list
-        type_stats[cid.card.type][0].append((cid.quantity, cid.card, cid.last_price))
+        type_stats[card.type][0].append((quantity, card))
         # Count the card count of the card's type
-        type_stats[cid.card.type][1] += cid.quantity
+        type_stats[card.type][1] += quantity
         # Count the amount of cards with the same hand cost
-        hand_counter[cid.card.stats["main_cost"]] += cid.quantity
+        hand_counter[str(card.main_cost)] += quantity
         # Count the amount of cards with the same recall cost
-        recall_counter[cid.card.stats["recall_cost"]] += cid.quantity
+        recall_counter[str(card.recall_cost)] += quantity
         # Count the amount of cards with the same rarity
-        rarity_counter[cid.card.rarity] += cid.quantity
-        power_counter["forest"] += cid.card.stats.get("forest_power", 0) * cid.quantity
-        power_counter["mountain"] += (
-            cid.card.stats.get("mountain_power", 0) * cid.quantity
-        )
-        power_counter["ocean"] += cid.card.stats.get("ocean_power", 0) * cid.quantity
+        rarity_counter[card.rarity] += quantity
+        power_counter["forest"] += (card.forest_power or 0) * quantity
+        power_counter["mountain"] += (card.mountain_power or 0) * quantity
+        power_counter["ocean"] += (card.ocean_power or 0) * quantity
 
-    decklist_text = f"1 {deck.hero.reference}\n" if deck.hero else ""
+    decklist_text = f"1 {deck.hero_id}\n" if deck.hero_id else ""
     decklist_text += "\n".join(
-        [f"{cid.quantity} {cid.card.reference}" for cid in decklist]
+        f"{quantities[reference]} {reference}" for reference in references
     )
 
-    return {
-        "decklist": decklist_text,
-        "character_list": sorted(
-            type_stats[Card.Type.CHARACTER][0], key=sort_by_mana_cost
-        ),
-        "spell_list": sorted(type_stats[Card.Type.SPELL][0], key=sort_by_mana_cost),
-        "permanent_list": sorted(
-            type_stats[Card.Type.LANDMARK_PERMANENT][0]
-            + type_stats[Card.Type.EXPEDITION_PERMANENT][0],
-            key=sort_by_mana_cost,
-        ),
-        "stats": {
-            "type_distribution": {
-                "characters": type_stats[Card.Type.CHARACTER][1],
-                "spells": type_stats[Card.Type.SPELL][1],
-                "permanents": type_stats[Card.Type.LANDMARK_PERMANENT][1]
-                + type_stats[Card.Type.EXPEDITION_PERMANENT][1],
-            },
-            "total_count": type_stats[Card.Type.CHARACTER][1]
-            + type_stats[Card.Type.SPELL][1]
-            + type_stats[Card.Type.LANDMARK_PERMANENT][1]
-            + type_stats[Card.Type.EXPEDITION_PERMANENT][1],
-            "mana_distribution": {
-                "hand": hand_counter,
-                "recall": recall_counter,
+    def to_rows(card_list: list[tuple[int, CardRecord]]) -> list[list]:
+        return [
+            [quantity, card.reference]
+            for quantity, card in sorted(card_list, key=sort_by_mana_cost)
+        ]
+
+    snapshot, _ = DeckSnapshot.objects.update_or_create(
+        deck=deck,
+        defaults={
+            "decklist": decklist_text,
+            "card_lists": {
+                "character": to_rows(type_stats[Card.Type.CHARACTER][0]),
+                "spell": to_rows(type_stats[Card.Type.SPELL][0]),
+                "permanent": to_rows(
+                    type_stats[Card.Type.LANDMARK_PERMANENT][0]
+                    + type_stats[Card.Type.EXPEDITION_PERMANENT][0]
+                ),
             },
-            "rarity_distribution": {
-                "common": rarity_counter[Card.Rarity.COMMON],
-                "rare": rarity_counter[Card.Rarity.RARE],
-                "unique": rarity_counter[Card.Rarity.UNIQUE],
+            "stats": {
+                "type_distribution": {
+                    "characters": type_stats[Card.Type.CHARACTER][1],
+                    "spells": type_stats[Card.Type.SPELL][1],
+                    "permanents": type_stats[Card.Type.LANDMARK_PERMANENT][1]
+                    + type_stats[Card.Type.EXPEDITION_PERMANENT][1],
+                },
+                "total_count": sum(count for _, count in type_stats.values()),
+                "mana_distribution": {
+                    "hand": hand_counter,
+                    "recall": recall_counter,
+                },
+                "rarity_distribution": {
+                    "common": rarity_counter[Card.Rarity.COMMON],
+                    "rare": rarity_counter[Card.Rarity.RARE],
+                    "unique": rarity_counter[Card.Rarity.UNIQUE],
+                },
+                "region_distribution": power_counter,
             },
-            "region_distribution": power_counter,
+            "catalog_version": card_catalog.version,
         },
+    )
+    return snapshot
+
+
+def get_deck_snapshot(deck: Deck) -> DeckSnapshot:
+    """Retrieve the snapshot of a Deck, rebuilding it if it doesn't exist yet or if
+    the cards have been modified since it was built.
+
+    Args:
+        deck (Deck): The Deck to describe.
+
+    Returns:
+        DeckSnapshot: The Deck's snapshot.
+    """
+    try:
+        snapshot = deck.snapshot
+    except DeckSnapshot.DoesNotExist:
+        return build_deck_snapshot(deck)
+
+    if snapshot.catalog_version != card_catalog.version:
+        return build_deck_snapshot(deck)
+    return snapshot
+
+
+def get_snapshot_card_lists(
+    snapshot: DeckSnapshot,
+) -> dict[str, list[tuple[int, CardRecord]]]:
+    """Resolve the cards of each type listed on a snapshot with the card catalog.
+
+    Args:
+        snapshot (DeckSnapshot): The Deck's snapshot.
+
+    Returns:
+        dict[str, list[tuple[int, CardRecord]]]: The quantity and record of the cards
+            of each type (`character`, `spell` and `permanent`).
+    """
+    cards = card_catalog.get_many(
+        reference for rows in snapshot.card_lists.values() for _, reference in rows
+    )
+    return {
+        name: [
+            (quantity, cards[reference])
+            for quantity, reference in rows
+            if reference in cards
+        ]
+        for name, rows in snapshot.card_lists.items()
+    }
+
+
+def get_deck_details(deck: Deck) -> dict:
+    """Retrieve the detail of a Deck from its snapshot. The cards are resolved with
+    the card catalog, and only their current prices are retrieved from the database.
+
+    Args:
+        deck (Deck): The Deck to describe.
+
+    Returns:
+        dict: The Deck's decklist, cards by type, statistics and legality.
+    """
+    snapshot = get_deck_snapshot(deck)
+    card_lists = get_snapshot_card_lists(snapshot)
+    references = [
+        card.reference for card_list in card_lists.values() for _, card in card_list
+    ]
+    # The prices change daily, so they're the only data not kept in the snapshot
+    prices = dict(
+        Card.objects.filter(reference__in=references).values_list(
+            "reference", "last_price"
+        )
+    )
+    card_lists = {
+        name: [
+            (quantity, card, prices.get(card.reference)) for quantity, card in card_list
+        ]
+        for name, card_list in card_lists.items()
+    }
+
+    # The card displayed by default is the hero or the first card of the decklist
+    display_card = deck.hero
+    display_price = deck.hero.last_price if deck.hero else None
+    if not display_card:
+        for card_list in card_lists.values():
+            if card_list:
+                _, display_card, display_price = card_list[0]
+                break
+
+    return {
+        "decklist": snapshot.decklist,
+        "character_list": card_lists["character"],
+        "spell_list": card_lists["spell"],
+        "permanent_list": card_lists["permanent"],
+        "display_card": display_card,
+        "display_price": display_price,
+        "stats": snapshot.stats,
         "legality": {
             "standard": {
                 "is_legal": deck.is_standard_legal,
@@ -246,45 +437,262 @@ def get_deck_details(deck: Deck) -> dict:
     }
 
 
+def get_deck_total_price(
+    deck: Deck, quantities: dict[str, int] | None = None
+) -> int | None:
+    """Compute the market price of a Deck's decklist, including its hero.
+
+    Args:
+        deck (Deck): The Deck to evaluate.
+        quantities (dict[str, int], optional): The quantity of each card of the Deck,
+            excluding its hero. If it's not provided, it's retrieved from the database.
+
+    Returns:
+        int | None: The total price in cents, or None if none of its cards has a price.
+    """
+    if quantities is None:
+        quantities = dict(deck.cardindeck_set.values_list("card_id", "quantity"))
+    if deck.hero_id:
+        quantities = quantities | {deck.hero_id: 1}
+
+    prices = Card.objects.filter(
+        reference__in=list(quantities), last_price__isnull=False
+    ).values_list("reference", "last_price")
+    return sum(price * quantities[reference] for reference, price in prices) or None
+
+
+def update_decks_total_price(qs: QuerySet[Deck]) -> int:
+    """Recompute the market price of the received Decks with a single UPDATE, summing
+    the latest price of their cards in the database. Only the Decks whose price
+    changed are written.
+
+    Args:
+        qs (QuerySet[Deck]): The Decks to update.
+
+    Returns:
+        int: Amount of updated Decks.
+    """
+    cards_price = (
+        CardInDeck.objects.filter(deck=OuterRef("pk"))
+        .values("deck")
+        .annotate(
+            total=Sum(
+                F("quantity") * F("card__last_price"), output_field=IntegerField()
+            )
+        )
+        .values("total")
+    )
+    hero_price = Card.objects.filter(reference=OuterRef("hero_id")).values("last_price")
+    total_price = NullIf(
+        Coalesce(Subquery(cards_price), 0) + Coalesce(Subquery(hero_price), 0), 0
+    )
+    # The prices are compared as zero when missing, so that unpriced Decks are skipped
+    return (
+        qs.order_by()
+        .alias(
+            current_price=Coalesce("total_price", 0),
+            new_price=Coalesce(total_price, 0),
+        )
+        .exclude(current_price=F("new_price"))
+        .update(total_price=total_price)
+    )
+
+
+def get_deck_card_codes(
+    deck: Deck, references: Iterable[str] | None = None
+) -> list[str]:
+    """Compute the card codes and family codes of a Deck's cards, including its hero.
+
+    Args:
+        deck (Deck): The Deck to describe.
+        references (Iterable[str], optional): The references of the Deck's cards,
+            excluding its hero. If they're not provided, they're retrieved from the
+            database.
+
+    Returns:
+        list[str]: The sorted codes, without repetitions.
+    """
+    if references is None:
+        references = deck.cardindeck_set.values_list("card_id", flat=True)
+    references = [*references, deck.hero_id] if deck.hero_id else [*references]
+    codes = {card_code_from_reference(reference) for reference in references}
+    codes |= {family_code_from_reference(reference) for reference in references}
+    return sorted(codes)
+
+
 def sort_by_mana_cost(row):
-    return row[1].stats["main_cost"], row[1].stats["recall_cost"]
+    return row[1].main_cost, row[1].recall_cost
 
 
 @transaction.atomic
-def patch_deck(deck: Deck, name: str, changes: dict[str, int]) -> None:
+def patch_deck(deck: Deck, name: str, changes: dict[str, int]) -> DeckSummary:
+    """Apply a set of changes to the decklist of a Deck.
+
+    The referenced cards are resolved with the card catalog and the Deck's decklist is
+    retrieved with a single query. The changes are written with a single insert,
+    update and delete, regardless of the amount of changes received. The Deck's
+    summary is updated with the same changes, and its snapshot, total price and card
+    codes are recomputed from the resulting decklist without reading it again.
+    References that do not exist are ignored. The Deck itself
+    isn't saved, which should happen within the same transaction.
+
+    Args:
+        deck (Deck): The Deck to modify.
+        name (str): The new name of the Deck.
+        changes (dict[str, int]): The new quantity of each modified card.
+
+    Returns:
+        DeckSummary: The Deck's updated summary.
+    """
     deck.name = name
 
+    summary = get_deck_summary(deck, lock=True)
+    cards = card_catalog.get_many(changes)
+    cids = {cid.card_id: cid for cid in deck.cardindeck_set.all()}
+    quantities = {reference: cid.quantity for reference, cid in cids.items()}
+    created_cids = []
+    updated_cids = []
+    deleted_cids = []
+
     for card_reference, quantity in changes.items():
-        try:
-            card = Card.objects.get(reference=card_reference)
-            if card.type == Card.Type.HERO:
-                if quantity > 0:
-                    deck.hero = card
-                elif quantity == 0 and deck.hero == card:
-                    deck.hero = None
-            else:
-                cid = CardInDeck.objects.get(card=card, deck=deck)
-                if quantity > 0:
-                    cid.quantity = quantity
-                    cid.save()
-                else:
-                    cid.delete()
-        except Card.DoesNotExist:
+        if card_reference not in cards:
             continue
-        except CardInDeck.DoesNotExist:
+        card = cards[card_reference]
+        if card.type == Card.Type.HERO:
+            if quantity > 0:
+                deck.hero_id = card.reference
+            elif quantity == 0 and deck.hero_id == card.reference:
+                deck.hero_id = None
+            continue
+
+        if quantity > 0:
+            quantities[card_reference] = quantity
+        else:
+            quantities.pop(card_reference, None)
+
+        if card_reference in cids:
+            cid = cids[card_reference]
+            summary.remove_card(card, cid.quantity)
             if quantity > 0:
-                CardInDeck.objects.create(card=card, deck=deck, quantity=quantity)
+                cid.quantity = quantity
+                updated_cids.append(cid)
+            else:
+                deleted_cids.append(cid.id)
+        elif quantity > 0:
+            created_cids.append(
+                CardInDeck(deck=deck, card_id=card_reference, quantity=quantity)
+            )
+        summary.add_card(card, quantity)
 
+    if created_cids:
+        CardInDeck.objects.bulk_create(created_cids)
+    if updated_cids:
+        CardInDeck.objects.bulk_update(updated_cids, ["quantity"])
+    if deleted_cids:
+        CardInDeck.objects.filter(id__in=deleted_cids).delete()
+    summary.save()
+    build_deck_snapshot(deck, quantities)
+    deck.total_price = get_deck_total_price(deck, quantities)
+    deck.card_codes = get_deck_card_codes(deck, quantities)
 
-def remove_card_from_deck(deck: Deck, reference: str) -> None:
-    card = Card.objects.get(reference=reference)
-    if card.type == Card.Type.HERO and deck.hero.reference == card.reference:
+    return summary
+
+
+@transaction.atomic
+def remove_card_from_deck(deck: Deck, reference: str) -> DeckSummary:
+    card = card_catalog.get(reference)
+    if card is None:
+        raise Card.DoesNotExist
+    summary = get_deck_summary(deck, lock=True)
+    quantities = dict(deck.cardindeck_set.values_list("card_id", "quantity"))
+    if card.type == Card.Type.HERO and deck.hero_id == card.reference:
         # If it's the Deck's hero, remove the reference
-        deck.hero = None
+        deck.hero_id = None
     else:
-        # Retrieve the CiD and delete it
-        cid = CardInDeck.objects.get(deck=deck, card=card)
-        cid.delete()
+        # Delete the CiD
+        if card.reference not in quantities:
+            raise CardInDeck.DoesNotExist
+        CardInDeck.objects.filter(deck=deck, card_id=card.reference).delete()
+        summary.remove_card(card, quantities.pop(card.reference))
+        summary.save()
+    build_deck_snapshot(deck, quantities)
+    deck.total_price = get_deck_total_price(deck, quantities)
+    deck.card_codes = get_deck_card_codes(deck, quantities)
+    return summary
+
+
+def validate_decklists(decklists: list[str]) -> list[dict]:
+    """Evaluate the legality of multiple text decklists on every game mode without
+    storing anything in the database. All the decklists are evaluated at once.
+
+    Args:
+        decklists (list[str]): Text decklists with a quantity and a reference on each
+            line.
+
+    Returns:
+        list[dict]: For each decklist, either the reason it couldn't be evaluated or
+            its legality and errors on each game mode.
+    """
+    results = [{} for _ in decklists]
+    parsed_decklists = {}
+    for index, decklist in enumerate(decklists):
+        try:
+            parsed_decklists[index] = parse_decklist(decklist)
+        except MalformedDeckException as e:
+            results[index]["error"] = e.detail
+
+    cards = card_catalog.get_many(
+        reference
+        for quantities, _occurrences in parsed_decklists.values()
+        for reference in quantities
+    )
+
+    positions = []
+    legality_data = []
+    for index, (quantities, occurrences) in parsed_decklists.items():
+        if missing := [reference for reference in quantities if reference not in cards]:
+            results[index]["error"] = _("Card '%(reference)s' wasn't found") % {
+                "reference": missing[0]
+            }
+            continue
+
+        heroes = [
+            cards[reference]
+            for reference in quantities
+            if cards[reference].type == Card.Type.HERO
+        ]
+        if sum(occurrences[hero.reference] for hero in heroes) > 1:
+            results[index]["error"] = _("Multiple heroes present in the decklist")
+            continue
+
+        summary = DeckSummary()
+        for reference, quantity in quantities.items():
+            if cards[reference].type != Card.Type.HERO:
+                summary.add_card(cards[reference], quantity)
+        legality_data.append(summary.get_legality_data(heroes[0] if heroes else None))
+        positions.append(index)
+
+    if not legality_data:
+        return results
+
+    columns = {
+        metric: np.array([data[metric] for data in legality_data])
+        for metric in legality_data[0]
+    }
+    for index in positions:
+        results[index]["legality"] = {}
+    for name, game_mode in GAME_MODES.items():
+        error_lists = get_error_lists(game_mode, **columns)
+        for index, error_list in zip(positions, error_lists):
+            results[index]["legality"][name] = {
+                "is_legal": not error_list,
+                "errors": [
+                    {"code": error, "message": error.to_user(game_mode)}
+                    for error in error_list
+                ],
+            }
+
+    return results
 
 
 def parse_card_query_syntax(
@@ -301,52 +709,29 @@ def parse_card_query_syntax(
             tags.append((_("reference"), ":", reference))
             return qs.filter(reference=reference), tags, True
 
-    hc_regex = r"hc(?P<hc_op>:|=|>|>=|<|<=)(?P<hc>\d+)"
+    stat_regex = r"\b(?P<stat>hc|rc|fp|mp|op)(?P<op>:|=|>=|>|<=|<)(?P<value>\d+)"
 
-    if matches := re.finditer(hc_regex, query, re.ASCII):
-        for re_match in matches:
-            op = re_match.group("hc_op")
-            value = int(re_match.group("hc"))
-            match op:
-                case "=" | ":":
-                    filters &= Q(stats__main_cost=value)
-                case "<":
-                    filters &= Q(stats__main_cost__lt=value)
-                case "<=":
-                    filters &= Q(stats__main_cost__lte=value)
-                case ">":
-                    filters &= Q(stats__main_cost__gt=value)
-                case ">=":
-                    filters &= Q(stats__main_cost__gte=value)
-            tags.append((_("hand cost"), OPERATOR_TO_HTML[op], str(value)))
-        query = re.sub(hc_regex, "", query)
-
-    rc_regex = r"rc(?P<rc_op>:|=|>|>=|<|<=)(?P<rc>\d+)"
-
-    if matches := re.finditer(rc_regex, query, re.ASCII):
+    if matches := re.finditer(stat_regex, query, re.ASCII):
         for re_match in matches:
-            op = re_match.group("rc_op")
-            value = int(re_match.group("rc"))
-            match op:
-                case "=" | ":":
-                    filters &= Q(stats__recall_cost=value)
-                case "<":
-                    filters &= Q(stats__recall_cost__lt=value)
-                case "<=":
-                    filters &= Q(stats__recall_cost__lte=value)
-                case ">":
-                    filters &= Q(stats__recall_cost__gt=value)
-                case ">=":
-                    filters &= Q(stats__recall_cost__gte=value)
-            tags.append((_("reserve cost"), OPERATOR_TO_HTML[op], str(value)))
-        query = re.sub(rc_regex, "", query)
-
+            field, label = STAT_FILTERS[re_match.group("stat")]
+            op = re_match.group("op")
+            value = int(re_match.group("value"))
+            filters &= Q(**{f"{field}{OPERATOR_TO_LOOKUP[op]}": value})
+            tags.append((label, OPERATOR_TO_HTML[op], str(value)))
+        query = re.sub(stat_regex, "", query, flags=re.ASCII)
+
+    # The texts are searched with the full-text indexes of the active language
+    language = get_language()
+    search_config = SEARCH_CONFIGS.get(language, "simple")
     x_regex = r"x:(?P<effect>\w+)"
 
     if matches := re.finditer(x_regex, query):
+        qs = qs.alias(
+            effect_search=card_search_vector(["main_effect", "echo_effect"], language)
+        )
         for re_match in matches:
             value = re_match.group("effect")
-            filters &= Q(main_effect__icontains=value) | Q(echo_effect__icontains=value)
+            filters &= Q(effect_search=build_prefix_query([value], search_config))
             tags.append((_("ability"), ":", value))
         query = re.sub(x_regex, "", query)
 
@@ -382,33 +767,133 @@ def parse_card_query_syntax(
     query = query.strip()
     if query:
         tags.append((_("query"), ":", query))
-        return qs.filter(filters & Q(name__icontains=query)), tags, False
-    else:
-        return qs.filter(filters), tags, False
+        if words := re.findall(r"\w+", query):
+            # The cards are ranked by how well their name matches the query
+            search_query = build_prefix_query(words, search_config)
+            name_search = card_search_vector(["name"], language)
+            qs = qs.alias(name_search=name_search).annotate(
+                relevance=SearchRank(name_search, search_query)
+            )
+            filters &= Q(name_search=search_query)
+        else:
+            filters &= Q(name__icontains=query)
+
+    return qs.filter(filters), tags, False
+
+
+def build_prefix_query(
+    words: list[str], config: str, operator: str = "<->"
+) -> SearchQuery:
+    """Build a full-text query matching the received words, where each word can be the
+    beginning of a longer one (e.g. `sier koj` matches `Sierra & Kojo`).
+
+    Args:
+        words (list[str]): The words to search.
+        config (str): The text search configuration used to parse the words.
+        operator (str, optional): The operator joining the words. Defaults to "<->",
+            which matches the words in the same order. "&" matches them anywhere.
+
+    Returns:
+        SearchQuery: The full-text query.
+    """
+    return SearchQuery(
+        f" {operator} ".join(f"{word}:*" for word in words),
+        config=config,
+        search_type="raw",
+    )
+
+
+def fetch_unique_card_locales(reference: str) -> dict[str, dict | None]:
+    """Fetch the data of a unique card in every available language from the official
+    API. All the languages are requested concurrently over a shared session, so that
+    the whole operation takes roughly as long as the slowest response. The languages
+    without a response after `ALTERED_API_TIMEOUT` seconds are considered failed.
+
+    Args:
+        reference (str): Reference of the unique card.
+
+    Returns:
+        dict[str, dict | None]: The response of each language, or None if the request
+            for that language failed.
+    """
+    api_url = f"{settings.ALTERED_API_BASE_URL}{CARDS_API_ENDPOINT}/{reference}/"
+
+    def fetch(language: str) -> requests.Response:
+        headers = {"Accept-Language": get_altered_api_locale(language)}
+        return SESSION.get(
+            api_url, headers=headers, timeout=settings.ALTERED_API_TIMEOUT
+        )
+
+    languages = [language for language, _ in settings.LANGUAGES]
+    executor = ThreadPoolExecutor(max_workers=len(languages))
+    futures = {language: executor.submit(fetch, language) for language in languages}
+    # The timeout of the requests applies to each socket operation, so a slow response
+    # could exceed it. The deadline of the whole operation is enforced here instead
+    wait(futures.values(), timeout=settings.ALTERED_API_TIMEOUT)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    card_locales = {}
+    for language, future in futures.items():
+        try:
+            if not future.done():
+                raise requests.Timeout(
+                    f"No response after {settings.ALTERED_API_TIMEOUT} seconds"
+                )
+            response = future.result()
+        except requests.RequestException as e:
+            if language == settings.LANGUAGE_CODE:
+                raise AlteredAPIError(
+                    "Couldn't access the Altered API",
+                    status_code=HTTPStatus.GATEWAY_TIMEOUT,
+                ) from e
+            logger.warning(f"Failed to fetch '{reference}' in '{language}': {e}")
+            card_locales[language] = None
+            continue
+
+        if response.status_code != HTTPStatus.OK:
+            if language == settings.LANGUAGE_CODE:
+                match response.status_code:
+                    case HTTPStatus.UNAUTHORIZED:
+                        msg = f"The card {reference} is not public"
+                    case HTTPStatus.NOT_FOUND:
+                        msg = f"The card {reference} does not exist"
+                    case _:
+                        msg = "Couldn't access the Altered API"
+                raise AlteredAPIError(msg, status_code=response.status_code)
+            logger.warning(
+                f"Failed to fetch '{reference}' in '{language}': {response.status_code}"
+            )
+            card_locales[language] = None
+            continue
+
+        try:
+            card_locales[language] = response.json()
+        except requests.JSONDecodeError:
+            if language == settings.LANGUAGE_CODE:
+                raise AlteredAPIError(
+                    "Couldn't access the Altered API",
+                    status_code=HTTPStatus.BAD_GATEWAY,
+                )
+            logger.warning(f"Failed to parse '{reference}' in '{language}'")
+            card_locales[language] = None
+
+    return card_locales
 
 
 @locale_agnostic
-def import_unique_card(reference: str) -> Card:  # pragma: no cover
+def import_unique_card(
+    reference: str, card_locales: dict[str, dict | None] = None
+) -> Card:
 
     # Check if the card already exists in the database
     if Card.objects.filter(reference=reference).exists():
         raise CardAlreadyExists
 
-    # Fetch the card data from the official API
-    api_url = f"{ALTERED_TCG_API_URL}/{reference}/"
-    response = requests.get(api_url, headers=HEADERS)
-
-    if response.status_code != HTTPStatus.OK:
-        match response.status_code:
-            case HTTPStatus.UNAUTHORIZED:
-                msg = f"The card {reference} is not public"
-            case HTTPStatus.NOT_FOUND:
-                msg = f"The card {reference} does not exist"
-            case _:
-                msg = "Couldn't access the Altered API"
-        raise AlteredAPIError(msg, status_code=response.status_code)
-
-    card_data = response.json()
+    if card_locales is None:
+        # Fetch the card data in all languages from the official API
+        card_locales = fetch_unique_card_locales(reference)
+    card_data = card_locales[settings.LANGUAGE_CODE]
+
     family = "_".join(reference.split("_")[:-2])
     try:
         og_card = Card.objects.filter(
@@ -427,13 +912,11 @@ def import_unique_card(reference: str) -> Card:  # pragma: no cover
         "rarity": Card.Rarity.UNIQUE,
         "image_url": card_data["imagePath"],
         "set": og_card.set,
-        "stats": {
-            "main_cost": int(card_data["elements"]["MAIN_COST"]),
-            "recall_cost": int(card_data["elements"]["RECALL_COST"]),
-            "forest_power": int(card_data["elements"]["FOREST_POWER"]),
-            "mountain_power": int(card_data["elements"]["MOUNTAIN_POWER"]),
-            "ocean_power": int(card_data["elements"]["OCEAN_POWER"]),
-        },
+        "main_cost": int(card_data["elements"]["MAIN_COST"]),
+        "recall_cost": int(card_data["elements"]["RECALL_COST"]),
+        "forest_power": int(card_data["elements"]["FOREST_POWER"]),
+        "mountain_power": int(card_data["elements"]["MOUNTAIN_POWER"]),
+        "ocean_power": int(card_data["elements"]["OCEAN_POWER"]),
     }
     if "MAIN_EFFECT" in card_data["elements"]:
         card_dict["main_effect"] = card_data["elements"]["MAIN_EFFECT"]
@@ -442,22 +925,20 @@ def import_unique_card(reference: str) -> Card:  # pragma: no cover
 
     card = Card(**card_dict)
 
-    card_code = card.get_card_code()
-    banned_cards = BannedCard.objects.filter(
-        faction=card.faction, family_name__endswith="_U"
-    )
-    card.is_legal = not any([card_code == ban.family_name for ban in banned_cards])
+    card.is_legal = not BannedCard.objects.filter(
+        faction=card.faction, family_name=card_code_from_reference(reference)
+    ).exists()
 
-    for language, _ in settings.LANGUAGES:  # noqa: F402
+    for language, card_data in card_locales.items():
         if language == settings.LANGUAGE_CODE:
             continue
         activate(language)
-        locale_code = get_altered_api_locale(language)
-        headers = {"Accept-Language": locale_code}
-        response = requests.get(api_url, headers=headers)
-        card_data = response.json()
         card.name = og_card.name
+        if not card_data:
+            # If a language failed, the default one will be displayed instead
+            continue
 
+        locale_code = get_altered_api_locale(language)
         if "MAIN_EFFECT" in card_data["elements"]:
             card.main_effect = card_data["elements"]["MAIN_EFFECT"]
         if "ECHO_EFFECT" in card_data["elements"]:
@@ -487,6 +968,194 @@ def import_unique_card(reference: str) -> Card:  # pragma: no cover
     return card
 
 
+def enqueue_card_import_job(job: CardImportJob) -> None:
+    """Schedule the received job to be processed in the background once the current
+    transaction is committed.
+
+    Args:
+        job (CardImportJob): The job to process.
+    """
+
+    def submit():
+        with QUEUED_IMPORT_JOBS_LOCK:
+            QUEUED_IMPORT_JOBS.add(job.pk)
+        IMPORT_JOB_EXECUTOR.submit(run_in_background)
+
+    def run_in_background():
+        with QUEUED_IMPORT_JOBS_LOCK:
+            QUEUED_IMPORT_JOBS.discard(job.pk)
+        try:
+            run_card_import_job(job)
+        finally:
+            # The thread needs to release its own database connection
+            connection.close()
+
+    transaction.on_commit(submit)
+
+
+def refresh_queued_import_jobs() -> None:
+    """Mark the jobs waiting in this process' executor as alive."""
+    with QUEUED_IMPORT_JOBS_LOCK:
+        queued = list(QUEUED_IMPORT_JOBS)
+    if queued:
+        CardImportJob.objects.filter(
+            pk__in=queued, status=CardImportJob.Status.PENDING
+        ).update(updated_at=timezone.now())
+
+
+def run_card_import_job(job: CardImportJob) -> None:
+    """Import all the unique cards referenced by a job and favorite them for the job's
+    user.
+
+    The references already present in the database are resolved with a single query.
+    The rest are fetched concurrently from the official API with a bounded pool, while
+    the cards are stored and the job's progress is saved from the calling thread. If
+    the job fails, the references that weren't processed are marked as failed. Jobs
+    that were already finished (e.g. given up on while waiting) are skipped.
+
+    Args:
+        job (CardImportJob): The job to process.
+    """
+    if CardImportJob.objects.filter(
+        pk=job.pk, status=CardImportJob.Status.FINISHED
+    ).exists():
+        logger.info(f"Skipping the finished card import job {job.pk}")
+        return
+
+    try:
+        # A job run again starts over, as the cards imported by the previous run are
+        # now found in the database
+        job.status = CardImportJob.Status.RUNNING
+        job.attempts += 1
+        job.processed_count = 0
+        job.success = []
+        job.failure = []
+        job.save(
+            update_fields=[
+                "status",
+                "attempts",
+                "processed_count",
+                "success",
+                "failure",
+                "updated_at",
+            ]
+        )
+
+        existing_cards = list(
+            Card.objects.filter(reference__in=job.references).values_list(
+                "reference", flat=True
+            )
+        )
+        FavoriteCard.objects.bulk_create(
+            [FavoriteCard(user=job.user, card_id=ref) for ref in existing_cards],
+            ignore_conflicts=True,
+        )
+        job.success += existing_cards
+        job.processed_count += len(existing_cards)
+        job.save(update_fields=["success", "processed_count", "updated_at"])
+
+        pending = set(job.references).difference(existing_cards)
+        refreshed_at = time.monotonic()
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_IMPORTS) as executor:
+            futures = {
+                executor.submit(fetch_unique_card_locales, reference): reference
+                for reference in pending
+            }
+            for future in as_completed(futures):
+                reference = futures[future]
+                try:
+                    card = import_unique_card(reference, card_locales=future.result())
+                    FavoriteCard.objects.get_or_create(user=job.user, card=card)
+                    job.success.append(reference)
+                except CardAlreadyExists:
+                    # It has been imported by someone else in the meantime
+                    FavoriteCard.objects.get_or_create(user=job.user, card_id=reference)
+                    job.success.append(reference)
+                except AlteredAPIError:
+                    job.failure.append(reference)
+                job.processed_count += 1
+                job.save(
+                    update_fields=[
+                        "success",
+                        "failure",
+                        "processed_count",
+                        "updated_at",
+                    ]
+                )
+                if time.monotonic() - refreshed_at >= (
+                    settings.CARD_IMPORT_JOB_TIMEOUT / 4
+                ):
+                    refresh_queued_import_jobs()
+                    refreshed_at = time.monotonic()
+    except Exception:
+        logger.exception(f"The card import job {job.pk} failed")
+        processed = set(job.success).union(job.failure)
+        job.failure += [
+            ref for ref in dict.fromkeys(job.references) if ref not in processed
+        ]
+        job.processed_count = len(job.references)
+    finally:
+        job.status = CardImportJob.Status.FINISHED
+        job.finished_at = timezone.now()
+        job.save(
+            update_fields=[
+                "status",
+                "failure",
+                "processed_count",
+                "finished_at",
+                "updated_at",
+            ]
+        )
+
+
+def recover_card_import_job(job: CardImportJob) -> bool:
+    """Recover a job that hasn't progressed for `CARD_IMPORT_JOB_TIMEOUT` seconds,
+    which happens when the process running it is stopped. The jobs waiting behind
+    another job are refreshed by it, so they aren't recovered. The job is claimed with a
+    conditional update, so that it's only recovered once. If it has already been run
+    `CARD_IMPORT_JOB_MAX_ATTEMPTS` times, it's finished failing the references that
+    weren't imported.
+
+    Args:
+        job (CardImportJob): The job to recover.
+
+    Returns:
+        bool: Whether the job needs to be run again.
+    """
+    deadline = timezone.now() - timedelta(seconds=settings.CARD_IMPORT_JOB_TIMEOUT)
+    if job.status == CardImportJob.Status.FINISHED or job.updated_at > deadline:
+        return False
+
+    claimed = (
+        CardImportJob.objects.filter(pk=job.pk, updated_at=job.updated_at)
+        .exclude(status=CardImportJob.Status.FINISHED)
+        .update(updated_at=timezone.now())
+    )
+    if not claimed:
+        return False
+
+    if job.attempts < settings.CARD_IMPORT_JOB_MAX_ATTEMPTS:
+        logger.warning(f"Recovering the lost card import job {job.pk}")
+        return True
+
+    logger.error(f"Giving up on the card import job {job.pk}")
+    success = set(job.success)
+    job.status = CardImportJob.Status.FINISHED
+    job.failure = [ref for ref in job.references if ref not in success]
+    job.processed_count = len(job.references)
+    job.finished_at = timezone.now()
+    job.save(
+        update_fields=[
+            "status",
+            "failure",
+            "processed_count",
+            "finished_at",
+            "updated_at",
+        ]
+    )
+    return False
+
+
 def filter_by_query(qs: QuerySet[Deck], query: str) -> QuerySet[Deck]:
     filters = Q()
     tags = []
@@ -519,16 +1188,74 @@ def filter_by_query(qs: QuerySet[Deck], query: str) -> QuerySet[Deck]:
                 tags.append((_("reference"), ":", reference))
             query = re.sub(ref_regex, "", query)
 
+        # Terms searching the decks playing some cards, which are resolved with the
+        # index of card codes. Multiple codes separated by "|" match any of them, and
+        # a leading "-" excludes the decks matching the term
+        code_regex = r"(?<!\S)(?P<negated>-?)(?P<key>has|family):(?P<codes>[\w|]+)"
+
+        if matches := re.finditer(code_regex, query):
+            for re_match in matches:
+                is_family = re_match.group("key") == "family"
+                codes = sorted(
+                    {
+                        normalize_card_code(code, is_family)
+                        for code in re_match.group("codes").split("|")
+                        if code
+                    }
+                )
+                if not codes:
+                    continue
+                if len(codes) == 1:
+                    code_filter = Q(card_codes__contains=codes)
+                else:
+                    code_filter = Q(card_codes__overlap=codes)
+
+                operator = ":"
+                if re_match.group("negated"):
+                    code_filter = ~code_filter
+                    operator = "!="
+                filters &= code_filter
+                tags.append(
+                    (_("family") if is_family else _("card"), operator, "|".join(codes))
+                )
+            query = re.sub(code_regex, "", query)
+
         query = query.strip()
         if query:
             tags.append((_("query"), ":", query))
-            qs = qs.filter(filters & Q(name__icontains=query))
-        else:
-            qs = qs.filter(filters)
+            if words := re.findall(r"\w+", query):
+                # The decks are ranked by how well their texts match the query, whose
+                # words might appear in any of them
+                search_query = build_prefix_query(words, DECK_SEARCH_CONFIG, "&")
+                qs = qs.annotate(relevance=SearchRank(F("search_vector"), search_query))
+                filters &= Q(search_vector=search_query)
+            else:
+                filters &= Q(name__icontains=query)
+        qs = qs.filter(filters)
 
     return qs, tags if tags else None
 
 
+def normalize_card_code(code: str, is_family: bool) -> str:
+    """Transform a code received in a search into the format stored on the Decks. Full
+    references (e.g. `ALT_CORE_B_AX_04_C`) are accepted as well.
+
+    Args:
+        code (str): The received code.
+        is_family (bool): Whether to retrieve the family code instead of the card code.
+
+    Returns:
+        str: The card code (e.g. `AX_04_C`) or family code (e.g. `AX_04`).
+    """
+    code = code.upper()
+    parts = code.split("_")
+    if len(parts) > 3:
+        if is_family:
+            return family_code_from_reference(code)
+        return card_code_from_reference(code)
+    return "_".join(parts[:2]) if is_family else code
+
+
 def filter_by_faction(qs: QuerySet[Deck], factions: str) -> QuerySet[Deck]:
     if factions:
         try:
@@ -563,6 +1290,20 @@ def filter_by_tags(qs: QuerySet[Deck], tags: str) -> QuerySet[Deck]:
     return qs
 
 
+def filter_by_price(
+    qs: QuerySet[Deck], min_price: str, max_price: str
+) -> QuerySet[Deck]:
+    # The prices are received in euros, but they're stored in cents
+    try:
+        if min_price:
+            qs = qs.filter(total_price__gte=round(float(min_price) * 100))
+        if max_price:
+            qs = qs.filter(total_price__lte=round(float(max_price) * 100))
+    except (ValueError, OverflowError):
+        pass
+    return qs
+
+
 def filter_by_other(qs: QuerySet[Deck], other_filters: str, user) -> QuerySet[Deck]:
     if other_filters:
         other_filters = other_filters.split(",")
@@ -575,11 +1316,3 @@ def filter_by_other(qs: QuerySet[Deck], other_filters: str, user) -> QuerySet[De
         if "description" in other_filters:
             qs = qs.exclude(description="")
     return qs
-
-
-def card_code_from_reference(reference: str) -> str:
-    return "_".join(reference.split("_")[3:6])
-
-
-def family_code_from_reference(reference: str) -> str:
-    return "_".join(reference.split("_")[3:5])
@@ -1,10 +1,16 @@
 from abc import ABC
-from collections import defaultdict
 from enum import StrEnum
 
 from django.utils.translation import gettext_lazy as _
+import numpy as np
+import numpy.typing as npt
 
-from decks.models import CardInDeck, Deck, Card
+from decks.card_catalog import card_catalog
+from decks.models import Deck, DeckSummary
+
+
+# Error code of a rule and the mask of the decks failing it
+type ErrorChecks = tuple["GameMode.ErrorCode", npt.NDArray[np.bool_]]
 
 
 class GameMode(ABC):
@@ -26,52 +32,78 @@ class GameMode(ABC):
     IS_HERO_MANDATORY: bool = False
 
     @classmethod
-    def validate(cls, **data) -> list:
-        """Validate if the received parameters comply with this game mode's rules and
-        returns a list with the error codes (`GameMode.ErrorCode`) of the noticed
-        failures.
+    def validate(cls, **columns: npt.NDArray) -> list[ErrorChecks]:
+        """Validate if the received metrics comply with this game mode's rules. Each
+        metric is a column holding the value of multiple decks, so that all of them are
+        evaluated at once.
 
         Returns:
-            list[GameMode.ErrorCode]: List of failed rules to be considered a valid
-                                      deck for the format.
+            list[ErrorChecks]: List of the evaluated rules, each with its error code
+                               (`GameMode.ErrorCode`) and a mask of the decks that
+                               failed it.
         """
-        error_list = []
-
-        if cls.MIN_FACTION_COUNT is not None and (
-            data["faction_count"] < cls.MIN_FACTION_COUNT
-        ):
-            error_list.append(cls.ErrorCode.ERR_MISSING_FACTION_COUNT)
-        if cls.MAX_FACTION_COUNT is not None and (
-            data["faction_count"] > cls.MAX_FACTION_COUNT
-        ):
-            error_list.append(cls.ErrorCode.ERR_EXCEED_FACTION_COUNT)
-        if cls.MIN_TOTAL_COUNT is not None and (
-            data["total_count"] < cls.MIN_TOTAL_COUNT
-        ):
-            error_list.append(cls.ErrorCode.ERR_NOT_ENOUGH_CARD_COUNT)
-        if cls.MAX_RARE_COUNT is not None and (data["rare_count"] > cls.MAX_RARE_COUNT):
-            error_list.append(cls.ErrorCode.ERR_EXCEED_RARE_COUNT)
-        if cls.MAX_UNIQUE_COUNT is not None and (
-            data["unique_count"] > cls.MAX_UNIQUE_COUNT
-        ):
-            error_list.append(cls.ErrorCode.ERR_EXCEED_UNIQUE_COUNT)
-        if cls.MAX_EXALT_COUNT is not None and (
-            data["exalt_count"] > cls.MAX_EXALT_COUNT
-        ):
-            error_list.append(cls.ErrorCode.ERR_EXCEED_EXALT_COUNT)
-        if cls.ENFORCE_INDIVIDUAL_UNIQUES and data["repeats_same_unique"]:
-            error_list.append(cls.ErrorCode.ERR_UNIQUE_IS_REPEATED)
-        if cls.MAX_SAME_FAMILY_CARD_COUNT is not None and (
-            max(data["family_count"].values(), default=0)
-            > cls.MAX_SAME_FAMILY_CARD_COUNT
-        ):
-            error_list.append(cls.ErrorCode.ERR_EXCEED_SAME_FAMILY_COUNT)
-        if cls.IS_HERO_MANDATORY and not data["has_hero"]:
-            error_list.append(cls.ErrorCode.ERR_MISSING_HERO)
-        if data["has_banned_card"]:
-            error_list.append(cls.ErrorCode.ERR_CONTAINS_BANNED_CARD)
-
-        return error_list
+        checks = []
+
+        if cls.MIN_FACTION_COUNT is not None:
+            checks.append(
+                (
+                    cls.ErrorCode.ERR_MISSING_FACTION_COUNT,
+                    columns["faction_count"] < cls.MIN_FACTION_COUNT,
+                )
+            )
+        if cls.MAX_FACTION_COUNT is not None:
+            checks.append(
+                (
+                    cls.ErrorCode.ERR_EXCEED_FACTION_COUNT,
+                    columns["faction_count"] > cls.MAX_FACTION_COUNT,
+                )
+            )
+        if cls.MIN_TOTAL_COUNT is not None:
+            checks.append(
+                (
+                    cls.ErrorCode.ERR_NOT_ENOUGH_CARD_COUNT,
+                    columns["total_count"] < cls.MIN_TOTAL_COUNT,
+                )
+            )
+        if cls.MAX_RARE_COUNT is not None:
+            checks.append(
+                (
+                    cls.ErrorCode.ERR_EXCEED_RARE_COUNT,
+                    columns["rare_count"] > cls.MAX_RARE_COUNT,
+                )
+            )
+        if cls.MAX_UNIQUE_COUNT is not None:
+            checks.append(
+                (
+                    cls.ErrorCode.ERR_EXCEED_UNIQUE_COUNT,
+                    columns["unique_count"] > cls.MAX_UNIQUE_COUNT,
+                )
+            )
+        if cls.MAX_EXALT_COUNT is not None:
+            checks.append(
+                (
+                    cls.ErrorCode.ERR_EXCEED_EXALT_COUNT,
+                    columns["exalt_count"] > cls.MAX_EXALT_COUNT,
+                )
+            )
+        if cls.ENFORCE_INDIVIDUAL_UNIQUES:
+            checks.append(
+                (cls.ErrorCode.ERR_UNIQUE_IS_REPEATED, columns["repeats_same_unique"])
+            )
+        if cls.MAX_SAME_FAMILY_CARD_COUNT is not None:
+            checks.append(
+                (
+                    cls.ErrorCode.ERR_EXCEED_SAME_FAMILY_COUNT,
+                    columns["max_family_count"] > cls.MAX_SAME_FAMILY_CARD_COUNT,
+                )
+            )
+        if cls.IS_HERO_MANDATORY:
+            checks.append((cls.ErrorCode.ERR_MISSING_HERO, ~columns["has_hero"]))
+        checks.append(
+            (cls.ErrorCode.ERR_CONTAINS_BANNED_CARD, columns["has_banned_card"])
+        )
+
+        return checks
 
     class ErrorCode(StrEnum):
         # Does not reach the minimum faction count
@@ -197,17 +229,18 @@ class DraftGameMode(GameMode):
     MIN_TOTAL_COUNT = 30
 
     @classmethod
-    def validate(cls, **data) -> list[GameMode.ErrorCode]:
-        error_list = []
-
-        if data["faction_count"] > cls.MAX_FACTION_COUNT:
-            error_list.append(cls.ErrorCode.ERR_EXCEED_FACTION_COUNT)
-        if (data["total_count"] + int(data["has_hero"])) < cls.MIN_TOTAL_COUNT:
-            error_list.append(cls.ErrorCode.ERR_NOT_ENOUGH_CARD_COUNT)
-        if data["repeats_same_unique"]:
-            error_list.append(cls.ErrorCode.ERR_UNIQUE_IS_REPEATED)
-
-        return error_list
+    def validate(cls, **columns: npt.NDArray) -> list[ErrorChecks]:
+        return [
+            (
+                cls.ErrorCode.ERR_EXCEED_FACTION_COUNT,
+                columns["faction_count"] > cls.MAX_FACTION_COUNT,
+            ),
+            (
+                cls.ErrorCode.ERR_NOT_ENOUGH_CARD_COUNT,
+                (columns["total_count"] + columns["has_hero"]) < cls.MIN_TOTAL_COUNT,
+            ),
+            (cls.ErrorCode.ERR_UNIQUE_IS_REPEATED, columns["repeats_same_unique"]),
+        ]
 
 
 class Singleton(GameMode):
@@ -250,101 +283,159 @@ class Singleton(GameMode):
     }
 
     @classmethod
-    def validate(cls, **data) -> list[GameMode.ErrorCode]:
-        error_list = []
-
-        if data["faction_count"] > cls.MAX_FACTION_COUNT:
-            error_list.append(cls.ErrorCode.ERR_EXCEED_FACTION_COUNT)
-        if data["total_count"] < cls.MIN_TOTAL_COUNT:
-            error_list.append(cls.ErrorCode.ERR_NOT_ENOUGH_CARD_COUNT)
-        if data["total_count"] > cls.MAX_TOTAL_COUNT:
-            error_list.append(cls.ErrorCode.ERR_EXCEED_CARD_COUNT)
-        if data["repeats_same_unique"]:
-            error_list.append(cls.ErrorCode.ERR_UNIQUE_IS_REPEATED)
-        if data["unique_count"] > cls.UNIQUE_COUNT_BY_HERO.get(
-            data["hero"], StandardGameMode.MAX_UNIQUE_COUNT
-        ):
-            error_list.append(cls.ErrorCode.ERR_EXCEED_UNIQUE_COUNT)
-        if not data["has_only_single_copies"]:
-            error_list.append(cls.ErrorCode.ERR_CONTAINS_MORE_THAN_ONE_COPY)
-        if data["has_banned_card"]:
-            error_list.append(cls.ErrorCode.ERR_CONTAINS_BANNED_CARD)
-
-        return error_list
-
-
-def update_deck_legality(deck: Deck) -> None:
-    """Receives a Deck object, extracts all the relevant metrics, evaluates the Deck's
-    legality on Standard and Draft game modes and updates the model.
+    def validate(cls, **columns: npt.NDArray) -> list[ErrorChecks]:
+        max_unique_count = np.array(
+            [
+                cls.UNIQUE_COUNT_BY_HERO.get(hero, StandardGameMode.MAX_UNIQUE_COUNT)
+                for hero in columns["hero"]
+            ],
+            dtype=int,
+        )
+
+        return [
+            (
+                cls.ErrorCode.ERR_EXCEED_FACTION_COUNT,
+                columns["faction_count"] > cls.MAX_FACTION_COUNT,
+            ),
+            (
+                cls.ErrorCode.ERR_NOT_ENOUGH_CARD_COUNT,
+                columns["total_count"] < cls.MIN_TOTAL_COUNT,
+            ),
+            (
+                cls.ErrorCode.ERR_EXCEED_CARD_COUNT,
+                columns["total_count"] > cls.MAX_TOTAL_COUNT,
+            ),
+            (cls.ErrorCode.ERR_UNIQUE_IS_REPEATED, columns["repeats_same_unique"]),
+            (
+                cls.ErrorCode.ERR_EXCEED_UNIQUE_COUNT,
+                columns["unique_count"] > max_unique_count,
+            ),
+            (
+                cls.ErrorCode.ERR_CONTAINS_MORE_THAN_ONE_COPY,
+                ~columns["has_only_single_copies"],
+            ),
+            (cls.ErrorCode.ERR_CONTAINS_BANNED_CARD, columns["has_banned_card"]),
+        ]
+
+
+# Game modes in which the legality of a deck is evaluated
+GAME_MODES: dict[str, type[GameMode]] = {
+    "standard": StandardGameMode,
+    "draft": DraftGameMode,
+    "nuc": NoUniqueChampionship,
+    "doubles": Doubles,
+    "singleton": Singleton,
+}
+
+
+def get_error_lists(
+    game_mode: type[GameMode], **columns: npt.NDArray
+) -> list[list[GameMode.ErrorCode]]:
+    """Evaluate multiple decks on a game mode and group the failed rules by deck.
 
     Args:
-        deck (Deck): Deck to evaluate and update
+        game_mode (type[GameMode]): The game mode to evaluate.
+        columns (npt.NDArray): The metrics of the decks, with one column per metric
+            (see `DeckSummary.get_legality_data`).
+
+    Returns:
+        list[list[GameMode.ErrorCode]]: The error codes of each deck.
     """
+    error_lists = [[] for _ in range(len(columns["total_count"]))]
+    for error, mask in game_mode.validate(**columns):
+        for index in np.flatnonzero(mask):
+            error_lists[index].append(error)
+    return error_lists
+
 
-    total_count = 0
-    rare_count = 0
-    unique_count = 0
-    exalt_count = 0
-    repeats_same_unique = False
-    factions = [deck.hero.faction] if deck.hero else []
-    family_count = defaultdict(int)
-    card_families = []
-    has_only_single_copies = True
-    has_banned_card = False
-
-    decklist: list[CardInDeck] = deck.cardindeck_set.select_related("card").all()
-
-    cid: CardInDeck
-    for cid in decklist:
-        total_count += cid.quantity
-        if cid.card.rarity == Card.Rarity.RARE:
-            rare_count += cid.quantity
-        elif cid.card.rarity == Card.Rarity.UNIQUE:
-            unique_count += cid.quantity
-            if cid.quantity > 1:
-                repeats_same_unique = True
-        elif cid.card.rarity == Card.Rarity.EXALTED:
-            exalt_count += cid.quantity
-        if cid.card.faction not in factions:
-            factions.append(cid.card.faction)
-        family_key = cid.card.get_family_code()
-        family_count[family_key] += cid.quantity
-        family_tuple = (cid.card.get_card_code(), cid.card.faction)
-        if has_only_single_copies and (
-            cid.quantity > 1 or family_tuple in card_families
-        ):
-            has_only_single_copies = False
-        card_families.append(family_tuple)
-        has_banned_card |= not cid.card.is_legal
-
-    data = {
-        "hero": deck.hero.get_family_code() if deck.hero else None,
-        "faction_count": len(factions),
-        "total_count": total_count,
-        "rare_count": rare_count,
-        "unique_count": unique_count,
-        "exalt_count": exalt_count,
-        "family_count": family_count,
-        "has_hero": bool(deck.hero),
-        "repeats_same_unique": repeats_same_unique,
-        "has_only_single_copies": has_only_single_copies,
-        "has_banned_card": has_banned_card,
+def evaluate_legality(**columns: npt.NDArray) -> dict[str, list]:
+    """Evaluate the legality of multiple decks on every game mode at once.
+
+    Args:
+        columns (npt.NDArray): The metrics of the decks, with one column per metric
+            (see `DeckSummary.get_legality_data`).
+
+    Returns:
+        dict[str, list]: The value of each legality field of `Deck`, for every deck.
+    """
+    standard_errors = get_error_lists(StandardGameMode, **columns)
+    draft_errors = get_error_lists(DraftGameMode, **columns)
+    nuc_errors = get_error_lists(NoUniqueChampionship, **columns)
+    doubles_errors = get_error_lists(Doubles, **columns)
+    singleton_errors = get_error_lists(Singleton, **columns)
+
+    return {
+        "is_standard_legal": [not errors for errors in standard_errors],
+        "standard_legality_errors": standard_errors,
+        "is_draft_legal": [not errors for errors in draft_errors],
+        "draft_legality_errors": draft_errors,
+        "is_nuc_legal": [not errors for errors in nuc_errors],
+        "is_doubles_legal": [not errors for errors in doubles_errors],
+        "is_singleton_legal": [not errors for errors in singleton_errors],
+        "singleton_legality_errors": singleton_errors,
     }
 
-    error_list = StandardGameMode.validate(**data)
-    deck.is_standard_legal = not bool(error_list)
-    deck.standard_legality_errors = error_list
 
-    error_list = DraftGameMode.validate(**data)
-    deck.is_draft_legal = not bool(error_list)
-    deck.draft_legality_errors = error_list
+def get_deck_summary(deck: Deck, lock: bool = False) -> DeckSummary:
+    """Retrieve the summary of a Deck, building it from its decklist if it doesn't
+    exist yet or if it was built with an outdated version of the card catalog.
 
-    has_errors = NoUniqueChampionship.validate(**data)
-    deck.is_nuc_legal = not has_errors
+    Args:
+        deck (Deck): The Deck to summarize.
+        lock (bool, optional): Whether to lock the summary until the end of the
+            current transaction, to modify it. Defaults to False.
 
-    has_errors = Doubles.validate(**data)
-    deck.is_doubles_legal = not has_errors
+    Returns:
+        DeckSummary: The Deck's summary.
+    """
+    if lock:
+        summary = DeckSummary.objects.select_for_update().filter(deck=deck).first()
+    else:
+        try:
+            summary = deck.summary
+        except DeckSummary.DoesNotExist:
+            summary = None
 
-    error_list = Singleton.validate(**data)
-    deck.is_singleton_legal = not bool(error_list)
-    deck.singleton_legality_errors = error_list
+    catalog_version = card_catalog.version
+    if summary is None or summary.catalog_version != catalog_version:
+        summary = build_deck_summary(deck, catalog_version)
+    return summary
+
+
+def build_deck_summary(deck: Deck, catalog_version: int) -> DeckSummary:
+    """Build the summary of a Deck from its decklist and store it.
+
+    Args:
+        deck (Deck): The Deck to summarize.
+        catalog_version (int): The version of the card catalog being used.
+
+    Returns:
+        DeckSummary: The Deck's summary.
+    """
+    summary = DeckSummary.from_decklist(
+        deck, deck.cardindeck_set.select_related("card")
+    )
+    summary.catalog_version = catalog_version
+    summary.save()
+    return summary
+
+
+def update_deck_legality(deck: Deck, summary: DeckSummary = None) -> None:
+    """Receives a Deck object, evaluates the Deck's legality on every game mode from
+    its summary and updates the model.
+
+    Args:
+        deck (Deck): Deck to evaluate and update
+        summary (DeckSummary, optional): The Deck's up-to-date summary. If it's not
+            provided, it's rebuilt from the Deck's cards and stored.
+    """
+    if summary is None:
+        summary = build_deck_summary(deck, card_catalog.version)
+
+    hero = card_catalog.get(deck.hero_id) if deck.hero_id else None
+    data = summary.get_legality_data(hero)
+    legality = evaluate_legality(
+        **{metric: np.array([value]) for metric, value in data.items()}
+    )
+    for field, values in legality.items():
+        setattr(deck, field, values[0])
@@ -0,0 +1,342 @@
+import atexit
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+import hashlib
+from logging import getLogger
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import Count, F, Q
+from django.http import HttpRequest
+from django.utils import timezone
+from hitcount.models import BlacklistIP, BlacklistUserAgent, Hit, HitCount
+from hitcount.utils import get_ip
+
+from decks.models import Deck, PrivateLink
+
+
+logger = getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class HitEvent:
+    deck_id: int
+    session: str
+    ip: str
+    user_agent: str
+    user_id: int | None
+    # Hash of the IP and user agent, which identifies the visitors without a session
+    fingerprint: str
+
+    @property
+    def visitor(self) -> tuple[str, int | str]:
+        # Authenticated users are identified by their account, and anonymous visitors
+        # by their session
+        return ("user", self.user_id) if self.user_id else ("session", self.session)
+
+
+class HitBuffer:
+    """Write-behind buffer of the deck hits and private link accesses of the process.
+
+    The events are kept in memory and written in batches once the buffer holds
+    `HIT_BUFFER_FLUSH_SIZE` events or `HIT_BUFFER_FLUSH_INTERVAL` seconds have passed
+    since the last flush. Once started, a background thread also flushes it every
+    `HIT_BUFFER_FLUSH_INTERVAL` seconds, so the events don't wait for the next request,
+    and it's flushed for the last time on shutdown. Repeated hits of a visitor and
+    repeated accesses to a link are merged before reaching the database, and the
+    events received while the buffer holds `HIT_BUFFER_MAX_EVENTS` are dropped.
+    """
+
+    def __init__(self) -> None:
+        self._hits: dict[tuple, HitEvent] = {}
+        self._accesses: dict[uuid.UUID, datetime] = {}
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._metrics = Counter()
+        self._timer: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    @property
+    def metrics(self) -> dict[str, int]:
+        """Counters of the events received by the buffer since the process started."""
+        with self._lock:
+            return dict(self._metrics, pending=len(self._hits) + len(self._accesses))
+
+    def add_hit(self, request: HttpRequest, deck_id: int) -> None:
+        """Buffer a hit of the requester on a Deck.
+
+        Args:
+            request (HttpRequest): The request visiting the Deck.
+            deck_id (int): The Deck's ID.
+        """
+        ip = get_ip(request)
+        user_agent = request.headers.get("User-Agent", "")[:255]
+        # Like django-hitcount, the visitors are identified by their session. However,
+        # it isn't created to count the hit, because crawlers don't keep it, so the
+        # visitors without one are identified by their IP and user agent instead
+        fingerprint = hashlib.sha1(f"{ip}{user_agent}".encode()).hexdigest()
+        session = request.session.session_key or fingerprint
+        user_id = request.user.pk if request.user.is_authenticated else None
+        event = HitEvent(deck_id, session, ip, user_agent, user_id, fingerprint)
+
+        self._add(self._hits, (deck_id, event.visitor), event)
+
+    def add_access(self, link_code: uuid.UUID) -> None:
+        """Buffer an access to a PrivateLink at the current time.
+
+        Args:
+            link_code (uuid.UUID): The PrivateLink's code.
+        """
+        self._add(self._accesses, link_code, timezone.now())
+
+    def flush(self) -> None:
+        """Write the buffered events into the database. If the write fails, the events
+        are returned to the buffer to retry them on the next flush.
+        """
+        with self._lock:
+            hits, self._hits = self._hits, {}
+            accesses, self._accesses = self._accesses, {}
+            self._last_flush = time.monotonic()
+        if not hits and not accesses:
+            return
+
+        try:
+            with transaction.atomic():
+                saved_hits = save_hits(list(hits.values()))
+                PrivateLink.objects.bulk_update(
+                    [
+                        PrivateLink(code=code, last_accessed_at=accessed_at)
+                        for code, accessed_at in accesses.items()
+                    ],
+                    ["last_accessed_at"],
+                )
+        except DatabaseError:
+            logger.exception("Failed to flush the hit buffer")
+            self._requeue(hits, accesses)
+            return
+
+        with self._lock:
+            self._metrics["flushed_hits"] += saved_hits
+            self._metrics["ignored_hits"] += len(hits) - saved_hits
+            self._metrics["flushed_accesses"] += len(accesses)
+        logger.info(f"Flushed the hit buffer: {self.metrics}")
+
+    def clear(self) -> None:
+        """Discard the buffered events."""
+        with self._lock:
+            self._hits.clear()
+            self._accesses.clear()
+
+    def start(self) -> None:
+        """Start flushing the buffer periodically from a background thread, and register
+        its last flush when the process exits. It has to be called by the process
+        serving the requests, because the thread isn't kept when forking.
+        """
+        with self._lock:
+            if self._timer and self._timer.is_alive():
+                return
+            self._stopped.clear()
+            self._timer = threading.Thread(
+                target=self._run_timer, name="hit-buffer", daemon=True
+            )
+            self._timer.start()
+        atexit.register(self.shutdown)
+
+    def shutdown(self) -> None:
+        """Stop the background flushes and write the pending events. As the process is
+        exiting, the events that can't be written are dropped.
+        """
+        atexit.unregister(self.shutdown)
+        self._stopped.set()
+        if self._timer and self._timer is not threading.current_thread():
+            # Let the thread finish its flush, as its events are requeued if it fails
+            self._timer.join()
+        self.flush()
+
+        with self._lock:
+            lost = len(self._hits) + len(self._accesses)
+            self._metrics["dropped"] += lost
+            self._hits.clear()
+            self._accesses.clear()
+        if lost:
+            logger.warning(f"Dropped {lost} buffered events on shutdown")
+        logger.info(f"Stopped the hit buffer: {self.metrics}")
+
+    def _run_timer(self) -> None:
+        while not self._stopped.wait(settings.HIT_BUFFER_FLUSH_INTERVAL):
+            self.flush()
+            # Unlike the requests, this thread doesn't get its connection recycled
+            close_old_connections()
+
+    def _add(self, events: dict, key, value) -> None:
+        with self._lock:
+            size = len(self._hits) + len(self._accesses)
+            if key in events:
+                self._metrics["merged"] += 1
+            elif size >= settings.HIT_BUFFER_MAX_EVENTS:
+                self._metrics["dropped"] += 1
+                return
+            else:
+                self._metrics["buffered"] += 1
+                size += 1
+            events[key] = value
+
+            should_flush = (
+                size >= settings.HIT_BUFFER_FLUSH_SIZE
+                or time.monotonic() - self._last_flush
+                >= settings.HIT_BUFFER_FLUSH_INTERVAL
+            )
+        if should_flush:
+            self.flush()
+
+    def _requeue(self, hits: dict, accesses: dict) -> None:
+        # The events received during the failed flush are newer, so they're kept
+        with self._lock:
+            self._metrics["failed_flushes"] += 1
+            for buffer, events in [(self._hits, hits), (self._accesses, accesses)]:
+                for key, value in events.items():
+                    if key in buffer:
+                        continue
+                    if len(self._hits) + len(self._accesses) >= (
+                        settings.HIT_BUFFER_MAX_EVENTS
+                    ):
+                        self._metrics["dropped"] += 1
+                    else:
+                        buffer[key] = value
+
+
+def save_hits(events: list[HitEvent]) -> int:
+    """Record the received hits with the same rules django-hitcount applies to each
+    request: blacklisted IPs and user agents, excluded user groups and the limit of
+    hits per IP are ignored, and so are the visitors with an active hit on the Deck.
+    An anonymous visitor's first hit might have been recorded before their session
+    was created, so the hits recorded by their IP and user agent are also active.
+
+    Args:
+        events (list[HitEvent]): The hits to record, one per visitor and Deck.
+
+    Returns:
+        int: Amount of recorded hits.
+    """
+    if not events:
+        return 0
+
+    # The Decks and users might have been deleted since the hits were received
+    deck_ids = set(
+        Deck.objects.filter(pk__in={event.deck_id for event in events}).values_list(
+            "pk", flat=True
+        )
+    )
+    users = User.objects.filter(
+        pk__in={event.user_id for event in events if event.user_id}
+    )
+    if exclude_user_group := getattr(settings, "HITCOUNT_EXCLUDE_USER_GROUP", None):
+        users = users.exclude(groups__name__in=exclude_user_group)
+    user_ids = set(users.values_list("pk", flat=True))
+
+    blacklisted_ips = set(
+        BlacklistIP.objects.filter(ip__in={event.ip for event in events}).values_list(
+            "ip", flat=True
+        )
+    )
+    blacklisted_user_agents = set(
+        BlacklistUserAgent.objects.filter(
+            user_agent__in={event.user_agent for event in events}
+        ).values_list("user_agent", flat=True)
+    )
+    events = [
+        event
+        for event in events
+        if event.deck_id in deck_ids
+        and (event.user_id is None or event.user_id in user_ids)
+        and event.ip not in blacklisted_ips
+        and event.user_agent not in blacklisted_user_agents
+    ]
+    if not events:
+        return 0
+
+    content_type = ContentType.objects.get_for_model(Deck)
+    HitCount.objects.bulk_create(
+        [
+            HitCount(content_type=content_type, object_pk=deck_id)
+            for deck_id in {event.deck_id for event in events}
+        ],
+        ignore_conflicts=True,
+    )
+    hitcount_ids = dict(
+        HitCount.objects.filter(
+            content_type=content_type,
+            object_pk__in={event.deck_id for event in events},
+        ).values_list("object_pk", "pk")
+    )
+
+    active_hits = Hit.objects.filter_active().filter(
+        hitcount_id__in=hitcount_ids.values()
+    )
+    active_visitors = set()
+    anonymous_sessions = set()
+    for event in events:
+        if not event.user_id:
+            anonymous_sessions |= {event.session, event.fingerprint}
+    for hitcount_id, user_id, session in active_hits.filter(
+        Q(user_id__in=user_ids) | Q(session__in=anonymous_sessions)
+    ).values_list("hitcount_id", "user_id", "session"):
+        if user_id:
+            active_visitors.add((hitcount_id, ("user", user_id)))
+        active_visitors.add((hitcount_id, ("session", session)))
+
+    hits_per_ip_limit = getattr(settings, "HITCOUNT_HITS_PER_IP_LIMIT", 0)
+    ip_hits = Counter()
+    if hits_per_ip_limit:
+        ip_hits.update(
+            dict(
+                Hit.objects.filter_active()
+                .filter(ip__in={event.ip for event in events})
+                .values("ip")
+                .annotate(count=Count("pk"))
+                .values_list("ip", "count")
+            )
+        )
+
+    hits = []
+    for event in events:
+        hitcount_id = hitcount_ids[event.deck_id]
+        if (hitcount_id, event.visitor) in active_visitors:
+            continue
+        if not event.user_id and (
+            (hitcount_id, ("session", event.fingerprint)) in active_visitors
+        ):
+            continue
+        if hits_per_ip_limit and ip_hits[event.ip] >= hits_per_ip_limit:
+            continue
+        ip_hits[event.ip] += 1
+        active_visitors.add((hitcount_id, event.visitor))
+        hits.append(
+            Hit(
+                hitcount_id=hitcount_id,
+                session=event.session,
+                ip=event.ip,
+                user_agent=event.user_agent,
+                user_id=event.user_id,
+            )
+        )
+
+    # Saving each Hit would increase its HitCount, which the bulk insert doesn't do
+    Hit.objects.bulk_create(hits)
+    increments = Counter(hit.hitcount_id for hit in hits)
+    hitcounts_by_increment = defaultdict(list)
+    for hitcount_id, increment in increments.items():
+        hitcounts_by_increment[increment].append(hitcount_id)
+    for increment, ids in hitcounts_by_increment.items():
+        HitCount.objects.filter(pk__in=ids).update(hits=F("hits") + increment)
+
+    return len(hits)
+
+
+hit_buffer = HitBuffer()
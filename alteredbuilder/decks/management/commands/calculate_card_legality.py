@@ -1,42 +1,76 @@
+from argparse import ArgumentParser
 from typing import Any
 
 from config.commands import BaseCommand
-from decks.models import BannedCard, Card
+from decks.card_catalog import bump_catalog_version
+from decks.management.commands.calculate_deck_legality import (
+    LEGALITY_FLAGS,
+    update_decks_legality,
+)
+from decks.models import BannedCard, Card, CardInDeck, Deck
 
 
 class Command(BaseCommand):
     help = "Updates the legality of cards"
     version = "1.0.0"
 
+    def add_arguments(self, parser: ArgumentParser):
+        parser.add_argument(
+            "--chunk-size",
+            action="store",
+            type=int,
+            default=1000,
+            help="Maximum amount of decks to hold in memory before saving them into the database",
+        )
+
     def handle(self, *args: Any, **options: Any) -> None:
-        """The command's entrypoint"""
+        """The command's entrypoint. Updates the legality of the cards and then
+        re-evaluates only the decks containing the cards that changed.
+        """
 
+        changed_cards = []
         for faction in Card.Faction.as_list():
-            self.update_faction(faction)
+            changed_cards += self.update_faction(faction)
+
+        if not changed_cards:
+            return
+        # The cached copies of the changed cards are outdated
+        bump_catalog_version()
 
-    def update_faction(self, faction: Card.Faction):
-        banned_cards = BannedCard.objects.filter(faction=faction)
-        banned_cards = [ban.family_name for ban in banned_cards]
+        affected_decks = Deck.objects.filter(
+            id__in=CardInDeck.objects.filter(card__in=changed_cards).values("deck_id")
+        )
+        deck_count, status_changes = update_decks_legality(
+            affected_decks, options["chunk_size"]
+        )
+        self.stdout.write(f"Updated {deck_count} decks containing the changed cards")
+        for flag in LEGALITY_FLAGS:
+            self.stdout.write(f"{status_changes[flag]} decks changed their {flag}")
+
+    def update_faction(self, faction: Card.Faction) -> list[Card]:
+        banned_cards = BannedCard.objects.filter(faction=faction).values_list(
+            "family_name", flat=True
+        )
 
         card_chunk = []
-        for card in Card.objects.filter(faction=faction):
-            if card.get_card_code() in banned_cards:
-                if card.is_legal:
-                    card.is_legal = False
-                    card_chunk.append(card)
-                    self.stdout.write(
-                        f"The {card.rarity} version of card {card.name} in {card.faction} has been banned"
-                    )
-
-            elif not card.is_legal:
-                card.is_legal = True
-                card_chunk.append(card)
-                self.stdout.write(
-                    f"The {card.rarity} version of card {card.name} in {card.faction} is now legal"
-                )
+        cards = Card.objects.filter(faction=faction)
+        for card in cards.filter(card_code__in=banned_cards, is_legal=True):
+            card.is_legal = False
+            card_chunk.append(card)
+            self.stdout.write(
+                f"The {card.rarity} version of card {card.name} in {card.faction} has been banned"
+            )
+
+        for card in cards.filter(is_legal=False).exclude(card_code__in=banned_cards):
+            card.is_legal = True
+            card_chunk.append(card)
+            self.stdout.write(
+                f"The {card.rarity} version of card {card.name} in {card.faction} is now legal"
+            )
 
         if card_chunk:
             updated = Card.objects.bulk_update(card_chunk, ["is_legal"])
             self.stdout.write(f"Updated {updated} cards in {faction}")
         else:
             self.stdout.write(f"All cards in {faction} are up to date")
+        return card_chunk
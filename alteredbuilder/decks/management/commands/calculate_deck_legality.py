@@ -1,14 +1,44 @@
 from argparse import ArgumentParser
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+from pathlib import Path
+import time
 from typing import Any
 
+from django.db import connections
+from django.db.models import Count, Max, Min, Q, QuerySet, Sum
+import numpy as np
+import numpy.typing as npt
+
 from config.commands import BaseCommand
-from decks.game_modes import update_deck_legality
-from decks.models import Deck
+from decks.game_modes import evaluate_legality
+from decks.models import Card, CardInDeck, Deck
+
+
+LEGALITY_FIELDS = [
+    "is_standard_legal",
+    "standard_legality_errors",
+    "is_draft_legal",
+    "draft_legality_errors",
+    "is_nuc_legal",
+    "is_doubles_legal",
+    "is_singleton_legal",
+    "singleton_legality_errors",
+]
+# Flags of the legality of a deck in each game mode
+LEGALITY_FLAGS = [
+    "is_standard_legal",
+    "is_draft_legal",
+    "is_nuc_legal",
+    "is_doubles_legal",
+    "is_singleton_legal",
+]
 
 
 class Command(BaseCommand):
     help = "Recalculates the legality of the decks"
-    version = "1.0.0"
+    version = "2.1.0"
 
     def add_arguments(self, parser: ArgumentParser):
         parser.add_argument(
@@ -19,36 +49,264 @@ class Command(BaseCommand):
         parser.add_argument(
             "--chunk-size",
             action="store",
+            type=int,
             default=1000,
             help="Maximum amount of decks to hold in memory before saving them into the database",
         )
+        parser.add_argument(
+            "--shard-size",
+            action="store",
+            type=int,
+            default=50_000,
+            help="Size of the ranges of deck ids processed by each worker",
+        )
+        parser.add_argument(
+            "--workers",
+            action="store",
+            type=int,
+            default=1,
+            help="Amount of processes evaluating shards in parallel",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            action="store",
+            type=Path,
+            help="File storing the completed shards, to resume an interrupted run",
+        )
 
     def handle(self, *args: Any, **options: Any) -> None:
-        """The command's entrypoint. Queries the API for each language."""
+        """The command's entrypoint. Splits the deck ids into shards and evaluates them,
+        in parallel if multiple workers are requested.
+        """
+        shards = self.get_shards(options["shard_size"])
+        checkpoint: Path | None = options["checkpoint"]
+        completed_shards = set()
+        if checkpoint and checkpoint.exists():
+            completed_shards = set(checkpoint.read_text().split())
+            self.stdout.write(f"Resuming with {len(completed_shards)} completed shards")
 
-        qs = Deck.objects.prefetch_related("cardindeck_set__card")
-        if options["only_illegal"]:
-            qs = qs.filter(is_standard_legal=False)
-
-        update_fields = [
-            "is_standard_legal",
-            "standard_legality_errors",
-            "is_nuc_legal",
-            "is_doubles_legal",
+        pending_shards = [
+            shard for shard in shards if self.shard_key(shard) not in completed_shards
         ]
-        decks_chunk = []
-        chunk_size = 0
-        max_chunk_size = options["chunk_size"]
-        deck_count = 0
-        for deck in qs:
-            update_deck_legality(deck)
-            decks_chunk.append(deck)
-            chunk_size += 1
-            if chunk_size >= max_chunk_size:
-                deck_count += Deck.objects.bulk_update(decks_chunk, update_fields)
-                decks_chunk = []
-                chunk_size = 0
+        shard_args = (options["only_illegal"], options["chunk_size"])
 
-        deck_count += Deck.objects.bulk_update(decks_chunk, update_fields)
+        deck_count = 0
+        if options["workers"] > 1:
+            # The connections can't be shared with the forked processes
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=options["workers"],
+                mp_context=multiprocessing.get_context("fork"),
+            ) as executor:
+                futures = {
+                    executor.submit(update_shard, *shard, *shard_args): shard
+                    for shard in pending_shards
+                }
+                for future in as_completed(futures):
+                    deck_count += self.complete_shard(
+                        futures[future], *future.result(), checkpoint
+                    )
+        else:
+            for shard in pending_shards:
+                deck_count += self.complete_shard(
+                    shard, *update_shard(*shard, *shard_args), checkpoint
+                )
 
+        if checkpoint:
+            # The run is complete, so the next one should start from scratch
+            checkpoint.unlink(missing_ok=True)
         self.stdout.write(f"Updated {deck_count} decks")
+
+    @staticmethod
+    def get_shards(shard_size: int) -> list[tuple[int, int]]:
+        """Split the range of deck ids into inclusive ranges of the received size.
+
+        Args:
+            shard_size (int): Amount of ids in each shard.
+
+        Returns:
+            list[tuple[int, int]]: First and last id of each shard.
+        """
+        bounds = Deck.objects.aggregate(first_id=Min("id"), last_id=Max("id"))
+        if bounds["first_id"] is None:
+            return []
+
+        return [
+            (start, min(start + shard_size - 1, bounds["last_id"]))
+            for start in range(bounds["first_id"], bounds["last_id"] + 1, shard_size)
+        ]
+
+    @staticmethod
+    def shard_key(shard: tuple[int, int]) -> str:
+        return f"{shard[0]}-{shard[1]}"
+
+    def complete_shard(
+        self,
+        shard: tuple[int, int],
+        deck_count: int,
+        elapsed: float,
+        checkpoint: Path | None,
+    ) -> int:
+        """Report the throughput of a processed shard and record it as completed.
+
+        Returns:
+            int: Amount of updated decks in the shard.
+        """
+        throughput = deck_count / elapsed if elapsed else 0
+        self.stdout.write(
+            f"Shard {self.shard_key(shard)}: updated {deck_count} decks in "
+            f"{elapsed:.2f}s ({throughput:.0f} decks/s)"
+        )
+        if checkpoint:
+            with checkpoint.open("a") as checkpoint_file:
+                checkpoint_file.write(f"{self.shard_key(shard)}\n")
+        return deck_count
+
+
+def update_shard(
+    first_id: int, last_id: int, only_illegal: bool, chunk_size: int
+) -> tuple[int, float]:
+    """Evaluate the legality of the decks within a range of ids.
+
+    Args:
+        first_id (int): First deck id of the range.
+        last_id (int): Last deck id of the range.
+        only_illegal (bool): Whether to limit the update to illegal decks.
+        chunk_size (int): Maximum amount of decks to hold in memory.
+
+    Returns:
+        tuple[int, float]: Amount of updated decks and elapsed seconds.
+    """
+    start_time = time.perf_counter()
+    qs = Deck.objects.filter(id__gte=first_id, id__lte=last_id)
+    if only_illegal:
+        qs = qs.filter(is_standard_legal=False)
+
+    deck_count, _ = update_decks_legality(qs, chunk_size)
+    return deck_count, time.perf_counter() - start_time
+
+
+def update_decks_legality(
+    qs: QuerySet[Deck], chunk_size: int
+) -> tuple[int, Counter[str]]:
+    """Evaluate the legality of the received decks in chunks, retrieving the metrics of
+    each chunk with grouped queries and evaluating all of them at once.
+
+    Args:
+        qs (QuerySet[Deck]): The decks to evaluate.
+        chunk_size (int): Maximum amount of decks to hold in memory.
+
+    Returns:
+        tuple[int, Counter[str]]: Amount of updated decks and how many of them changed
+            the value of each legality flag (e.g. `is_standard_legal`).
+    """
+    qs = qs.order_by("id")
+    deck_count = 0
+    status_changes = Counter()
+    last_updated_id = 0
+    while decks := list(
+        qs.filter(id__gt=last_updated_id).values_list(
+            "id", "hero__family_code", "hero__faction", *LEGALITY_FLAGS
+        )[:chunk_size]
+    ):
+        deck_ids = [deck[0] for deck in decks]
+        legality = evaluate_legality(**get_legality_columns(decks))
+
+        for position, flag in enumerate(LEGALITY_FLAGS, start=3):
+            status_changes[flag] += sum(
+                deck[position] != value for deck, value in zip(decks, legality[flag])
+            )
+
+        updated_decks = [
+            Deck(
+                id=deck_id,
+                **{field: values[index] for field, values in legality.items()},
+            )
+            for index, deck_id in enumerate(deck_ids)
+        ]
+        deck_count += Deck.objects.bulk_update(updated_decks, LEGALITY_FIELDS)
+        last_updated_id = deck_ids[-1]
+
+    return deck_count, status_changes
+
+
+def get_legality_columns(decks: list[tuple]) -> dict[str, npt.NDArray]:
+    """Retrieve the metrics needed to evaluate the legality of the received decks.
+
+    Args:
+        decks (list[tuple]): The ID, hero family code and hero faction of each deck,
+            followed by any other value.
+
+    Returns:
+        dict[str, npt.NDArray]: The metrics of the decks, one column per metric.
+    """
+    deck_count = len(decks)
+    positions = {deck[0]: index for index, deck in enumerate(decks)}
+    cids = CardInDeck.objects.filter(deck_id__in=list(positions))
+
+    aggregates = {
+        "total_count": Sum("quantity"),
+        "rare_count": Sum("quantity", filter=Q(card__rarity=Card.Rarity.RARE)),
+        "unique_count": Sum("quantity", filter=Q(card__rarity=Card.Rarity.UNIQUE)),
+        "exalt_count": Sum("quantity", filter=Q(card__rarity=Card.Rarity.EXALTED)),
+        "banned_count": Count("id", filter=Q(card__is_legal=False)),
+        "repeated_count": Count("id", filter=Q(quantity__gt=1)),
+        "repeated_unique_count": Count(
+            "id", filter=Q(quantity__gt=1, card__rarity=Card.Rarity.UNIQUE)
+        ),
+    } | {
+        f"{faction}_count": Count("id", filter=Q(card__faction=faction))
+        for faction in Card.Faction.values
+    }
+    values = np.zeros((deck_count, len(aggregates)), dtype=int)
+    for deck_id, *row in (
+        cids.values("deck_id")
+        .annotate(**aggregates)
+        .values_list("deck_id", *aggregates)
+    ):
+        values[positions[deck_id]] = [value or 0 for value in row]
+    metrics = dict(zip(aggregates, values.T))
+
+    # Amount of copies of the most repeated family of each deck
+    max_family_count = np.zeros(deck_count, dtype=int)
+    for deck_id, count in (
+        cids.values("deck_id", "card__family_code")
+        .annotate(count=Sum("quantity"))
+        .values_list("deck_id", "count")
+    ):
+        max_family_count[positions[deck_id]] = max(
+            max_family_count[positions[deck_id]], count
+        )
+
+    # Decks with multiple cards sharing the same card code and faction
+    has_repeated_code = np.zeros(deck_count, dtype=bool)
+    for deck_id in (
+        cids.values("deck_id", "card__faction", "card__card_code")
+        .annotate(count=Count("id"))
+        .filter(count__gt=1)
+        .values_list("deck_id", flat=True)
+    ):
+        has_repeated_code[positions[deck_id]] = True
+
+    hero_codes = [deck[1] for deck in decks]
+    hero_factions = np.array([deck[2] for deck in decks], dtype=object)
+    has_faction = np.column_stack(
+        [
+            (metrics[f"{faction}_count"] > 0) | (hero_factions == faction)
+            for faction in Card.Faction.values
+        ]
+    )
+
+    return {
+        "hero": np.array(hero_codes, dtype=object),
+        "faction_count": has_faction.sum(axis=1),
+        "total_count": metrics["total_count"],
+        "rare_count": metrics["rare_count"],
+        "unique_count": metrics["unique_count"],
+        "exalt_count": metrics["exalt_count"],
+        "max_family_count": max_family_count,
+        "has_hero": np.array([code is not None for code in hero_codes]),
+        "repeats_same_unique": metrics["repeated_unique_count"] > 0,
+        "has_only_single_copies": (metrics["repeated_count"] == 0) & ~has_repeated_code,
+        "has_banned_card": metrics["banned_count"] > 0,
+    }
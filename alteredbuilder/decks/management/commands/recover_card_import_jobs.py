@@ -0,0 +1,25 @@
+from typing import Any
+
+from config.commands import BaseCommand
+from decks.deck_utils import recover_card_import_job, run_card_import_job
+from decks.models import CardImportJob
+
+
+class Command(BaseCommand):
+    help = "Runs again or gives up on the card import jobs that were lost"
+    version = "1.0.0"
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """The command's entrypoint. The jobs are usually recovered when their status
+        is polled, so this recovers the ones nobody is polling anymore.
+        """
+        jobs = CardImportJob.objects.exclude(
+            status=CardImportJob.Status.FINISHED
+        ).order_by("created_at")
+
+        recovered_count = 0
+        for job in jobs:
+            if recover_card_import_job(job):
+                run_card_import_job(job)
+                recovered_count += 1
+        self.stdout.write(f"Ran {recovered_count} lost card import jobs again")
@@ -0,0 +1,123 @@
+from argparse import ArgumentParser
+from datetime import date, timedelta
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.db.models import Avg, Max, Min, Sum
+from django.db.models.functions import Trunc, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from config.commands import BaseCommand
+from decks.models import CardPrice, CardPriceRollup
+
+
+# A period must be complete before its first day is pruned, so the daily prices need
+# to be kept for at least the length of the longest period
+MIN_RETENTION_DAYS = 31
+PERIOD_TRUNCATIONS: dict[CardPriceRollup.Period, type[Trunc]] = {
+    CardPriceRollup.Period.WEEK: TruncWeek,
+    CardPriceRollup.Period.MONTH: TruncMonth,
+}
+ROLLUP_FIELDS = ["min_price", "avg_price", "max_price", "volume"]
+
+
+class Command(BaseCommand):
+    help = "Aggregates the daily card prices into weekly and monthly rollups and prunes the old daily prices"
+    version = "1.0.0"
+
+    def add_arguments(self, parser: ArgumentParser):
+        parser.add_argument(
+            "--retention-days",
+            action="store",
+            type=int,
+            default=settings.CARD_PRICE_RETENTION_DAYS,
+            help="Amount of days the daily prices are kept",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """The command's entrypoint. Updates the rollups of every period before
+        pruning the daily prices older than the retention period.
+        """
+        retention_days = options["retention_days"]
+        if retention_days < MIN_RETENTION_DAYS:
+            raise CommandError(
+                f"The daily prices must be kept for at least {MIN_RETENTION_DAYS} days"
+            )
+
+        first_date = CardPrice.objects.aggregate(first_date=Min("date"))["first_date"]
+        if first_date is None:
+            self.stdout.write("There are no prices to aggregate")
+            return
+
+        cutoff = timezone.now().date() - timedelta(days=retention_days)
+        # Once the daily prices have been pruned, the periods starting before the first
+        # stored day have lost some of their prices
+        frozen_until = first_date if first_date <= cutoff else None
+
+        with transaction.atomic():
+            for period in CardPriceRollup.Period:
+                rollup_count = self.update_rollups(period, frozen_until)
+                self.stdout.write(f"Updated {rollup_count} {period.label} rollups")
+
+            deleted_count, _ = CardPrice.objects.filter(date__lt=cutoff).delete()
+            self.stdout.write(f"Deleted {deleted_count} daily prices before {cutoff}")
+
+    @staticmethod
+    def update_rollups(
+        period: CardPriceRollup.Period, frozen_until: date | None
+    ) -> int:
+        """Aggregate the stored daily prices of each card by period.
+
+        Args:
+            period (CardPriceRollup.Period): The length of the periods.
+            frozen_until (date | None): The existing rollups of the periods starting
+                before this day are kept as they are, because some of their daily
+                prices have been pruned.
+
+        Returns:
+            int: Amount of aggregated periods.
+        """
+        trunc = PERIOD_TRUNCATIONS[period]
+        rows = (
+            CardPrice.objects.annotate(start_date=trunc("date"))
+            .values("card_id", "start_date")
+            .annotate(
+                min_price=Min("price"),
+                avg_price=Avg("price"),
+                max_price=Max("price"),
+                volume=Sum("count"),
+            )
+        )
+
+        updated_rollups = []
+        frozen_rollups = []
+        for row in rows:
+            rollup = CardPriceRollup(
+                card_id=row["card_id"],
+                period=period,
+                start_date=row["start_date"],
+                min_price=row["min_price"],
+                avg_price=(
+                    round(row["avg_price"]) if row["avg_price"] is not None else None
+                ),
+                max_price=row["max_price"],
+                volume=row["volume"],
+            )
+            if frozen_until and rollup.start_date < frozen_until:
+                frozen_rollups.append(rollup)
+            else:
+                updated_rollups.append(rollup)
+
+        CardPriceRollup.objects.bulk_create(
+            updated_rollups,
+            batch_size=5000,
+            update_conflicts=True,
+            unique_fields=["card", "period", "start_date"],
+            update_fields=ROLLUP_FIELDS,
+        )
+        CardPriceRollup.objects.bulk_create(
+            frozen_rollups, batch_size=5000, ignore_conflicts=True
+        )
+        return len(updated_rollups) + len(frozen_rollups)
@@ -4,6 +4,7 @@ from typing import Any
 
 from django.conf import settings
 from django.core.management.base import CommandError
+from django.forms.models import model_to_dict
 from django.utils.translation import activate
 
 from config.commands import BaseCommand
@@ -13,6 +14,7 @@ from config.utils import (
     get_altered_api_locale,
     get_user_agent,
 )
+from decks.card_catalog import bump_catalog_version
 from decks.exceptions import CardParseError, IgnoreCardType
 from decks.models import Card, Set, Subtype
 
@@ -60,6 +62,9 @@ class Command(BaseCommand):
         super().__init__(kwargs)
         self.subtypes = SubTypeCache()
         self.language_code = None
+        # Whether any card has been added or any existing card has been modified
+        self.created_cards = False
+        self.modified_cards = False
 
     def add_arguments(self, parser: ArgumentParser):
         parser.add_argument(
@@ -100,6 +105,11 @@ class Command(BaseCommand):
                 self.query_page(sets)
                 self.subtypes.clear()
 
+        if self.created_cards or self.modified_cards:
+            # The catalog of every process needs to pick up the new and modified
+            # cards, but the decks only need to be rebuilt if existing cards changed
+            bump_catalog_version(modified=self.modified_cards)
+
     def query_page(self, sets) -> None:
         """Query Altered's API to retrieve the card information.
 
@@ -276,6 +286,7 @@ class Command(BaseCommand):
             card = Card.objects.create_card(**card_dict)
 
             self.link_subtypes(card, subtypes)
+            self.created_cards = True
 
             self.stdout.write(f"card created: {card}")
         except KeyError:
@@ -301,12 +312,13 @@ class Command(BaseCommand):
             if card_obj.type == Card.Type.CHARACTER:
                 stats_fields += ["forest_power", "mountain_power", "ocean_power"]
 
-        for field in card_fields:
+        previous_values = model_to_dict(card_obj, exclude=["subtypes"])
+        for field in card_fields + stats_fields:
             setattr(card_obj, field, card_dict[field])
 
-        card_obj.stats = {field: card_dict[field] for field in stats_fields}
-
-        card_obj.save()
+        if model_to_dict(card_obj, exclude=["subtypes"]) != previous_values:
+            card_obj.save()
+            self.modified_cards = True
 
         self.link_subtypes(card_obj, card_dict.get("subtypes", None))
 
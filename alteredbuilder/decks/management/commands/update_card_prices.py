@@ -1,16 +1,18 @@
 from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
 from typing import Any
 from urllib.error import HTTPError
 
 from django.conf import settings
 from django.core.management.base import CommandError
-from django.db import IntegrityError
+from django.db import connection, transaction
 from django.utils import timezone
 
 from config.commands import BaseCommand
-from config.utils import altered_api_paginator
-from decks.deck_utils import family_code_from_reference
-from decks.models import Card, CardPrice
+from config.utils import RateLimiter, altered_api_pages
+from decks.deck_utils import update_decks_total_price
+from decks.models import Card, CardPrice, Deck, family_code_from_reference
 from external.models import AccessToken
 
 
@@ -30,7 +32,7 @@ IGNORED_CARDS = [
 
 class Command(BaseCommand):
     help = "Updates the card prices from the marketplace"
-    version = "1.0.0"
+    version = "2.1.0"
 
     def add_arguments(self, parser: ArgumentParser):
         parser.add_argument(
@@ -38,9 +40,18 @@ class Command(BaseCommand):
             action="store",
             help="Auth token",
         )
+        parser.add_argument(
+            "--requests-per-second",
+            action="store",
+            type=float,
+            default=4,
+            help="Maximum rate of requests to the API, shared by all the factions",
+        )
 
     def handle(self, *args: Any, **options: Any) -> None:
-        """The command's entrypoint"""
+        """The command's entrypoint. The marketplace of every faction is queried
+        concurrently, sharing the same rate limit.
+        """
 
         auth_token = options["token"] or settings.BOT_AUTHORIZATION_TOKEN
 
@@ -56,20 +67,73 @@ class Command(BaseCommand):
             auth_token = token_obj.token
             self.stdout.write(f"Using token from database: {token_obj})")
 
+        rate_limiter = RateLimiter(options["requests_per_second"])
+        start_time = time.perf_counter()
+        row_count = 0
+        with ThreadPoolExecutor(max_workers=len(Card.Faction)) as executor:
+            futures = {
+                executor.submit(
+                    self.query_faction_marketplace, faction, auth_token, rate_limiter
+                ): faction
+                for faction in Card.Faction
+            }
+            try:
+                for future in as_completed(futures):
+                    row_count += future.result()
+            except HTTPError as e:
+                raise CommandError("Failed to connect to the Altered API: " + str(e))
+
+        elapsed = time.perf_counter() - start_time
+        throughput = row_count / elapsed if elapsed else 0
+        self.stdout.write(
+            f"Stored {row_count} prices in {elapsed:.2f}s ({throughput:.0f} rows/s)"
+        )
+
+        deck_count = update_decks_total_price(Deck.objects.all())
+        self.stdout.write(f"Updated the total price of {deck_count} decks")
+
+    def query_faction_marketplace(
+        self, faction: str, auth_token: str, rate_limiter: RateLimiter
+    ) -> int:
+        """Store the prices of a faction's cards, writing each page of the API with a
+        single upsert.
+
+        Args:
+            faction (str): The faction to query.
+            auth_token (str): Token to authenticate on the API.
+            rate_limiter (RateLimiter): Limiter shared by all the factions.
+
+        Returns:
+            int: Amount of stored prices.
+        """
+        row_count = 0
         try:
-            for faction in Card.Faction:
-                self.query_faction_marketplace(faction, auth_token)
-        except HTTPError as e:
-            raise CommandError("Failed to connect to the Altered API: " + str(e))
-
-    def query_faction_marketplace(self, faction: str, auth_token: str):
-
-        for card in altered_api_paginator(
-            CARDS_API_ENDPOINT,
-            params=[("factions[]", faction)],
-            user_agent_task="MarketplaceImporter",
-            auth_token=auth_token,
-        ):
+            for page in altered_api_pages(
+                CARDS_API_ENDPOINT,
+                params=[("factions[]", faction)],
+                user_agent_task="MarketplaceImporter",
+                auth_token=auth_token,
+                rate_limiter=rate_limiter,
+            ):
+                row_count += self.store_prices(page)
+        finally:
+            # Each thread uses its own database connection
+            connection.close()
+
+        self.stdout.write(f"Stored {row_count} prices in {faction}")
+        return row_count
+
+    def store_prices(self, page: list[dict]) -> int:
+        """Store the prices of a page of the marketplace.
+
+        Args:
+            page (list[dict]): The cards returned by the API.
+
+        Returns:
+            int: Amount of stored prices.
+        """
+        prices = {}
+        for card in page:
             reference = card["@id"].split("/")[-1]
 
             family_code = family_code_from_reference(reference)
@@ -79,12 +143,38 @@ class Command(BaseCommand):
             count = card.get("inSale", 0)
             price = card.get("lowerPrice")
             price = price * 100 if price else None
+            prices[reference] = (price, count)
 
-            try:
-                CardPrice.objects.update_or_create(
-                    card_id=reference,
-                    date=NOW.date(),
-                    defaults={"price": price, "count": count},
-                )
-            except IntegrityError:
-                self.stdout.write(f"Failed to insert {reference}")
+        known_references = set(
+            Card.objects.filter(reference__in=list(prices)).values_list(
+                "reference", flat=True
+            )
+        )
+        for reference in prices.keys() - known_references:
+            self.stdout.write(f"Failed to insert {reference}")
+            del prices[reference]
+        if not prices:
+            return 0
+
+        with transaction.atomic():
+            CardPrice.objects.bulk_create(
+                [
+                    CardPrice(
+                        card_id=reference, date=NOW.date(), price=price, count=count
+                    )
+                    for reference, (price, count) in prices.items()
+                ],
+                update_conflicts=True,
+                unique_fields=["card", "date"],
+                update_fields=["price", "count"],
+            )
+            # Keep the latest price next to the card so that it can be read without
+            # going through the price history
+            Card.objects.bulk_update(
+                [
+                    Card(reference=reference, last_price=price)
+                    for reference, (price, _) in prices.items()
+                ],
+                ["last_price"],
+            )
+        return len(prices)
@@ -0,0 +1,38 @@
+from argparse import ArgumentParser
+from typing import Any
+
+from django.db.models import Max, Min
+
+from config.commands import BaseCommand
+from decks.models import Deck, deck_search_vector
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text search document of the decks"
+    version = "1.0.0"
+
+    def add_arguments(self, parser: ArgumentParser):
+        parser.add_argument(
+            "--batch-size",
+            action="store",
+            type=int,
+            default=10_000,
+            help="Size of the ranges of deck ids updated by each query",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """The command's entrypoint. The search documents are kept up to date when the
+        decks are saved, but they need to be rebuilt after renaming cards or tags.
+        """
+        batch_size = options["batch_size"]
+        bounds = Deck.objects.aggregate(first_id=Min("id"), last_id=Max("id"))
+        if bounds["first_id"] is None:
+            self.stdout.write("There are no decks to update")
+            return
+
+        deck_count = 0
+        for start in range(bounds["first_id"], bounds["last_id"] + 1, batch_size):
+            deck_count += Deck.objects.filter(
+                id__gte=start, id__lt=start + batch_size
+            ).update(search_vector=deck_search_vector())
+        self.stdout.write(f"Updated the search document of {deck_count} decks")
@@ -0,0 +1,59 @@
+from argparse import ArgumentParser
+from typing import Any
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Max, Min, OuterRef, QuerySet, Subquery
+from django.db.models.functions import Coalesce
+from hitcount.models import HitCount
+
+from config.commands import BaseCommand
+from decks.models import Deck
+
+
+class Command(BaseCommand):
+    help = "Copies the hits counted by django-hitcount into the view count of the decks"
+    version = "1.0.0"
+
+    def add_arguments(self, parser: ArgumentParser):
+        parser.add_argument(
+            "--batch-size",
+            action="store",
+            type=int,
+            default=10_000,
+            help="Size of the ranges of deck ids updated by each query",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """The command's entrypoint. Updates the view count of the decks in ranges of
+        ids, so that each query only locks a bounded amount of rows.
+        """
+        batch_size = options["batch_size"]
+        bounds = Deck.objects.aggregate(first_id=Min("id"), last_id=Max("id"))
+        if bounds["first_id"] is None:
+            self.stdout.write("There are no decks to update")
+            return
+
+        deck_count = 0
+        for start in range(bounds["first_id"], bounds["last_id"] + 1, batch_size):
+            deck_count += update_decks_view_count(
+                Deck.objects.filter(id__gte=start, id__lt=start + batch_size)
+            )
+        self.stdout.write(f"Updated the view count of {deck_count} decks")
+
+
+def update_decks_view_count(qs: QuerySet[Deck]) -> int:
+    """Copy the hits of the received Decks into their view count. Only the Decks whose
+    view count is outdated are written.
+
+    Args:
+        qs (QuerySet[Deck]): The Decks to update.
+
+    Returns:
+        int: Amount of updated Decks.
+    """
+    hits = HitCount.objects.filter(
+        content_type=ContentType.objects.get_for_model(Deck),
+        object_pk=OuterRef("pk"),
+    ).values("hits")
+    view_count = Coalesce(Subquery(hits), 0)
+    return qs.exclude(view_count=view_count).update(view_count=view_count)
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.15 on 2026-10-18 01:58
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicated_cards(apps, schema_editor):
+    # Before enforcing the constraint, merge the quantities of the cards linked more
+    # than once to the same deck into the oldest link
+    CardInDeck = apps.get_model("decks", "CardInDeck")
+
+    duplicates = (
+        CardInDeck.objects.values("deck_id", "card_id")
+        .annotate(links=Count("id"), first_id=Min("id"), total=Sum("quantity"))
+        .filter(links__gt=1)
+    )
+    for duplicate in duplicates:
+        CardInDeck.objects.filter(id=duplicate["first_id"]).update(
+            quantity=duplicate["total"]
+        )
+        CardInDeck.objects.filter(
+            deck_id=duplicate["deck_id"], card_id=duplicate["card_id"]
+        ).exclude(id=duplicate["first_id"]).delete()
+
+
+def empty_reverse(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("decks", "0087_bannedcard_card_is_legal"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicated_cards, reverse_code=empty_reverse),
+        migrations.AddConstraint(
+            model_name="cardindeck",
+            constraint=models.UniqueConstraint(
+                fields=("deck", "card"), name="unique_card_in_deck"
+            ),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.15 on 2026-10-18 02:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("decks", "0089_cardimportjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeckSummary",
+            fields=[
+                (
+                    "deck",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="summary",
+                        serialize=False,
+                        to="decks.deck",
+                    ),
+                ),
+                ("total_count", models.PositiveIntegerField(default=0)),
+                ("rare_count", models.PositiveIntegerField(default=0)),
+                ("unique_count", models.PositiveIntegerField(default=0)),
+                ("exalt_count", models.PositiveIntegerField(default=0)),
+                ("banned_count", models.PositiveIntegerField(default=0)),
+                ("repeated_count", models.PositiveIntegerField(default=0)),
+                ("repeated_unique_count", models.PositiveIntegerField(default=0)),
+                ("family_count", models.JSONField(blank=True, default=dict)),
+                ("faction_count", models.JSONField(blank=True, default=dict)),
+                ("card_code_count", models.JSONField(blank=True, default=dict)),
+            ],
+        ),
+    ]
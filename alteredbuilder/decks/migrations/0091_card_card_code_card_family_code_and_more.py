@@ -0,0 +1,67 @@
+# Generated by Django 5.1.15 on 2026-10-18 02:11
+
+from django.db import migrations, models
+from django.db.models import F, Func, Value
+from django.db.models.functions import Concat
+
+
+def reference_part(position: int) -> Func:
+    return Func(
+        F("reference"),
+        Value("_"),
+        Value(position),
+        function="split_part",
+        output_field=models.CharField(),
+    )
+
+
+def fill_card_codes(apps, schema_editor):
+    Card = apps.get_model("decks", "Card")
+
+    Card.objects.update(
+        family_code=Concat(reference_part(4), Value("_"), reference_part(5)),
+        card_code=Concat(
+            reference_part(4),
+            Value("_"),
+            reference_part(5),
+            Value("_"),
+            reference_part(6),
+        ),
+    )
+
+
+def empty_reverse(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("decks", "0090_decksummary"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="card",
+            name="card_code",
+            field=models.CharField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name="card",
+            name="family_code",
+            field=models.CharField(blank=True, editable=False),
+        ),
+        migrations.RunPython(fill_card_codes, reverse_code=empty_reverse),
+        migrations.AddIndex(
+            model_name="card",
+            index=models.Index(
+                fields=["card_code"], name="decks_card_card_co_9a7cef_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="card",
+            index=models.Index(
+                fields=["family_code"], name="decks_card_family__1f6444_idx"
+            ),
+        ),
+    ]
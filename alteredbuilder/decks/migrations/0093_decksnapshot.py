@@ -0,0 +1,34 @@
+# Generated by Django 5.1.15 on 2026-10-18 02:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("decks", "0092_cardcatalogversion"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeckSnapshot",
+            fields=[
+                (
+                    "deck",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="snapshot",
+                        serialize=False,
+                        to="decks.deck",
+                    ),
+                ),
+                ("decklist", models.TextField(blank=True)),
+                ("card_lists", models.JSONField(blank=True, default=dict)),
+                ("stats", models.JSONField(blank=True, default=dict)),
+                ("catalog_version", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
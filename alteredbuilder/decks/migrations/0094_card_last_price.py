@@ -0,0 +1,37 @@
+# Generated by Django 5.1.15 on 2026-10-18 02:25
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_last_prices(apps, schema_editor):
+    Card = apps.get_model("decks", "Card")
+    CardPrice = apps.get_model("decks", "CardPrice")
+
+    Card.objects.update(
+        last_price=Subquery(
+            CardPrice.objects.filter(card=OuterRef("pk"))
+            .order_by("-date")
+            .values("price")[:1]
+        )
+    )
+
+
+def empty_reverse(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("decks", "0093_decksnapshot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="card",
+            name="last_price",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_last_prices, reverse_code=empty_reverse),
+    ]
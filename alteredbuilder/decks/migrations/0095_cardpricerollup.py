@@ -0,0 +1,55 @@
+# Generated by Django 5.1.15 on 2026-10-18 02:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("decks", "0094_card_last_price"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CardPriceRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("W", "week"), ("M", "month")], max_length=1
+                    ),
+                ),
+                ("start_date", models.DateField()),
+                ("min_price", models.PositiveIntegerField(null=True)),
+                ("avg_price", models.PositiveIntegerField(null=True)),
+                ("max_price", models.PositiveIntegerField(null=True)),
+                ("volume", models.PositiveIntegerField(default=0)),
+                (
+                    "card",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="price_rollups",
+                        to="decks.card",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("card", "period", "start_date"),
+                        name="unique_card_period_price",
+                    )
+                ],
+            },
+        ),
+    ]
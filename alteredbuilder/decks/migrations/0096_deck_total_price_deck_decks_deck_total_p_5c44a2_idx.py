@@ -0,0 +1,56 @@
+# Generated by Django 5.1.15 on 2026-10-18 02:32
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, NullIf
+
+
+def fill_total_prices(apps, schema_editor):
+    Card = apps.get_model("decks", "Card")
+    CardInDeck = apps.get_model("decks", "CardInDeck")
+    Deck = apps.get_model("decks", "Deck")
+
+    cards_price = (
+        CardInDeck.objects.filter(deck=OuterRef("pk"))
+        .values("deck")
+        .annotate(
+            total=Sum(
+                F("quantity") * F("card__last_price"), output_field=IntegerField()
+            )
+        )
+        .values("total")
+    )
+    hero_price = Card.objects.filter(reference=OuterRef("hero_id")).values("last_price")
+    Deck.objects.update(
+        total_price=NullIf(
+            Coalesce(Subquery(cards_price), 0) + Coalesce(Subquery(hero_price), 0), 0
+        )
+    )
+
+
+def empty_reverse(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("decks", "0095_cardpricerollup"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="deck",
+            name="total_price",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="deck",
+            index=models.Index(
+                fields=["total_price"], name="decks_deck_total_p_5c44a2_idx"
+            ),
+        ),
+        migrations.RunPython(fill_total_prices, reverse_code=empty_reverse),
+    ]
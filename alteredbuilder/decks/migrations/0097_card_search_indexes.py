@@ -0,0 +1,101 @@
+# Generated by Django 5.1.15 on 2026-10-18 02:36
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("decks", "0096_deck_total_price_deck_decks_deck_total_p_5c44a2_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="card",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.search.SearchVector("name_de", config="german"),
+                name="card_name_de_search_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="card",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.search.SearchVector(
+                    "name_en", config="english"
+                ),
+                name="card_name_en_search_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="card",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.search.SearchVector(
+                    "name_es", config="spanish"
+                ),
+                name="card_name_es_search_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="card",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.search.SearchVector("name_fr", config="french"),
+                name="card_name_fr_search_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="card",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.search.SearchVector(
+                    "name_it", config="italian"
+                ),
+                name="card_name_it_search_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="card",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.search.SearchVector(
+                    "main_effect_de", "echo_effect_de", config="german"
+                ),
+                name="card_effect_de_search_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="card",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.search.SearchVector(
+                    "main_effect_en", "echo_effect_en", config="english"
+                ),
+                name="card_effect_en_search_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="card",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.search.SearchVector(
+                    "main_effect_es", "echo_effect_es", config="spanish"
+                ),
+                name="card_effect_es_search_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="card",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.search.SearchVector(
+                    "main_effect_fr", "echo_effect_fr", config="french"
+                ),
+                name="card_effect_fr_search_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="card",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.search.SearchVector(
+                    "main_effect_it", "echo_effect_it", config="italian"
+                ),
+                name="card_effect_it_search_idx",
+            ),
+        ),
+    ]
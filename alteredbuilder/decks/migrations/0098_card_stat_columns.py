@@ -0,0 +1,121 @@
+# Generated by Django 5.1.15 on 2026-10-18 02:37
+
+from django.db import migrations, models
+from django.db.models import Func, JSONField
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast, JSONObject
+
+
+STAT_FIELDS = [
+    "main_cost",
+    "recall_cost",
+    "forest_power",
+    "mountain_power",
+    "ocean_power",
+    "reserve_count",
+    "permanent_count",
+]
+
+
+def fill_stat_columns(apps, schema_editor):
+    Card = apps.get_model("decks", "Card")
+
+    Card.objects.update(
+        **{
+            field: Cast(KT(f"stats__{field}"), models.PositiveSmallIntegerField())
+            for field in STAT_FIELDS
+        }
+    )
+
+
+def fill_stats(apps, schema_editor):
+    Card = apps.get_model("decks", "Card")
+
+    # Only the stats of each type of card were stored
+    Card.objects.update(
+        stats=Func(
+            JSONObject(**{field: field for field in STAT_FIELDS}),
+            function="JSONB_STRIP_NULLS",
+            output_field=JSONField(),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("decks", "0097_card_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="card",
+            name="forest_power",
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="card",
+            name="main_cost",
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="card",
+            name="mountain_power",
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="card",
+            name="ocean_power",
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="card",
+            name="permanent_count",
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="card",
+            name="recall_cost",
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="card",
+            name="reserve_count",
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(fill_stat_columns, reverse_code=fill_stats),
+        migrations.RemoveField(
+            model_name="card",
+            name="stats",
+        ),
+        migrations.AddIndex(
+            model_name="card",
+            index=models.Index(
+                fields=["main_cost"], name="decks_card_main_co_8f34ec_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="card",
+            index=models.Index(
+                fields=["recall_cost"], name="decks_card_recall__bebcbd_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="card",
+            index=models.Index(
+                fields=["forest_power"], name="decks_card_forest__75bf1e_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="card",
+            index=models.Index(
+                fields=["mountain_power"], name="decks_card_mountai_c81c02_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="card",
+            index=models.Index(
+                fields=["ocean_power"], name="decks_card_ocean_p_f0fad5_idx"
+            ),
+        ),
+    ]
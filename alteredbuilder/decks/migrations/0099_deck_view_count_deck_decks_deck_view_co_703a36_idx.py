@@ -0,0 +1,47 @@
+# Generated by Django 5.1.15 on 2026-10-18 02:47
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_view_counts(apps, schema_editor):
+    Deck = apps.get_model("decks", "Deck")
+    HitCount = apps.get_model("hitcount", "HitCount")
+
+    hits = HitCount.objects.filter(
+        content_type__app_label="decks",
+        content_type__model="deck",
+        object_pk=OuterRef("pk"),
+    ).values("hits")
+    Deck.objects.update(view_count=Coalesce(Subquery(hits), 0))
+
+
+def empty_reverse(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("decks", "0098_card_stat_columns"),
+        ("hitcount", "0004_auto_20200704_0933"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="deck",
+            name="view_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="deck",
+            index=models.Index(
+                fields=["-view_count", "-modified_at"],
+                name="decks_deck_view_co_703a36_idx",
+            ),
+        ),
+        migrations.RunPython(fill_view_counts, reverse_code=empty_reverse),
+    ]
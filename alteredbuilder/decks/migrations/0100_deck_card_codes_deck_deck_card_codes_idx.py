@@ -0,0 +1,59 @@
+# Generated by Django 5.1.15 on 2026-10-18 02:52
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Fill the sorted codes of each deck's cards and hero with a single statement. The "C"
+# collation sorts them the same way as Python
+FILL_CARD_CODES = """
+UPDATE decks_deck
+SET card_codes = deck_codes.card_codes
+FROM (
+    SELECT deck_id, array_agg(DISTINCT code ORDER BY code) AS card_codes
+    FROM (
+        SELECT
+            deck_cards.deck_id,
+            unnest(ARRAY[card.card_code, card.family_code]) COLLATE "C" AS code
+        FROM (
+            SELECT deck_id, card_id FROM decks_cardindeck
+            UNION
+            SELECT id, hero_id FROM decks_deck WHERE hero_id IS NOT NULL
+        ) AS deck_cards
+        JOIN decks_card AS card ON card.reference = deck_cards.card_id
+    ) AS codes
+    GROUP BY deck_id
+) AS deck_codes
+WHERE decks_deck.id = deck_codes.deck_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("decks", "0099_deck_view_count_deck_decks_deck_view_co_703a36_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="deck",
+            name="card_codes",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.CharField(),
+                blank=True,
+                default=list,
+                editable=False,
+                size=None,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="deck",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["card_codes"], name="deck_card_codes_idx"
+            ),
+        ),
+        migrations.RunSQL(FILL_CARD_CODES, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.1.15 on 2026-10-18 02:56
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.expressions import ArraySubquery
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+from django.db.models import F, Func, OuterRef, Subquery, Value
+
+
+def fill_search_vector(apps, schema_editor):
+    Card = apps.get_model("decks", "Card")
+    Deck = apps.get_model("decks", "Deck")
+    Tag = apps.get_model("decks", "Tag")
+
+    hero_names = Card.objects.filter(reference=OuterRef("hero_id")).values(
+        names=Func(
+            Value(" "),
+            *[F(f"name_{code}") for code, _ in settings.LANGUAGES],
+            function="CONCAT_WS",
+            output_field=models.TextField(),
+        )
+    )
+    tag_names = Func(
+        ArraySubquery(Tag.objects.filter(decks=OuterRef("pk")).values("name")),
+        Value(" "),
+        function="ARRAY_TO_STRING",
+        output_field=models.TextField(),
+    )
+    Deck.objects.update(
+        search_vector=SearchVector("name", config="simple", weight="A")
+        + SearchVector(Subquery(hero_names), config="simple", weight="B")
+        + SearchVector(tag_names, config="simple", weight="B")
+        + SearchVector("description", config="simple", weight="D")
+    )
+
+
+def empty_reverse(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("decks", "0100_deck_card_codes_deck_deck_card_codes_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="deck",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(fill_search_vector, reverse_code=empty_reverse),
+        migrations.AddIndex(
+            model_name="deck",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="deck_search_vector_idx"
+            ),
+        ),
+    ]
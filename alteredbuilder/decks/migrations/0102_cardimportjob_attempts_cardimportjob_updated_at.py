@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 03:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("decks", "0101_deck_search_vector_deck_deck_search_vector_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cardimportjob",
+            name="attempts",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="cardimportjob",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 03:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("decks", "0102_cardimportjob_attempts_cardimportjob_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="decksummary",
+            name="catalog_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
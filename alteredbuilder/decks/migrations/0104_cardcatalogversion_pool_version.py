@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 03:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("decks", "0103_deck_summary_catalog_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cardcatalogversion",
+            name="pool_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
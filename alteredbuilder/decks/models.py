@@ -3,14 +3,87 @@ import uuid
 
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericRelation
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.expressions import ArraySubquery
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
-from django.db.models import Q
+from django.db.models import F, Func, OuterRef, Q, Subquery, Value
 from django.urls import reverse
 from hitcount.models import HitCount, HitCountMixin
 
 
 ALTERED_TCG_URL = "https://www.altered.gg"
 CARD_DISPLAY_URL_FORMAT = "https://altered-prod-eu.s3.amazonaws.com/Art/CORE/CARDS/ALT_CORE_B_{}/ALT_CORE_B_{}_WEB.jpg"
+# Text search configuration used to parse the translated fields of each language
+SEARCH_CONFIGS = {
+    "de": "german",
+    "en": "english",
+    "es": "spanish",
+    "fr": "french",
+    "it": "italian",
+}
+# Decks are written in any language, so their texts are parsed without stemming
+DECK_SEARCH_CONFIG = "simple"
+
+
+def card_code_from_reference(reference: str) -> str:
+    return "_".join(reference.split("_")[3:6])
+
+
+def family_code_from_reference(reference: str) -> str:
+    return "_".join(reference.split("_")[3:5])
+
+
+def card_search_vector(fields: list[str], language: str) -> SearchVector:
+    """Build the full-text search document of the translated fields of a Card. The
+    queries need to use the same expression as the indexes to make use of them.
+
+    Args:
+        fields (list[str]): The translated fields, without the language suffix.
+        language (str): The code of the language to search.
+
+    Returns:
+        SearchVector: The search document.
+    """
+    return SearchVector(
+        *[f"{field}_{language}" for field in fields],
+        config=SEARCH_CONFIGS.get(language, "simple"),
+    )
+
+
+def deck_search_vector() -> SearchVector:
+    """Build the full-text search document of a Deck from its name, the name of its
+    hero in every language, its tags and its description, in decreasing weight. As it
+    reads other tables, it's stored on each Deck instead of being indexed directly.
+
+    Returns:
+        SearchVector: The search document.
+    """
+    hero_names = (
+        Card.objects.filter(reference=OuterRef("hero_id"))
+        .annotate(
+            names=Func(
+                Value(" "),
+                *[F(f"name_{code}") for code, _ in settings.LANGUAGES],
+                function="CONCAT_WS",
+                output_field=models.TextField(),
+            )
+        )
+        .values("names")
+    )
+    tag_names = Func(
+        ArraySubquery(Tag.objects.filter(decks=OuterRef("pk")).values("name")),
+        Value(" "),
+        function="ARRAY_TO_STRING",
+        output_field=models.TextField(),
+    )
+    return (
+        SearchVector("name", config=DECK_SEARCH_CONFIG, weight="A")
+        + SearchVector(Subquery(hero_names), config=DECK_SEARCH_CONFIG, weight="B")
+        + SearchVector(tag_names, config=DECK_SEARCH_CONFIG, weight="B")
+        + SearchVector("description", config=DECK_SEARCH_CONFIG, weight="D")
+    )
 
 
 class CardManager(models.Manager):
@@ -44,7 +117,8 @@ class CardManager(models.Manager):
             display_image_url=display_image_url,
             set=set,
             main_effect=main_effect,
-            stats={"reserve_count": reserve_count, "permanent_count": permanent_count},
+            reserve_count=reserve_count,
+            permanent_count=permanent_count,
         )
 
     def create_playable_card(
@@ -66,15 +140,8 @@ class CardManager(models.Manager):
         is_promo=False,
         is_alt_art=False,
     ):
-        stats = {"main_cost": main_cost, "recall_cost": recall_cost}
-        if type == Card.Type.CHARACTER:
-            stats.update(
-                {
-                    "forest_power": forest_power,
-                    "mountain_power": mountain_power,
-                    "ocean_power": ocean_power,
-                }
-            )
+        if type != Card.Type.CHARACTER:
+            forest_power = mountain_power = ocean_power = None
         return self.create(
             reference=reference,
             name=name,
@@ -85,7 +152,11 @@ class CardManager(models.Manager):
             set=set,
             main_effect=main_effect,
             echo_effect=echo_effect,
-            stats=stats,
+            main_cost=main_cost,
+            recall_cost=recall_cost,
+            forest_power=forest_power,
+            mountain_power=mountain_power,
+            ocean_power=ocean_power,
             is_promo=is_promo,
             is_alt_art=is_alt_art,
         )
@@ -159,6 +230,9 @@ class Card(models.Model):
             return [cls.COMMON, cls.RARE, cls.UNIQUE, cls.EXALTED]
 
     reference = models.CharField(primary_key=True)
+    # Codes derived from the reference, stored to be able to query them
+    card_code = models.CharField(blank=True, editable=False)
+    family_code = models.CharField(blank=True, editable=False)
     name = models.CharField(null=False, blank=False)
     faction = models.CharField(max_length=2, choices=Faction)
     type = models.CharField(choices=Type)
@@ -176,7 +250,18 @@ class Card(models.Model):
 
     is_legal = models.BooleanField(default=True)
 
-    stats = models.JSONField(blank=True, default=dict)
+    # Stats of playable cards
+    main_cost = models.PositiveSmallIntegerField(null=True, blank=True)
+    recall_cost = models.PositiveSmallIntegerField(null=True, blank=True)
+    # Stats of characters
+    forest_power = models.PositiveSmallIntegerField(null=True, blank=True)
+    mountain_power = models.PositiveSmallIntegerField(null=True, blank=True)
+    ocean_power = models.PositiveSmallIntegerField(null=True, blank=True)
+    # Stats of heroes
+    reserve_count = models.PositiveSmallIntegerField(null=True, blank=True)
+    permanent_count = models.PositiveSmallIntegerField(null=True, blank=True)
+    # Most recent marketplace price, mirroring the latest CardPrice of the card
+    last_price = models.PositiveIntegerField(null=True, blank=True, editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True, null=True)
 
@@ -197,14 +282,19 @@ class Card(models.Model):
     def __str__(self) -> str:
         return f"[{self.faction}] - {self.name} ({self.rarity})"
 
+    def save(self, *args, **kwargs) -> None:
+        self.card_code = card_code_from_reference(self.reference)
+        self.family_code = family_code_from_reference(self.reference)
+        super().save(*args, **kwargs)
+
     def get_official_link(self) -> str:
         return f"{ALTERED_TCG_URL}/cards/{self.reference}"
 
     def get_family_code(self) -> str:
-        return "_".join(self.reference.split("_")[3:5])
+        return self.family_code
 
     def get_card_code(self) -> str:
-        return "_".join(self.reference.split("_")[3:6])
+        return self.card_code
 
     def is_oof(self) -> bool:
         return f"_{self.faction}_" not in self.reference
@@ -214,12 +304,33 @@ class Card(models.Model):
         indexes = [
             models.Index(fields=["rarity"]),
             models.Index(fields=["faction"]),
+            models.Index(fields=["card_code"]),
+            models.Index(fields=["family_code"]),
+            models.Index(fields=["main_cost"]),
+            models.Index(fields=["recall_cost"]),
+            models.Index(fields=["forest_power"]),
+            models.Index(fields=["mountain_power"]),
+            models.Index(fields=["ocean_power"]),
             models.Index(
                 fields=["set", "rarity"],
                 name="card_base_query_idx",
                 condition=Q(is_alt_art=False, is_promo=False),
             ),
         ]
+        # Full-text search indexes of the names and effects in each language
+        indexes += [
+            GinIndex(
+                card_search_vector(["name"], code), name=f"card_name_{code}_search_idx"
+            )
+            for code, _ in settings.LANGUAGES
+        ]
+        indexes += [
+            GinIndex(
+                card_search_vector(["main_effect", "echo_effect"], code),
+                name=f"card_effect_{code}_search_idx",
+            )
+            for code, _ in settings.LANGUAGES
+        ]
 
 
 class BannedCard(models.Model):
@@ -228,6 +339,18 @@ class BannedCard(models.Model):
     faction = models.CharField(max_length=2, choices=Card.Faction)
 
 
+class CardCatalogVersion(models.Model):
+    """Version stamp of the card pool. `pool_version` is increased whenever cards are
+    added or modified, so that every process discards its in-memory card catalog.
+    `version` is only increased when existing cards are modified, so that the data
+    derived from them (e.g. the decks' snapshots) is rebuilt.
+    """
+
+    version = models.PositiveIntegerField(default=0)
+    pool_version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
 class Tag(models.Model):
     class Type(models.TextChoices):
         TYPE = "TY", "type"
@@ -264,6 +387,17 @@ class Deck(models.Model, HitCountMixin):
     love_count = models.PositiveIntegerField(default=0)
     comment_count = models.PositiveIntegerField(default=0)
     copy_count = models.PositiveIntegerField(default=0)
+    # Market price of the whole decklist, including the hero
+    total_price = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    # Copy of the hits counted by django-hitcount, which is refreshed periodically
+    view_count = models.PositiveIntegerField(default=0, editable=False)
+    # Card codes and family codes of the cards in the Deck, including its hero, used
+    # to search the decks playing some cards
+    card_codes = ArrayField(
+        models.CharField(), default=list, blank=True, editable=False
+    )
+    # Full-text search document, refreshed whenever the searched fields change
+    search_vector = SearchVectorField(null=True, editable=False)
     hit_count_generic = GenericRelation(
         HitCount,
         object_id_field="object_pk",
@@ -285,6 +419,10 @@ class Deck(models.Model, HitCountMixin):
         indexes = [
             models.Index(fields=["-modified_at"]),
             models.Index(fields=["is_public"]),
+            models.Index(fields=["total_price"]),
+            models.Index(fields=["-view_count", "-modified_at"]),
+            GinIndex(fields=["card_codes"], name="deck_card_codes_idx"),
+            GinIndex(fields=["search_vector"], name="deck_search_vector_idx"),
         ]
 
 
@@ -293,6 +431,125 @@ class CardInDeck(models.Model):
     card = models.ForeignKey(Card, on_delete=models.CASCADE)
     quantity = models.PositiveSmallIntegerField(default=1)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["deck", "card"], name="unique_card_in_deck")
+        ]
+
+
+class DeckSummary(models.Model):
+    """Aggregated metrics of a Deck's cards (excluding its hero), used to evaluate its
+    legality. It's updated with the changes applied to the Deck's `CardInDeck`, so
+    the decklist doesn't need to be scanned after every edit. When the cards are
+    modified, the catalog version changes and the summary has to be rebuilt.
+    """
+
+    deck = models.OneToOneField(
+        Deck, primary_key=True, on_delete=models.CASCADE, related_name="summary"
+    )
+    total_count = models.PositiveIntegerField(default=0)
+    rare_count = models.PositiveIntegerField(default=0)
+    unique_count = models.PositiveIntegerField(default=0)
+    exalt_count = models.PositiveIntegerField(default=0)
+    # Amount of distinct cards that are banned
+    banned_count = models.PositiveIntegerField(default=0)
+    # Amount of distinct cards with more than one copy
+    repeated_count = models.PositiveIntegerField(default=0)
+    # Amount of distinct UNIQUE cards with more than one copy
+    repeated_unique_count = models.PositiveIntegerField(default=0)
+    # Amount of copies of each family
+    family_count = models.JSONField(default=dict, blank=True)
+    # Amount of distinct cards of each faction
+    faction_count = models.JSONField(default=dict, blank=True)
+    # Amount of distinct cards sharing the same card code and faction
+    card_code_count = models.JSONField(default=dict, blank=True)
+    # Version of the card catalog used to build the summary
+    catalog_version = models.PositiveIntegerField(default=0)
+
+    @classmethod
+    def from_decklist(cls, deck: Deck, decklist: list[CardInDeck]) -> "DeckSummary":
+        summary = cls(deck=deck)
+        for cid in decklist:
+            summary.add_card(cid.card, cid.quantity)
+        return summary
+
+    def add_card(self, card: Card, quantity: int) -> None:
+        self._apply_card(card, quantity, 1)
+
+    def remove_card(self, card: Card, quantity: int) -> None:
+        self._apply_card(card, quantity, -1)
+
+    def _apply_card(self, card: Card, quantity: int, sign: int) -> None:
+        if quantity <= 0:
+            return
+
+        self.total_count += sign * quantity
+        match card.rarity:
+            case Card.Rarity.RARE:
+                self.rare_count += sign * quantity
+            case Card.Rarity.UNIQUE:
+                self.unique_count += sign * quantity
+                if quantity > 1:
+                    self.repeated_unique_count += sign
+            case Card.Rarity.EXALTED:
+                self.exalt_count += sign * quantity
+        if quantity > 1:
+            self.repeated_count += sign
+        if not card.is_legal:
+            self.banned_count += sign
+
+        self._update_histogram(
+            self.family_count, card.get_family_code(), sign * quantity
+        )
+        self._update_histogram(self.faction_count, card.faction, sign)
+        self._update_histogram(
+            self.card_code_count, f"{card.get_card_code()}_{card.faction}", sign
+        )
+
+    @staticmethod
+    def _update_histogram(histogram: dict[str, int], key: str, delta: int) -> None:
+        histogram[key] = histogram.get(key, 0) + delta
+        if histogram[key] <= 0:
+            del histogram[key]
+
+    def get_legality_data(self, hero: Card | None) -> dict:
+        factions = set(self.faction_count)
+        if hero:
+            factions.add(hero.faction)
+
+        return {
+            "hero": hero.get_family_code() if hero else None,
+            "faction_count": len(factions),
+            "total_count": self.total_count,
+            "rare_count": self.rare_count,
+            "unique_count": self.unique_count,
+            "exalt_count": self.exalt_count,
+            "max_family_count": max(self.family_count.values(), default=0),
+            "has_hero": bool(hero),
+            "repeats_same_unique": self.repeated_unique_count > 0,
+            "has_only_single_copies": self.repeated_count == 0
+            and max(self.card_code_count.values(), default=0) <= 1,
+            "has_banned_card": self.banned_count > 0,
+        }
+
+
+class DeckSnapshot(models.Model):
+    """Detail of a Deck's decklist (its cards by type and its statistics), rebuilt
+    whenever the Deck's cards change so that displaying it doesn't scan its cards.
+    """
+
+    deck = models.OneToOneField(
+        Deck, primary_key=True, on_delete=models.CASCADE, related_name="snapshot"
+    )
+    # Text decklist with a quantity and a reference on each line
+    decklist = models.TextField(blank=True)
+    # Quantity and reference of the cards of each type, sorted by their mana cost
+    card_lists = models.JSONField(default=dict, blank=True)
+    stats = models.JSONField(default=dict, blank=True)
+    # Version of the card catalog used to build the snapshot
+    catalog_version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
 
 class LovePoint(models.Model):
     deck = models.ForeignKey(Deck, on_delete=models.CASCADE)
@@ -383,3 +640,62 @@ class CardPrice(models.Model):
                 fields=["card", "date"], name="unique_card_date_price"
             )
         ]
+
+
+class CardPriceRollup(models.Model):
+    """Aggregation of the daily prices of a card over a week or a month, kept after
+    the daily prices are pruned.
+    """
+
+    class Period(models.TextChoices):
+        WEEK = "W", "week"
+        MONTH = "M", "month"
+
+    card = models.ForeignKey(
+        Card, on_delete=models.CASCADE, related_name="price_rollups"
+    )
+    period = models.CharField(max_length=1, choices=Period)
+    # First day of the week or month
+    start_date = models.DateField()
+    min_price = models.PositiveIntegerField(null=True)
+    avg_price = models.PositiveIntegerField(null=True)
+    max_price = models.PositiveIntegerField(null=True)
+    # Sum of the amount of cards on sale on each day
+    volume = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["card", "period", "start_date"],
+                name="unique_card_period_price",
+            )
+        ]
+
+
+class CardImportJob(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "P", "pending"
+        RUNNING = "R", "running"
+        FINISHED = "F", "finished"
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    status = models.CharField(max_length=1, choices=Status, default=Status.PENDING)
+    references = models.JSONField(default=list)
+    processed_count = models.PositiveIntegerField(default=0)
+    success = models.JSONField(default=list, blank=True)
+    failure = models.JSONField(default=list, blank=True)
+    # Amount of times the job has been run, as it's run again if it gets lost
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self) -> str:
+        return f"{self.user.username} - {len(self.references)} cards ({self.status})"
+
+    def get_absolute_url(self):
+        return reverse("import-multiple-cards-status", kwargs={"pk": self.pk})
+
+    class Meta:
+        ordering = ["-created_at"]
@@ -0,0 +1,256 @@
+import base64
+import binascii
+from collections.abc import Sequence
+from dataclasses import dataclass
+import json
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import F, FloatField, Model, Q, QuerySet
+from django.db.models.expressions import OrderBy
+from django.db.models.functions import Cast
+from django.http import Http404
+
+
+CURSOR_PARAM = "cursor"
+KEYSET_ANNOTATION = "keyset_{}"
+
+
+class KeysetPage(Sequence):
+    """Page of results retrieved after a cursor. Unlike Django's `Page`, it doesn't
+    know the total amount of results, only whether there's a page after it.
+    """
+
+    def __init__(self, object_list: list[Model], next_cursor: str | None) -> None:
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+
+@dataclass(frozen=True)
+class ResultCount:
+    """Amount of results of a listing, which might be estimated by the planner."""
+
+    value: int
+    is_estimate: bool
+
+
+class KeysetPaginationMixin:
+    """Mixin for ListViews to paginate the results by the values of their ordering
+    instead of by offset. The next page is requested with the `cursor` GET param, so
+    neither counting the results nor skipping the previous pages is needed.
+    """
+
+    def paginate_queryset(
+        self, queryset: QuerySet, page_size: int
+    ) -> tuple[None, KeysetPage, list[Model], bool]:
+        page = paginate_by_keyset(
+            queryset, page_size, self.request.GET.get(CURSOR_PARAM)
+        )
+        return None, page, page.object_list, page.has_next()
+
+
+def paginate_by_keyset(
+    qs: QuerySet, page_size: int, cursor: str | None = None
+) -> KeysetPage:
+    """Retrieve the page of the queryset after the received cursor. The primary key is
+    added to the ordering to break the ties between rows.
+
+    Args:
+        qs (QuerySet): The ordered queryset to paginate.
+        page_size (int): Amount of results on each page.
+        cursor (str | None, optional): Cursor of the last row of the previous page.
+            Defaults to None, which retrieves the first page.
+
+    Raises:
+        Http404: If the cursor is invalid.
+
+    Returns:
+        KeysetPage: The requested page.
+    """
+    ordering = get_keyset_ordering(qs)
+    qs = qs.annotate(
+        **{
+            KEYSET_ANNOTATION.format(index): get_keyset_expression(qs, order)
+            for index, order in enumerate(ordering)
+        }
+    ).order_by(*ordering)
+
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(ordering):
+            raise Http404("Invalid cursor")
+        try:
+            qs = qs.filter(get_keyset_filter(ordering, values))
+        except (ValidationError, ValueError, TypeError):
+            raise Http404("Invalid cursor")
+
+    # Retrieving an extra row tells whether there's a next page without counting
+    rows = list(qs[: page_size + 1])
+    object_list = rows[:page_size]
+    next_cursor = None
+    if len(rows) > page_size:
+        last_row = object_list[-1]
+        next_cursor = encode_cursor(
+            [
+                getattr(last_row, KEYSET_ANNOTATION.format(index))
+                for index in range(len(ordering))
+            ]
+        )
+
+    return KeysetPage(object_list, next_cursor)
+
+
+def get_keyset_ordering(qs: QuerySet) -> list[OrderBy]:
+    """Transform the ordering of the queryset into expressions, adding the primary key
+    as the last one if it's not already ordered by it.
+
+    Args:
+        qs (QuerySet): The queryset.
+
+    Returns:
+        list[OrderBy]: The ordering of the queryset.
+    """
+    pk_names = {"pk", qs.model._meta.pk.name}
+    ordering = []
+    for field in qs.query.order_by or qs.model._meta.ordering or ["pk"]:
+        if isinstance(field, str):
+            order = OrderBy(F(field.lstrip("-")), descending=field.startswith("-"))
+        elif isinstance(field, OrderBy):
+            order = field
+        else:
+            order = field.asc()
+        ordering.append(order)
+
+    last_expression = ordering[-1].expression
+    if not (isinstance(last_expression, F) and last_expression.name in pk_names):
+        ordering.append(OrderBy(F("pk"), descending=ordering[-1].descending))
+    return ordering
+
+
+def get_keyset_expression(qs: QuerySet, order: OrderBy) -> Any:
+    expression = order.expression.resolve_expression(qs.query.clone())
+    # Single precision values (e.g. the search rank) would change when sent back as
+    # double precision, so they're compared as double precision instead
+    if isinstance(expression.output_field, FloatField):
+        return Cast(order.expression, FloatField())
+    return order.expression
+
+
+def get_keyset_filter(ordering: list[OrderBy], values: list[Any]) -> Q:
+    """Build the condition matching the rows placed after the received values.
+
+    For an ordering `(a, b)` the rows after `(x, y)` are `a > x OR (a = x AND b > y)`,
+    which is preceded by `a >= x` so that the database can scan the index of `a`.
+
+    Args:
+        ordering (list[OrderBy]): The ordering of the queryset.
+        values (list[Any]): The ordering values of the last row of the previous page.
+
+    Returns:
+        Q: The filter to apply.
+    """
+    keyset_filter = Q(pk__in=[])
+    previous_equal = Q()
+    for index, (order, value) in enumerate(zip(ordering, values)):
+        name = KEYSET_ANNOTATION.format(index)
+        lookup = "lt" if order.descending else "gt"
+        nulls_last = sorts_nulls_last(order)
+        if value is None:
+            after = Q(**{f"{name}__isnull": False}) if not nulls_last else None
+            equal = Q(**{f"{name}__isnull": True})
+        else:
+            after = Q(**{f"{name}__{lookup}": value})
+            if nulls_last:
+                after |= Q(**{f"{name}__isnull": True})
+            equal = Q(**{name: value})
+
+        if after is not None:
+            keyset_filter |= previous_equal & after
+        previous_equal &= equal
+
+    first_value = values[0]
+    if first_value is not None:
+        lookup = "lte" if ordering[0].descending else "gte"
+        bound = Q(**{f"keyset_0__{lookup}": first_value})
+        if sorts_nulls_last(ordering[0]):
+            bound |= Q(keyset_0__isnull=True)
+        keyset_filter &= bound
+    return keyset_filter
+
+
+def sorts_nulls_last(order: OrderBy) -> bool:
+    # PostgreSQL places the nulls last unless the order is descending
+    return order.nulls_last or not (order.nulls_first or order.descending)
+
+
+def encode_cursor(values: list[Any]) -> str:
+    # Values without a JSON type (e.g. datetimes) are stored with their full precision
+    data = json.dumps(values, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    """Retrieve the ordering values stored in a cursor.
+
+    Args:
+        cursor (str): The cursor received.
+
+    Raises:
+        Http404: If the cursor can't be decoded.
+
+    Returns:
+        list[Any]: The ordering values.
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(data)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise Http404("Invalid cursor")
+    if not isinstance(values, list):
+        raise Http404("Invalid cursor")
+    return values
+
+
+def get_result_count(qs: QuerySet, cache_key: str | None) -> ResultCount:
+    """Retrieve the amount of results of the queryset. It's counted exactly unless the
+    planner estimates more rows than `RESULT_COUNT_ESTIMATE_THRESHOLD`, in which case
+    the estimate is returned instead. Either way, the result is cached for a short time.
+
+    Args:
+        qs (QuerySet): The queryset to count.
+        cache_key (str | None): Key identifying the filters applied to the queryset. If
+            it's None, the results are few and they're counted exactly every time.
+
+    Returns:
+        ResultCount: The amount of results.
+    """
+    if cache_key is None:
+        return ResultCount(qs.order_by().count(), is_estimate=False)
+
+    result_count = cache.get(cache_key)
+    if result_count is None:
+        # The ordering doesn't change the amount of results
+        qs = qs.order_by()
+        estimate = estimate_count(qs)
+        if estimate > settings.RESULT_COUNT_ESTIMATE_THRESHOLD:
+            result_count = ResultCount(estimate, is_estimate=True)
+        else:
+            result_count = ResultCount(qs.count(), is_estimate=False)
+        cache.set(cache_key, result_count, settings.RESULT_COUNT_CACHE_TIMEOUT)
+    return result_count
+
+
+def estimate_count(qs: QuerySet) -> int:
+    plan = json.loads(qs.explain(format="json"))
+    return plan[0]["Plan"]["Plan Rows"]
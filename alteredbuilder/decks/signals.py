@@ -1,9 +1,13 @@
 from typing import Type
 from django.db.models import F
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_save
 from django.dispatch import receiver
 
-from decks.models import DeckCopy
+from decks.models import Deck, DeckCopy, deck_search_vector
+
+
+# Fields of the Deck included in its search document
+SEARCHED_FIELDS = {"name", "description", "hero", "hero_id"}
 
 
 @receiver(post_save, sender=DeckCopy)
@@ -15,3 +19,26 @@ def update_deck_copy_counter(
         if source_deck:
             source_deck.copy_count = F("copy_count") + 1
             source_deck.save(update_fields=["copy_count"])
+
+
+@receiver(post_save, sender=Deck)
+def update_deck_search_vector(
+    sender: Type[Deck], instance: Deck, update_fields: frozenset | None, **kwargs
+) -> None:
+    # Saving only the counters doesn't change the searched texts
+    if update_fields is None or SEARCHED_FIELDS & update_fields:
+        Deck.objects.filter(pk=instance.pk).update(search_vector=deck_search_vector())
+
+
+@receiver(m2m_changed, sender=Deck.tags.through)
+def update_tagged_deck_search_vector(
+    sender, instance, action: str, reverse: bool, pk_set: set | None, **kwargs
+) -> None:
+    if action not in ["post_add", "post_remove", "post_clear"]:
+        return
+    if reverse:
+        # The Decks were modified through the Tag
+        decks = Deck.objects.filter(pk__in=pk_set or [])
+    else:
+        decks = Deck.objects.filter(pk=instance.pk)
+    decks.update(search_vector=deck_search_vector())
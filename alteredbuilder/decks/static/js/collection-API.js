@@ -1,6 +1,9 @@
 
 const LS_COLLECTION_KEY = "collectionContent";
 const LS_SETTINGS_KEY = "collectionSettings";
+// The import job's progress is polled every 2s for up to 10 minutes
+const IMPORT_JOB_POLL_INTERVAL = 2000;
+const IMPORT_JOB_MAX_POLLS = 300;
 
 
 function saveCollectionLocal(collection) {
@@ -128,5 +131,33 @@ function importUniqueCards(collection) {
         body: JSON.stringify({
             references: uniqueCards
         })
-    })
+    }).then(response => response.json()).then(response => {
+        if ("error" in response) {
+            displaySimpleToast(response.error.message);
+        } else {
+            pollImportJob(response.data.url);
+        }
+    });
+}
+
+function pollImportJob(url, attempt = 1) {
+    // Check the progress of the import job until it finishes or it takes too long
+    fetch(url, {
+        credentials: "same-origin",
+        headers: {"X-Requested-With": "XMLHttpRequest"}
+    }).then(response => response.json()).then(response => {
+        if ("error" in response) {
+            displaySimpleToast(response.error.message);
+        } else if (response.data.finished) {
+            let message = gettext("Imported %s unique cards").replace("%s", response.data.success.length);
+            displaySimpleToast(message);
+        } else if (attempt >= IMPORT_JOB_MAX_POLLS) {
+            displaySimpleToast(gettext("The unique cards are taking too long to import, check your favorite cards later."));
+        } else {
+            setTimeout(() => pollImportJob(url, attempt + 1), IMPORT_JOB_POLL_INTERVAL);
+        }
+    }).catch(error => {
+        console.error("Import job error:", error);
+        displaySimpleToast(gettext("Failed to check the import of the unique cards."));
+    });
 }
@@ -61,6 +61,14 @@ function searchCards(e) {
         params.append("other", other.join(","));
     }
 
+    // Retrieve the PRICE range
+    for (let [label, param] of [["MinPrice", "min_price"], ["MaxPrice", "max_price"]]) {
+        let priceElement = document.getElementById("filter" + label);
+        if (priceElement && priceElement.value != "") {
+            params.append(param, priceElement.value);
+        }
+    }
+
     // Retrieve the QUERY from the search input
     let queryElement = document.getElementById("querySearch");
     if (queryElement && queryElement.value != "") {
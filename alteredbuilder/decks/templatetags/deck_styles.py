@@ -74,6 +74,8 @@ def inject_params(get_params: dict, **kwargs) -> str:
         "deck",
         "other",
         "set",
+        "min_price",
+        "max_price",
     ]
     args = [
         f"{key}={value}"
@@ -8,7 +8,7 @@ from markdown.extensions import Extension
 from markdown.inlinepatterns import InlineProcessor
 from markdown.treeprocessors import Treeprocessor
 
-from decks.models import Card
+from decks.card_catalog import card_catalog
 
 
 ALTERED_API = "https://www.altered.gg/cards/"
@@ -44,15 +44,15 @@ class InlineCardReferenceProcessor(InlineProcessor):
             element = Element("span")
             element.attrib["class"] = "altered-" + reference
         else:
-            try:
+            card = card_catalog.get(reference)
+            if card:
                 element = Element("a", href=ALTERED_API + reference, target="_blank")
-                card = Card.objects.values("name", "image_url").get(reference=reference)
-                element.text = card["name"]
+                element.text = card.name
                 element.attrib["class"] = "card-hover"
-                element.attrib["data-image-url"] = card["image_url"]
-                prefetch = Element("link", rel="prefetch", href=card["image_url"])
+                element.attrib["data-image-url"] = card.image_url
+                prefetch = Element("link", rel="prefetch", href=card.image_url)
                 element.append(prefetch)
-            except Card.DoesNotExist:
+            else:
                 element = None
 
         return element, m.start(0), m.end(0)
@@ -0,0 +1,129 @@
+from io import StringIO
+from unittest import mock
+
+from django.db.models import F
+from django.test import TestCase
+from django.utils.translation import override
+
+from decks.card_catalog import bump_catalog_version, card_catalog
+from decks.management.commands import update_card_pool
+from decks.models import Card, CardCatalogVersion
+from decks.tests.utils import generate_card
+
+
+class CardCatalogTestCase(TestCase):
+    """Test case focusing on the in-memory card catalog."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.card = generate_card(Card.Faction.AXIOM, Card.Type.CHARACTER)
+        cls.rare = generate_card(
+            Card.Faction.AXIOM, Card.Type.CHARACTER, Card.Rarity.RARE
+        )
+        cls.unique = generate_card(
+            Card.Faction.AXIOM, Card.Type.CHARACTER, Card.Rarity.UNIQUE
+        )
+
+    def setUp(self):
+        card_catalog.clear()
+
+    def test_get_records(self):
+        """Retrieve the records of the cards by reference and by their codes."""
+        with self.assertNumQueries(2):
+            record = card_catalog.get(self.card.reference)
+
+        self.assertEqual(record.reference, self.card.reference)
+        self.assertEqual(record.name, self.card.name)
+        self.assertEqual(record.faction, self.card.faction)
+        self.assertEqual(record.get_family_code(), self.card.get_family_code())
+        self.assertEqual(record.set_code, self.card.set.code)
+        self.assertEqual(card_catalog.by_card_code(self.card.card_code), (record,))
+        self.assertEqual(card_catalog.by_family_code(self.card.family_code), (record,))
+        self.assertIsNone(card_catalog.get("wrong_reference"))
+
+    def test_get_unique_records(self):
+        """Unique cards are loaded on demand and kept afterwards."""
+        card_catalog.get(self.card.reference)
+
+        with self.assertNumQueries(1):
+            record = card_catalog.get(self.unique.reference)
+        with self.assertNumQueries(0):
+            self.assertIs(card_catalog.get(self.unique.reference), record)
+        self.assertEqual(card_catalog.by_card_code(self.unique.card_code), ())
+
+    def test_localized_name(self):
+        """The name of the record follows the active language."""
+        with override("fr"):
+            self.card.name = "Carte"
+            self.card.save()
+
+        record = card_catalog.get(self.card.reference)
+        with override("fr"):
+            self.assertEqual(record.name, "Carte")
+        with override("es"):
+            # Missing translations fall back to the default language
+            self.assertEqual(record.name, self.card.name)
+
+    def test_bump_version(self):
+        """The catalog is reloaded after the version stamp is increased."""
+        self.assertTrue(card_catalog.get(self.card.reference).is_legal)
+        Card.objects.filter(reference=self.card.reference).update(is_legal=False)
+        self.assertTrue(card_catalog.get(self.card.reference).is_legal)
+
+        bump_catalog_version()
+
+        self.assertFalse(card_catalog.get(self.card.reference).is_legal)
+
+    def test_version_bumped_elsewhere(self):
+        """A version stamp increased by another process discards the catalog once the
+        stamp is checked again.
+        """
+        bump_catalog_version()
+        card_catalog.get(self.card.reference)
+        Card.objects.filter(reference=self.card.reference).update(is_legal=False)
+        CardCatalogVersion.objects.update(version=F("version") + 1)
+
+        with mock.patch("decks.card_catalog.CATALOG_VERSION_CHECK_INTERVAL", 0):
+            self.assertFalse(card_catalog.get(self.card.reference).is_legal)
+
+    def test_bump_version_new_cards(self):
+        """Adding cards reloads the catalog without invalidating the data derived from
+        the existing cards.
+        """
+        bump_catalog_version()
+        version = card_catalog.version
+        new_card = generate_card(Card.Faction.AXIOM, Card.Type.SPELL, Card.Rarity.RARE)
+        self.assertEqual(card_catalog.by_family_code(new_card.family_code), ())
+
+        bump_catalog_version(modified=False)
+
+        self.assertEqual(card_catalog.version, version)
+        self.assertEqual(
+            card_catalog.by_family_code(new_card.family_code)[0].reference,
+            new_card.reference,
+        )
+
+    def test_update_card_pool_unchanged(self):
+        """Updating a card with the same data doesn't invalidate the catalog."""
+        bump_catalog_version()
+        version = card_catalog.version
+        fields = Card.get_base_fields() + [
+            "main_cost",
+            "recall_cost",
+            "forest_power",
+            "mountain_power",
+            "ocean_power",
+        ]
+        card_dict = {field: getattr(self.card, field) for field in fields}
+        card_dict["image_url"] = self.card.image_url_en
+        card_dict["subtypes"] = [("ROBOT", "Robot")]
+        command = update_card_pool.Command()
+        command.stdout = StringIO()
+
+        command.update_card(card_dict, Card.objects.get(pk=self.card.pk))
+        self.assertFalse(command.modified_cards)
+
+        card_dict["main_cost"] += 1
+        command.update_card(card_dict, Card.objects.get(pk=self.card.pk))
+        self.assertTrue(command.modified_cards)
+        self.assertEqual(card_catalog.version, version)
@@ -1,13 +1,17 @@
 from http import HTTPStatus
 
 from django.contrib.auth.models import User
+from django.db import connection
 from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from config.tests.utils import get_login_url, silence_logging
+from decks.card_catalog import card_catalog
+from decks.deck_utils import create_new_deck
 from decks.forms import CardImportForm, CommentForm, DecklistForm, DeckMetadataForm
 from decks.models import Card, Comment, Deck
-from decks.tests.utils import BaseFormTestCase
+from decks.tests.utils import BaseFormTestCase, generate_card
 from decks.views.imports import NewDeckFormView
 
 
@@ -206,6 +210,34 @@ class CreateDeckFormTestCase(BaseFormTestCase):
         self.assertEqual(deck_cards[0].quantity, 5)
         self.assertEqual(deck_cards[0].card, character)
 
+    def test_create_deck_query_count(self):
+        """The amount of queries needed to create a Deck should not depend on the
+        length of its decklist.
+        """
+        cards = [
+            generate_card(Card.Faction.AXIOM, Card.Type.CHARACTER, Card.Rarity.COMMON)
+            for _ in range(3)
+        ]
+        deck_form = {
+            "name": self.DECK_NAME,
+            "description": "",
+            "is_public": False,
+            "decklist": f"1 {self.HERO_REFERENCE}\n3 {self.CHARACTER_REFERENCE}",
+        }
+
+        # Both decks are created with a cold card catalog
+        card_catalog.clear()
+        with CaptureQueriesContext(connection) as short_queries:
+            create_new_deck(self.user, deck_form)
+
+        deck_form["decklist"] += "".join(f"\n3 {card.reference}" for card in cards)
+        card_catalog.clear()
+        with CaptureQueriesContext(connection) as long_queries:
+            deck = create_new_deck(self.user, deck_form)
+
+        self.assertEqual(len(short_queries), len(long_queries))
+        self.assertEqual(deck.cardindeck_set.count(), len(cards) + 1)
+
 
 class UpdateDeckMetadataFormTestCase(BaseFormTestCase):
     """Test case focusing on the form to update the metadata of a Deck."""
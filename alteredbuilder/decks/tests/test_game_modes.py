@@ -1,8 +1,17 @@
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
 from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.test import TestCase
 
-from decks.game_modes import GameMode, update_deck_legality
-from decks.models import Card, Deck
+from decks.card_catalog import bump_catalog_version, card_catalog
+from decks.deck_utils import patch_deck, remove_card_from_deck
+from decks.management.commands.calculate_deck_legality import LEGALITY_FIELDS
+from decks.game_modes import GameMode, get_deck_summary, update_deck_legality
+from decks.models import BannedCard, Card, CardInDeck, Deck, DeckSummary
 from decks.tests.utils import create_cid, generate_card
 
 
@@ -13,6 +22,10 @@ class GameModesTestCase(TestCase):
     def setUpTestData(cls):
         cls.user = User.objects.create_user(username="test_user")
 
+    def setUp(self):
+        # The catalog might hold the version stamp of a previous test
+        card_catalog.clear()
+
     def test_deck_total_count(self):
         hero = generate_card(Card.Faction.AXIOM, Card.Type.HERO, Card.Rarity.COMMON)
         deck = Deck.objects.create(owner=self.user, name="deck_name", hero=hero)
@@ -146,3 +159,192 @@ class GameModesTestCase(TestCase):
         self.assertNotIn(
             GameMode.ErrorCode.ERR_EXCEED_SAME_FAMILY_COUNT, deck.draft_legality_errors
         )
+
+    def test_deck_summary_incremental_update(self):
+        """The summary updated with the changes applied to a Deck should match the
+        summary built from scratch.
+        """
+        hero = generate_card(Card.Faction.AXIOM, Card.Type.HERO, Card.Rarity.COMMON)
+        deck = Deck.objects.create(owner=self.user, name="deck_name", hero=hero)
+        create_cid(
+            3, deck, 3, Card.Faction.AXIOM, Card.Type.CHARACTER, Card.Rarity.COMMON
+        )
+        create_cid(
+            2, deck, 2, Card.Faction.AXIOM, Card.Type.CHARACTER, Card.Rarity.RARE
+        )
+        unique = generate_card(
+            Card.Faction.LYRA, Card.Type.CHARACTER, Card.Rarity.UNIQUE
+        )
+        cids = list(deck.cardindeck_set.select_related("card"))
+
+        # The summary is built before the changes are applied
+        get_deck_summary(deck)
+        patch_deck(
+            deck,
+            deck.name,
+            {
+                cids[0].card.reference: 1,
+                cids[3].card.reference: 0,
+                unique.reference: 2,
+            },
+        )
+        summary = remove_card_from_deck(deck, cids[1].card.reference)
+        expected = DeckSummary.from_decklist(
+            deck, deck.cardindeck_set.select_related("card")
+        )
+
+        summary.refresh_from_db()
+        for field in DeckSummary._meta.concrete_fields:
+            self.assertEqual(
+                getattr(summary, field.attname), getattr(expected, field.attname)
+            )
+        self.assertEqual(summary.faction_count, {"AX": 3, "LY": 1})
+        self.assertEqual(summary.repeated_unique_count, 1)
+
+        update_deck_legality(deck, summary)
+
+        self.assertIn(
+            GameMode.ErrorCode.ERR_EXCEED_FACTION_COUNT, deck.standard_legality_errors
+        )
+        self.assertIn(
+            GameMode.ErrorCode.ERR_UNIQUE_IS_REPEATED, deck.standard_legality_errors
+        )
+
+    def test_calculate_deck_legality_command(self):
+        """The legality calculated in bulk should match the one calculated for each
+        deck.
+        """
+        hero = generate_card(Card.Faction.AXIOM, Card.Type.HERO, Card.Rarity.COMMON)
+        legal_deck = Deck.objects.create(owner=self.user, name="legal", hero=hero)
+        create_cid(
+            13,
+            legal_deck,
+            3,
+            Card.Faction.AXIOM,
+            Card.Type.CHARACTER,
+            Card.Rarity.COMMON,
+        )
+        illegal_deck = Deck.objects.create(owner=self.user, name="illegal", hero=hero)
+        create_cid(
+            2, illegal_deck, 2, Card.Faction.LYRA, Card.Type.SPELL, Card.Rarity.UNIQUE
+        )
+        create_cid(
+            1,
+            illegal_deck,
+            4,
+            Card.Faction.AXIOM,
+            Card.Type.CHARACTER,
+            Card.Rarity.RARE,
+        )
+        banned_card = generate_card(
+            Card.Faction.AXIOM, Card.Type.CHARACTER, Card.Rarity.COMMON
+        )
+        banned_card.is_legal = False
+        banned_card.save()
+        CardInDeck.objects.create(deck=illegal_deck, card=banned_card, quantity=1)
+        empty_deck = Deck.objects.create(owner=self.user, name="empty")
+
+        decks = [legal_deck, illegal_deck, empty_deck]
+        for deck in decks:
+            update_deck_legality(deck)
+
+        call_command("calculate_deck_legality", chunk_size=2, stdout=StringIO())
+
+        # The summaries are still valid, since the cards haven't been modified
+        self.assertEqual(DeckSummary.objects.filter(deck__in=decks).count(), len(decks))
+        for deck in decks:
+            stored_deck = Deck.objects.get(pk=deck.pk)
+            for field in LEGALITY_FIELDS:
+                self.assertEqual(getattr(stored_deck, field), getattr(deck, field))
+        self.assertTrue(legal_deck.is_standard_legal)
+        self.assertFalse(illegal_deck.is_singleton_legal)
+
+    def test_calculate_deck_legality_resume(self):
+        """The shards recorded on the checkpoint shouldn't be processed again."""
+        decks = [
+            Deck.objects.create(owner=self.user, name=f"deck {index}")
+            for index in range(3)
+        ]
+        Deck.objects.filter(id__in=[deck.id for deck in decks]).update(
+            is_standard_legal=None
+        )
+        first_id = Deck.objects.order_by("id").first().id
+
+        with TemporaryDirectory() as directory:
+            checkpoint = Path(directory) / "checkpoint"
+            checkpoint.write_text(f"{first_id}-{first_id}\n")
+            output = StringIO()
+            call_command(
+                "calculate_deck_legality",
+                shard_size=1,
+                checkpoint=checkpoint,
+                stdout=output,
+            )
+
+            self.assertFalse(checkpoint.exists())
+
+        self.assertIn("Resuming with 1 completed shards", output.getvalue())
+        self.assertEqual(output.getvalue().count("decks/s"), len(decks) - 1)
+        legality = dict(
+            Deck.objects.filter(id__in=[deck.id for deck in decks]).values_list(
+                "id", "is_standard_legal"
+            )
+        )
+        self.assertIsNone(legality[decks[0].id])
+        self.assertFalse(legality[decks[1].id])
+        self.assertFalse(legality[decks[2].id])
+
+    def test_calculate_card_legality_updates_affected_decks(self):
+        """Banning a card should only re-evaluate the decks containing it."""
+        hero = generate_card(Card.Faction.AXIOM, Card.Type.HERO, Card.Rarity.COMMON)
+        deck = Deck.objects.create(owner=self.user, name="affected", hero=hero)
+        create_cid(
+            13, deck, 3, Card.Faction.AXIOM, Card.Type.CHARACTER, Card.Rarity.COMMON
+        )
+        update_deck_legality(deck)
+        deck.save()
+        other_deck = Deck.objects.create(owner=self.user, name="not affected")
+        banned_card = deck.cardindeck_set.first().card
+        BannedCard.objects.create(
+            name=banned_card.name,
+            family_name=banned_card.card_code,
+            faction=banned_card.faction,
+        )
+
+        output = StringIO()
+        call_command("calculate_card_legality", stdout=output)
+
+        deck.refresh_from_db()
+        other_deck.refresh_from_db()
+        self.assertFalse(deck.is_standard_legal)
+        self.assertIn(
+            GameMode.ErrorCode.ERR_CONTAINS_BANNED_CARD, deck.standard_legality_errors
+        )
+        self.assertIsNone(other_deck.is_standard_legal)
+        self.assertIn("Updated 1 decks", output.getvalue())
+        self.assertIn("1 decks changed their is_standard_legal", output.getvalue())
+        # The banned card invalidates the stored summary
+        self.assertEqual(get_deck_summary(deck).banned_count, 1)
+
+    def test_deck_summary_kept_for_new_cards(self):
+        """Adding cards to the pool shouldn't invalidate the stored summaries."""
+        deck = Deck.objects.create(owner=self.user, name="deck")
+        create_cid(
+            3, deck, 3, Card.Faction.AXIOM, Card.Type.CHARACTER, Card.Rarity.COMMON
+        )
+        summary = get_deck_summary(deck)
+        generate_card(Card.Faction.AXIOM, Card.Type.CHARACTER, Card.Rarity.COMMON)
+
+        bump_catalog_version(modified=False)
+
+        deck = Deck.objects.get(pk=deck.pk)
+        with mock.patch("decks.game_modes.build_deck_summary") as build_deck_summary:
+            self.assertEqual(get_deck_summary(deck).pk, summary.pk)
+        build_deck_summary.assert_not_called()
+
+        bump_catalog_version()
+
+        deck = Deck.objects.get(pk=deck.pk)
+        with mock.patch("decks.game_modes.build_deck_summary") as build_deck_summary:
+            get_deck_summary(deck)
+        build_deck_summary.assert_called_once()
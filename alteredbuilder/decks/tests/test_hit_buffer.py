@@ -0,0 +1,151 @@
+import threading
+from unittest import mock
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.test import override_settings
+from django.urls import reverse
+from hitcount.models import BlacklistIP, Hit, HitCount
+
+from decks.hit_buffer import HitBuffer, hit_buffer
+from decks.models import Deck, PrivateLink
+from decks.tests.utils import BaseViewTestCase
+
+
+@override_settings(HIT_BUFFER_FLUSH_SIZE=100, HIT_BUFFER_FLUSH_INTERVAL=3600)
+class HitBufferTestCase(BaseViewTestCase):
+    """Test case focusing on the buffered writes of the deck hits and private link
+    accesses.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.deck = Deck.objects.filter(owner=cls.user, is_public=True).get()
+        cls.url = reverse("deck-detail", kwargs={"pk": cls.deck.pk})
+
+    def setUp(self):
+        hit_buffer.clear()
+
+    def get_hits(self) -> int:
+        hitcount = HitCount.objects.filter(object_pk=self.deck.pk).first()
+        return hitcount.hits if hitcount else 0
+
+    def test_buffer_hits(self):
+        """The hits are written on flush, once per visitor."""
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.client.force_login(self.other_user)
+        self.client.get(self.url)
+
+        self.assertEqual(self.get_hits(), 0)
+        # The first visit has no session yet, but it's the same visitor
+        self.assertEqual(hit_buffer.metrics["pending"], 3)
+
+        hit_buffer.flush()
+
+        self.assertEqual(self.get_hits(), 2)
+        self.assertEqual(Hit.objects.count(), 2)
+
+        # The visitors with an active hit aren't counted again
+        self.client.get(self.url)
+        hit_buffer.flush()
+
+        self.assertEqual(self.get_hits(), 2)
+
+    def test_session_visitors(self):
+        """Anonymous visitors with a session are told apart by it, even if they share
+        their IP and user agent.
+        """
+        for _ in range(2):
+            session = self.client.session
+            session.save()
+            self.client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+            self.client.get(self.url)
+            self.client.cookies.clear()
+        self.client.get(self.url)
+        hit_buffer.flush()
+
+        self.assertEqual(self.get_hits(), 3)
+
+    def test_blacklisted_ip(self):
+        """The hits from blacklisted IPs are ignored."""
+        BlacklistIP.objects.create(ip="127.0.0.1")
+        self.client.get(self.url)
+        hit_buffer.flush()
+
+        self.assertEqual(self.get_hits(), 0)
+
+    @override_settings(HIT_BUFFER_FLUSH_SIZE=2)
+    def test_flush_on_size(self):
+        """The buffer is flushed once it holds enough events."""
+        self.client.get(self.url)
+        self.assertEqual(self.get_hits(), 0)
+
+        self.client.force_login(self.other_user)
+        self.client.get(self.url)
+
+        self.assertEqual(self.get_hits(), 2)
+        self.assertEqual(hit_buffer.metrics["pending"], 0)
+
+    @override_settings(HIT_BUFFER_MAX_EVENTS=1)
+    def test_drop_when_full(self):
+        """The events received while the buffer is full are dropped."""
+        dropped = hit_buffer.metrics.get("dropped", 0)
+        self.client.get(self.url)
+        self.client.force_login(self.other_user)
+        self.client.get(self.url)
+
+        self.assertEqual(hit_buffer.metrics["dropped"], dropped + 1)
+        hit_buffer.flush()
+        self.assertEqual(self.get_hits(), 1)
+
+    def test_private_link_access(self):
+        """The last access to a PrivateLink is written on flush."""
+        private_deck = Deck.objects.filter(owner=self.user, is_public=False).get()
+        link = PrivateLink.objects.create(deck=private_deck)
+        self.client.force_login(self.other_user)
+
+        self.client.get(link.get_absolute_url())
+        link.refresh_from_db()
+        self.assertIsNone(link.last_accessed_at)
+
+        hit_buffer.flush()
+        link.refresh_from_db()
+        self.assertIsNotNone(link.last_accessed_at)
+
+    @override_settings(HIT_BUFFER_FLUSH_INTERVAL=0.01)
+    def test_periodic_flush(self):
+        """Once started, the buffer is flushed periodically until it's shut down."""
+        buffer = HitBuffer()
+        flushed = threading.Event()
+        with mock.patch.object(buffer, "flush", side_effect=flushed.set) as flush:
+            buffer.start()
+            self.assertTrue(flushed.wait(timeout=5))
+            buffer.shutdown()
+
+            calls = flush.call_count
+            self.assertFalse(buffer._timer.is_alive())
+        self.assertGreaterEqual(calls, 2)
+
+    def test_shutdown(self):
+        """The pending events are written on shutdown."""
+        self.client.get(self.url)
+        hit_buffer.shutdown()
+
+        self.assertEqual(self.get_hits(), 1)
+        self.assertEqual(hit_buffer.metrics["pending"], 0)
+
+    def test_shutdown_failure(self):
+        """The events that can't be written on shutdown are counted as dropped."""
+        dropped = hit_buffer.metrics.get("dropped", 0)
+        self.client.get(self.url)
+        with (
+            self.assertLogs("decks.hit_buffer", "WARNING"),
+            mock.patch("decks.hit_buffer.save_hits", side_effect=DatabaseError),
+        ):
+            hit_buffer.shutdown()
+
+        self.assertEqual(hit_buffer.metrics["dropped"], dropped + 1)
+        self.assertEqual(hit_buffer.metrics["pending"], 0)
+        self.assertEqual(self.get_hits(), 0)
@@ -0,0 +1,601 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from http import HTTPStatus
+from io import StringIO
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import override
+import requests
+
+from config.tests.utils import silence_logging
+from decks.card_catalog import card_catalog
+from decks.deck_utils import (
+    QUEUED_IMPORT_JOBS,
+    SESSION,
+    import_unique_card,
+    recover_card_import_job,
+    refresh_queued_import_jobs,
+    run_card_import_job,
+)
+from decks.exceptions import AlteredAPIError
+from decks.management.commands.rollup_card_prices import ROLLUP_FIELDS
+from decks.management.commands.update_card_prices import (
+    Command as UpdateCardPricesCommand,
+)
+from decks.game_modes import GameMode
+from decks.models import (
+    Card,
+    CardImportJob,
+    CardPrice,
+    CardPriceRollup,
+    Deck,
+    FavoriteCard,
+)
+from decks.tests.utils import StubAlteredAPI, generate_card
+
+
+class ImportUniqueCardTestCase(TestCase):
+    """Test case focusing on the import of unique cards from the official API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.common = generate_card(
+            Card.Faction.AXIOM, Card.Type.CHARACTER, Card.Rarity.COMMON
+        )
+        family = cls.common.reference.rsplit("_", 1)[0]
+        cls.unique_reference = f"{family}_U_1"
+
+    def test_import_all_locales(self):
+        """Import a unique card and fill the effects of every language."""
+        with StubAlteredAPI() as api, override_settings(ALTERED_API_BASE_URL=api.url):
+            api.add_unique_card(self.unique_reference, Card.Faction.AXIOM)
+            card = import_unique_card(self.unique_reference)
+
+        card.refresh_from_db()
+        self.assertEqual(card.rarity, Card.Rarity.UNIQUE)
+        self.assertEqual(card.ocean_power, 5)
+        self.assertEqual(card.main_effect_en, "effect en-us")
+        self.assertEqual(card.main_effect_fr, "effect fr-fr")
+        self.assertEqual(card.main_effect_de, "effect de-de")
+        # Every language is requested once
+        self.assertEqual(len(api.requests), 5)
+
+    def test_import_is_concurrent(self):
+        """The languages should be requested concurrently, so the import should take
+        roughly as long as a single request.
+        """
+        delay = 0.3
+        with (
+            StubAlteredAPI(delay=delay) as api,
+            override_settings(ALTERED_API_BASE_URL=api.url),
+        ):
+            api.add_unique_card(self.unique_reference, Card.Faction.AXIOM)
+            start = time.monotonic()
+            import_unique_card(self.unique_reference)
+            elapsed = time.monotonic() - start
+
+        self.assertLess(elapsed, delay * 3)
+
+    def test_import_partial_failure(self):
+        """If a language fails, the card is still imported with the default values."""
+        with StubAlteredAPI() as api, override_settings(ALTERED_API_BASE_URL=api.url):
+            api.add_unique_card(self.unique_reference, Card.Faction.AXIOM)
+            api.failing_locales.add("it-it")
+            with self.assertLogs("decks.deck_utils", "WARNING") as logs:
+                card = import_unique_card(self.unique_reference)
+
+        self.assertEqual(len(logs.output), 1)
+        card.refresh_from_db()
+        self.assertEqual(card.main_effect_fr, "effect fr-fr")
+        self.assertFalse(card.main_effect_it)
+        with override("it"):
+            self.assertEqual(card.main_effect, "effect en-us")
+
+    def test_import_deadline(self):
+        """If the API takes longer than the deadline, the import fails."""
+        with (
+            StubAlteredAPI(delay=0.5) as api,
+            override_settings(ALTERED_API_BASE_URL=api.url, ALTERED_API_TIMEOUT=0.1),
+        ):
+            api.add_unique_card(self.unique_reference, Card.Faction.AXIOM)
+            with self.assertRaises(AlteredAPIError):
+                import_unique_card(self.unique_reference)
+
+        self.assertFalse(Card.objects.filter(reference=self.unique_reference).exists())
+
+    def test_import_overall_deadline(self):
+        """The deadline applies to the whole request, not to each socket operation."""
+
+        def slow_get(*args, **kwargs):
+            time.sleep(0.5)
+            raise requests.ConnectionError
+
+        with (
+            override_settings(ALTERED_API_TIMEOUT=0.1),
+            mock.patch.object(SESSION, "get", side_effect=slow_get),
+            self.assertRaises(AlteredAPIError),
+        ):
+            start = time.monotonic()
+            import_unique_card(self.unique_reference)
+        self.assertLess(time.monotonic() - start, 0.4)
+
+    def test_import_nonexistent_card(self):
+        """Attempt to import a card that does not exist in the official API."""
+        with StubAlteredAPI() as api, override_settings(ALTERED_API_BASE_URL=api.url):
+            with self.assertRaises(AlteredAPIError) as context:
+                import_unique_card(self.unique_reference)
+
+        self.assertEqual(context.exception.status_code, 404)
+
+
+class CardImportJobTestCase(TestCase):
+    """Test case focusing on the jobs importing multiple unique cards."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="user")
+        cls.other_user = User.objects.create_user(username="other_user")
+        common = generate_card(
+            Card.Faction.AXIOM, Card.Type.CHARACTER, Card.Rarity.COMMON
+        )
+        cls.family = common.reference.rsplit("_", 1)[0]
+        cls.existing_unique = generate_card(
+            Card.Faction.AXIOM, Card.Type.CHARACTER, Card.Rarity.UNIQUE
+        )
+
+    def test_run_job(self):
+        """Run a job mixing existing, new and nonexistent unique cards."""
+        new_reference = f"{self.family}_U_1"
+        missing_reference = f"{self.family}_U_2"
+        job = CardImportJob.objects.create(
+            user=self.user,
+            references=[
+                self.existing_unique.reference,
+                new_reference,
+                missing_reference,
+            ],
+        )
+
+        with StubAlteredAPI() as api, override_settings(ALTERED_API_BASE_URL=api.url):
+            api.add_unique_card(new_reference, Card.Faction.AXIOM)
+            run_card_import_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, CardImportJob.Status.FINISHED)
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(job.processed_count, 3)
+        self.assertCountEqual(
+            job.success, [self.existing_unique.reference, new_reference]
+        )
+        self.assertEqual(job.failure, [missing_reference])
+        # The existing card is not requested to the API
+        self.assertTrue(
+            all(self.existing_unique.reference not in path for path, _ in api.requests)
+        )
+        self.assertTrue(Card.objects.filter(reference=new_reference).exists())
+        self.assertEqual(
+            FavoriteCard.objects.filter(user=self.user).count(), len(job.success)
+        )
+
+    def test_run_job_error(self):
+        """An unexpected error finishes the job, failing the unprocessed references."""
+        new_reference = f"{self.family}_U_1"
+        job = CardImportJob.objects.create(
+            user=self.user,
+            references=[self.existing_unique.reference, new_reference],
+        )
+
+        with (
+            StubAlteredAPI() as api,
+            override_settings(ALTERED_API_BASE_URL=api.url),
+            mock.patch("decks.deck_utils.import_unique_card", side_effect=KeyError),
+            self.assertLogs("decks.deck_utils", "ERROR"),
+        ):
+            api.add_unique_card(new_reference, Card.Faction.AXIOM)
+            run_card_import_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, CardImportJob.Status.FINISHED)
+        self.assertEqual(job.processed_count, 2)
+        self.assertEqual(job.success, [self.existing_unique.reference])
+        self.assertEqual(job.failure, [new_reference])
+
+    def test_run_finished_job(self):
+        """A job finished while it was waiting to run is skipped."""
+        job = CardImportJob.objects.create(
+            user=self.user,
+            references=[self.existing_unique.reference],
+            status=CardImportJob.Status.FINISHED,
+        )
+
+        with silence_logging():
+            run_card_import_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 0)
+        self.assertEqual(job.success, [])
+
+    def test_create_job(self):
+        """Create a job through the endpoint and poll its status."""
+        self.client.force_login(self.user)
+        references = [self.existing_unique.reference] * 2
+
+        response = self.client.post(
+            reverse("import-multiple-cards"),
+            {"references": references},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.ACCEPTED)
+        job = CardImportJob.objects.get(pk=response.json()["data"]["job"])
+        # Repeated references are discarded
+        self.assertEqual(job.references, [self.existing_unique.reference])
+
+        response = self.client.get(response.json()["data"]["url"])
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        status = response.json()["data"]
+        self.assertFalse(status["finished"])
+        self.assertEqual(status["total"], 1)
+        self.assertEqual(status["processed"], 0)
+
+    def test_recover_lost_job(self):
+        """A job without progress for too long is run again when its status is
+        polled, and finished once it has been run too many times.
+        """
+        job = CardImportJob.objects.create(
+            user=self.user,
+            references=[self.existing_unique.reference, f"{self.family}_U_1"],
+            status=CardImportJob.Status.RUNNING,
+            attempts=1,
+            success=[self.existing_unique.reference],
+        )
+        lost_at = timezone.now() - timedelta(
+            seconds=settings.CARD_IMPORT_JOB_TIMEOUT + 1
+        )
+        CardImportJob.objects.filter(pk=job.pk).update(updated_at=lost_at)
+        self.client.force_login(self.user)
+
+        with self.captureOnCommitCallbacks() as callbacks, silence_logging():
+            response = self.client.get(job.get_absolute_url())
+            # The job is only recovered once
+            self.client.get(job.get_absolute_url())
+        self.assertFalse(response.json()["data"]["finished"])
+        self.assertEqual(len(callbacks), 1)
+
+        CardImportJob.objects.filter(pk=job.pk).update(
+            updated_at=lost_at, attempts=settings.CARD_IMPORT_JOB_MAX_ATTEMPTS
+        )
+        with self.captureOnCommitCallbacks() as callbacks, silence_logging():
+            response = self.client.get(job.get_absolute_url())
+        self.assertFalse(callbacks)
+        status = response.json()["data"]
+        self.assertTrue(status["finished"])
+        self.assertEqual(status["processed"], 2)
+        self.assertEqual(status["failure"], [f"{self.family}_U_1"])
+
+    def test_queued_job_not_lost(self):
+        """The jobs waiting behind a running job are refreshed, so they aren't
+        recovered while they wait.
+        """
+        job = CardImportJob.objects.create(user=self.user, references=[])
+        CardImportJob.objects.filter(pk=job.pk).update(
+            updated_at=timezone.now()
+            - timedelta(seconds=settings.CARD_IMPORT_JOB_TIMEOUT + 1)
+        )
+        QUEUED_IMPORT_JOBS.add(job.pk)
+        self.addCleanup(QUEUED_IMPORT_JOBS.discard, job.pk)
+
+        refresh_queued_import_jobs()
+
+        job.refresh_from_db()
+        self.assertFalse(recover_card_import_job(job))
+
+    def test_recover_lost_jobs_command(self):
+        """The command runs again the lost jobs that nobody is polling."""
+        job = CardImportJob.objects.create(
+            user=self.user, references=[self.existing_unique.reference]
+        )
+        CardImportJob.objects.create(user=self.user, references=[])
+        CardImportJob.objects.filter(pk=job.pk).update(
+            updated_at=timezone.now()
+            - timedelta(seconds=settings.CARD_IMPORT_JOB_TIMEOUT + 1)
+        )
+
+        with silence_logging():
+            call_command("recover_card_import_jobs", stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, CardImportJob.Status.FINISHED)
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(job.success, [self.existing_unique.reference])
+        # The recent job isn't touched
+        self.assertTrue(
+            CardImportJob.objects.filter(status=CardImportJob.Status.PENDING).exists()
+        )
+
+    def test_job_status_other_user(self):
+        """Attempt to read the status of a job of another user."""
+        job = CardImportJob.objects.create(user=self.other_user, references=[])
+        self.client.force_login(self.user)
+
+        response = self.client.get(job.get_absolute_url())
+
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_create_job_missing_references(self):
+        """Attempt to create a job without references."""
+        self.client.force_login(self.user)
+
+        response = self.client.post(
+            reverse("import-multiple-cards"), {}, content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_create_job_invalid_references(self):
+        """Attempt to create a job with references that aren't strings."""
+        self.client.force_login(self.user)
+
+        for body in [[], {"references": [["a"]]}, {"references": [{}, "a"]}]:
+            with self.subTest(body=body):
+                response = self.client.post(
+                    reverse("import-multiple-cards"),
+                    body,
+                    content_type="application/json",
+                )
+                self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertFalse(CardImportJob.objects.exists())
+
+
+class ValidateDecklistViewTestCase(TestCase):
+    """Test case focusing on the endpoint validating decklists without storing them."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hero = generate_card(Card.Faction.AXIOM, Card.Type.HERO)
+        cls.cards = [
+            generate_card(Card.Faction.AXIOM, Card.Type.CHARACTER) for _ in range(13)
+        ]
+        cls.legal_decklist = f"1 {cls.hero.reference}\n" + "\n".join(
+            f"3 {card.reference}" for card in cls.cards
+        )
+
+    def setUp(self):
+        card_catalog.clear()
+
+    def test_validate_decklist(self):
+        """Validate a single legal decklist."""
+        deck_count = Deck.objects.count()
+
+        response = self.client.post(
+            reverse("validate-decklists"),
+            {"decklist": self.legal_decklist},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        [result] = response.json()["data"]["results"]
+        self.assertTrue(result["legality"]["standard"]["is_legal"])
+        self.assertEqual(result["legality"]["standard"]["errors"], [])
+        self.assertFalse(result["legality"]["singleton"]["is_legal"])
+        self.assertEqual(Deck.objects.count(), deck_count)
+
+    def test_validate_batch(self):
+        """Validate multiple decklists in a single request."""
+        decklists = [
+            self.legal_decklist,
+            f"1 {self.hero.reference}\n4 {self.cards[0].reference}",
+            "1 wrong_reference",
+            "invalid line",
+        ]
+
+        # The version stamp, the card pool and the unknown references
+        with self.assertNumQueries(3):
+            response = self.client.post(
+                reverse("validate-decklists"),
+                {"decklists": decklists},
+                content_type="application/json",
+            )
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        results = response.json()["data"]["results"]
+        self.assertEqual(len(results), len(decklists))
+        self.assertTrue(results[0]["legality"]["standard"]["is_legal"])
+        standard = results[1]["legality"]["standard"]
+        self.assertFalse(standard["is_legal"])
+        self.assertIn(
+            {
+                "code": GameMode.ErrorCode.ERR_EXCEED_SAME_FAMILY_COUNT,
+                "message": "Exceeds the maximum card count for any given family (3)",
+            },
+            standard["errors"],
+        )
+        self.assertIn("wrong_reference", results[2]["error"])
+        self.assertNotIn("legality", results[3])
+        self.assertIn("error", results[3])
+
+        # The cards are now resolved from the catalog
+        with self.assertNumQueries(0):
+            self.client.post(
+                reverse("validate-decklists"),
+                {"decklists": decklists[:2]},
+                content_type="application/json",
+            )
+
+    def test_validate_invalid_payload(self):
+        """Attempt to validate without sending decklists."""
+        with silence_logging():
+            response = self.client.post(
+                reverse("validate-decklists"),
+                {"decklists": "not a list"},
+                content_type="application/json",
+            )
+
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+
+class UpdateCardPricesTestCase(TestCase):
+    """Test case focusing on the storage of the marketplace prices."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cards = [
+            generate_card(Card.Faction.AXIOM, Card.Type.CHARACTER) for _ in range(3)
+        ]
+
+    def get_page(self, price: float) -> list[dict]:
+        return [
+            {"@id": f"/cards/{card.reference}", "inSale": 2, "lowerPrice": price}
+            for card in self.cards
+        ] + [{"@id": "/cards/ALT_CORE_B_AX_999_C", "inSale": 1, "lowerPrice": 1}]
+
+    def test_store_prices(self):
+        """Each page is upserted with a constant amount of queries, and unknown
+        cards are skipped.
+        """
+        command = UpdateCardPricesCommand(stdout=StringIO())
+
+        with self.assertNumQueries(5):
+            self.assertEqual(command.store_prices(self.get_page(1.5)), len(self.cards))
+        # Prices of the same day are overwritten
+        self.assertEqual(command.store_prices(self.get_page(2)), len(self.cards))
+
+        self.assertEqual(CardPrice.objects.count(), len(self.cards))
+        self.assertEqual(
+            set(CardPrice.objects.values_list("price", "count")), {(200, 2)}
+        )
+        self.assertEqual(
+            set(
+                Card.objects.filter(
+                    pk__in=[card.pk for card in self.cards]
+                ).values_list("last_price")
+            ),
+            {(200,)},
+        )
+
+
+class RollupCardPricesTestCase(TestCase):
+    """Test case focusing on the price rollups and the retention of daily prices."""
+
+    HISTORY_DAYS = 150
+    RETENTION_DAYS = 60
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.card = generate_card(Card.Faction.AXIOM, Card.Type.CHARACTER)
+        cls.today = timezone.now().date()
+        cls.daily_prices = {
+            cls.today - timedelta(days=offset): 100 + offset
+            for offset in reversed(range(cls.HISTORY_DAYS))
+        }
+        for day, price in cls.daily_prices.items():
+            # The date is always set to the current day on creation
+            daily_price = CardPrice.objects.create(card=cls.card, price=price, count=2)
+            CardPrice.objects.filter(pk=daily_price.pk).update(date=day)
+
+    def get_expected_rollups(self) -> dict[tuple[str, date], tuple]:
+        prices_by_period = defaultdict(list)
+        for day, price in self.daily_prices.items():
+            week_start = day - timedelta(days=day.weekday())
+            prices_by_period[(CardPriceRollup.Period.WEEK, week_start)].append(price)
+            prices_by_period[(CardPriceRollup.Period.MONTH, day.replace(day=1))].append(
+                price
+            )
+        return {
+            key: (
+                min(prices),
+                round(sum(prices) / len(prices)),
+                max(prices),
+                len(prices) * 2,
+            )
+            for key, prices in prices_by_period.items()
+        }
+
+    def get_stored_rollups(self) -> dict[tuple[str, date], tuple]:
+        return {
+            (period, start_date): tuple(values)
+            for period, start_date, *values in (
+                CardPriceRollup.objects.filter(card=self.card).values_list(
+                    "period", "start_date", *ROLLUP_FIELDS
+                )
+            )
+        }
+
+    def rollup(self):
+        call_command(
+            "rollup_card_prices",
+            retention_days=self.RETENTION_DAYS,
+            stdout=StringIO(),
+        )
+
+    def test_rollup_and_prune(self):
+        """The daily prices are aggregated before pruning the old ones, and the
+        rollups of partially pruned periods are kept on the next runs.
+        """
+        self.rollup()
+
+        cutoff = self.today - timedelta(days=self.RETENTION_DAYS)
+        self.assertFalse(CardPrice.objects.filter(date__lt=cutoff).exists())
+        self.assertEqual(CardPrice.objects.count(), self.RETENTION_DAYS + 1)
+        self.assertEqual(self.get_stored_rollups(), self.get_expected_rollups())
+
+        self.rollup()
+
+        self.assertEqual(self.get_stored_rollups(), self.get_expected_rollups())
+
+    def test_rollup_current_period(self):
+        """The rollups of the periods being recorded are updated on every run."""
+        CardPrice.objects.filter(card=self.card, date__lt=self.today).delete()
+        self.rollup()
+        CardPrice.objects.filter(card=self.card).update(price=500)
+
+        self.rollup()
+
+        week_start = self.today - timedelta(days=self.today.weekday())
+        self.assertEqual(
+            self.get_stored_rollups()[(CardPriceRollup.Period.WEEK, week_start)],
+            (500, 500, 500, 2),
+        )
+
+    def test_minimum_retention(self):
+        """The daily prices can't be pruned before the longest period is complete."""
+        with self.assertRaises(CommandError):
+            call_command("rollup_card_prices", retention_days=7, stdout=StringIO())
+        self.assertEqual(CardPrice.objects.count(), self.HISTORY_DAYS)
+
+    def test_price_history(self):
+        """The price history is served from the rollups as one array per value."""
+        self.rollup()
+        url = reverse("card-price-history", kwargs={"reference": self.card.reference})
+
+        response = self.client.get(url, {"period": "month", "days": 365})
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        data = response.json()["data"]
+        expected = sorted(
+            (start_date, values)
+            for (period, start_date), values in self.get_expected_rollups().items()
+            if period == CardPriceRollup.Period.MONTH
+        )
+        self.assertEqual(data["period"], "month")
+        self.assertEqual(
+            data["dates"], [start_date.isoformat() for start_date, _ in expected]
+        )
+        self.assertEqual(data["min"], [values[0] for _, values in expected])
+        self.assertEqual(data["max"], [values[2] for _, values in expected])
+        self.assertEqual(data["volume"], [values[3] for _, values in expected])
+
+        response = self.client.get(url, {"period": "day"})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        response = self.client.get(
+            reverse("card-price-history", kwargs={"reference": "wrong_reference"})
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
@@ -1,8 +1,9 @@
 from datetime import datetime
 from django.contrib.auth.models import User
+from django.db import IntegrityError
 from django.test import TestCase
 
-from decks.models import Card, Deck, Set, Subtype
+from decks.models import Card, CardInDeck, Deck, Set, Subtype
 
 
 class DecksModelsTestCase(TestCase):
@@ -133,3 +134,25 @@ class DecksModelsTestCase(TestCase):
 
         self.assertFalse(character.is_oof())
         self.assertTrue(oof_character.is_oof())
+
+    def test_card_codes(self):
+        """Test that the codes derived from the reference are stored with the Card."""
+        card = Card.objects.get(reference=self.OOF_CHARACTER_REFERENCE)
+        promo_hero = Card.objects.get(reference=self.PROMO_HERO_REFERENCE)
+
+        self.assertEqual(card.card_code, "YZ_08_R2")
+        self.assertEqual(card.family_code, "YZ_08")
+        self.assertEqual(promo_hero.get_card_code(), "AX_01_C")
+        self.assertEqual(
+            Card.objects.filter(family_code="AX_01").count(),
+            2,
+        )
+
+    def test_card_in_deck_is_unique(self):
+        """Test that a Card can only be linked once to the same Deck."""
+        deck = Deck.objects.get(name=self.DECK_NAME)
+        character = Card.objects.get(reference=self.CHARACTER_REFERENCE)
+        CardInDeck.objects.create(deck=deck, card=character, quantity=1)
+
+        with self.assertRaises(IntegrityError):
+            CardInDeck.objects.create(deck=deck, card=character, quantity=2)
@@ -1,10 +1,23 @@
 from http import HTTPStatus
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from config.tests.utils import get_login_url, silence_logging
-from decks.models import Card, CardInDeck, Comment, CommentVote, Deck
-from decks.tests.utils import AjaxTestCase, BaseViewTestCase
+from decks.card_catalog import bump_catalog_version, card_catalog
+from decks.deck_utils import build_deck_snapshot, patch_deck
+from decks.game_modes import get_deck_summary
+from decks.models import (
+    Card,
+    CardInDeck,
+    Comment,
+    CommentVote,
+    Deck,
+    DeckSnapshot,
+    DeckSummary,
+)
+from decks.tests.utils import AjaxTestCase, BaseViewTestCase, generate_card
 
 
 class UpdateDeckViewTestCase(BaseViewTestCase, AjaxTestCase):
@@ -247,6 +260,190 @@ class UpdateDeckViewTestCase(BaseViewTestCase, AjaxTestCase):
         self.assertEqual(response_data["deck"], deck.id)
         self.assertEqual(deck.hero, hero)
 
+    def test_patch_deck_query_count(self):
+        """The amount of queries needed to patch a Deck should not depend on the
+        amount of changes.
+        """
+        deck = Deck.objects.get(owner=self.user, name=self.PRIVATE_DECK_NAME)
+        test_url = reverse("update-deck-id", kwargs={"pk": deck.id})
+        headers = {
+            "HTTP_X_REQUESTED_WITH": "XMLHttpRequest",
+            "content_type": "application/json",
+        }
+        cids = list(deck.cardindeck_set.select_related("card"))
+        new_cards = [
+            generate_card(Card.Faction.AXIOM, Card.Type.CHARACTER) for _ in range(3)
+        ]
+        # Build the Deck's summary and snapshot beforehand
+        get_deck_summary(deck)
+        build_deck_snapshot(deck)
+        self.client.force_login(self.user)
+
+        def patch(decklist):
+            data = {"name": "deck name", "decklist": decklist, "action": "patch"}
+            # Both patches are applied with a cold card catalog
+            card_catalog.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(test_url, **headers, data=data)
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            # The decklist is only read once, the rest is computed from the changes
+            self.assertEqual(
+                sum(
+                    query["sql"].startswith("SELECT")
+                    and '"decks_cardindeck"' in query["sql"]
+                    for query in queries.captured_queries
+                ),
+                1,
+            )
+            return len(queries)
+
+        short_count = patch(
+            {
+                cids[0].card.reference: 2,
+                new_cards[0].reference: 1,
+                cids[1].card.reference: 0,
+            }
+        )
+        long_count = patch(
+            {
+                cids[0].card.reference: 1,
+                new_cards[0].reference: 0,
+                new_cards[1].reference: 3,
+                new_cards[2].reference: 3,
+            }
+            | {cid.card.reference: 3 for cid in cids[2:]}
+        )
+
+        self.assertEqual(short_count, long_count)
+        decklist = {
+            cid.card.reference: cid.quantity for cid in deck.cardindeck_set.all()
+        }
+        self.assertEqual(decklist[cids[0].card.reference], 1)
+        self.assertNotIn(cids[1].card.reference, decklist)
+        self.assertNotIn(new_cards[0].reference, decklist)
+        self.assertEqual(decklist[new_cards[2].reference], 3)
+
+    def test_patch_deck_locks_deck(self):
+        """The Deck is locked until the patch and its legality are saved."""
+        deck = Deck.objects.get(owner=self.user, name=self.PRIVATE_DECK_NAME)
+        self.client.force_login(self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse("update-deck-id", kwargs={"pk": deck.id}),
+                HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+                content_type="application/json",
+                data={"name": "deck name", "decklist": {}, "action": "patch"},
+            )
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        statements = [query["sql"] for query in queries.captured_queries]
+        # The view's transaction is a savepoint within the test's transaction
+        begin = next(i for i, sql in enumerate(statements) if "SAVEPOINT" in sql)
+        lock = next(
+            i
+            for i, sql in enumerate(statements)
+            if sql.startswith('SELECT "decks_deck"') and sql.endswith("FOR UPDATE")
+        )
+        save = next(
+            i
+            for i, sql in enumerate(statements)
+            if sql.startswith('UPDATE "decks_deck"')
+        )
+        end = max(i for i, sql in enumerate(statements) if "RELEASE SAVEPOINT" in sql)
+        self.assertLess(begin, lock)
+        self.assertLess(lock, save)
+        self.assertLess(save, end)
+
+    def test_patch_deck_rebuilds_snapshot(self):
+        """Patching a Deck should rebuild its snapshot with the new decklist."""
+        deck = Deck.objects.get(owner=self.user, name=self.PRIVATE_DECK_NAME)
+        build_deck_snapshot(deck)
+        new_card = generate_card(Card.Faction.AXIOM, Card.Type.SPELL)
+        self.client.force_login(self.user)
+
+        response = self.client.post(
+            reverse("update-deck-id", kwargs={"pk": deck.id}),
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+            content_type="application/json",
+            data={
+                "name": "deck name",
+                "decklist": {new_card.reference: 2},
+                "action": "patch",
+            },
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        snapshot = DeckSnapshot.objects.get(deck=deck)
+        self.assertIn(f"2 {new_card.reference}", snapshot.decklist.splitlines())
+        self.assertIn([2, new_card.reference], snapshot.card_lists["spell"])
+        self.assertEqual(
+            snapshot.stats["total_count"],
+            sum(deck.cardindeck_set.values_list("quantity", flat=True)),
+        )
+
+    def test_patch_deck_after_cards_change(self):
+        """Patching a Deck after its cards have been modified should rebuild its
+        summary instead of applying the changes to the outdated counts.
+        """
+        # The version bump is rolled back with the test, so the catalog can't be kept
+        self.addCleanup(card_catalog.clear)
+        deck = Deck.objects.get(owner=self.user, name=self.PRIVATE_DECK_NAME)
+        card = generate_card(Card.Faction.AXIOM, Card.Type.SPELL, Card.Rarity.RARE)
+        patch_deck(deck, deck.name, {card.reference: 1})
+
+        # Ban the card and make it common, as the admin actions do
+        Card.objects.filter(reference=card.reference).update(
+            is_legal=False, rarity=Card.Rarity.COMMON
+        )
+        bump_catalog_version()
+        summary = patch_deck(deck, deck.name, {card.reference: 0})
+
+        expected = DeckSummary.from_decklist(
+            deck, deck.cardindeck_set.select_related("card")
+        )
+        self.assertEqual(summary.catalog_version, card_catalog.version)
+        self.assertEqual(summary.banned_count, expected.banned_count)
+        self.assertEqual(summary.rare_count, expected.rare_count)
+        self.assertEqual(summary.total_count, expected.total_count)
+
+    def test_patch_deck_updates_total_price(self):
+        """Patching a Deck should recompute the market price of its decklist."""
+        deck = Deck.objects.get(owner=self.user, name=self.PRIVATE_DECK_NAME)
+        new_card = generate_card(Card.Faction.AXIOM, Card.Type.SPELL)
+        Card.objects.filter(reference=new_card.reference).update(last_price=150)
+        Card.objects.filter(reference=deck.hero_id).update(last_price=300)
+        deck.cardindeck_set.all().delete()
+        self.client.force_login(self.user)
+
+        response = self.client.post(
+            reverse("update-deck-id", kwargs={"pk": deck.id}),
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+            content_type="application/json",
+            data={
+                "name": "deck name",
+                "decklist": {new_card.reference: 2},
+                "action": "patch",
+            },
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        deck.refresh_from_db()
+        self.assertEqual(deck.total_price, 2 * 150 + 300)
+        # The codes of the cards are updated along with the decklist
+        hero = Card.objects.get(reference=deck.hero_id)
+        self.assertEqual(
+            deck.card_codes,
+            sorted(
+                {
+                    new_card.card_code,
+                    new_card.family_code,
+                    hero.card_code,
+                    hero.family_code,
+                }
+            ),
+        )
+
 
 class DeleteDeckViewTestCase(BaseViewTestCase):
     """Test case focusing on the view that deletes a Deck."""
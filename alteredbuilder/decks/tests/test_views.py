@@ -1,19 +1,42 @@
 from http import HTTPStatus
+from io import StringIO
+from unittest import mock
 from urllib.parse import quote
 import uuid
 
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.db.models import Exists, OuterRef, Q
 from django.http import HttpResponse
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from hitcount.models import HitCount
 
 from config.tests.utils import get_login_url, silence_logging
-from decks.models import Card, CardInDeck, Deck, LovePoint, PrivateLink, Subtype
+from decks.card_catalog import bump_catalog_version
+from decks.deck_utils import get_deck_card_codes, update_decks_total_price
+from decks.models import (
+    Card,
+    CardInDeck,
+    Deck,
+    DeckSnapshot,
+    LovePoint,
+    PrivateLink,
+    Subtype,
+    Tag,
+)
+from decks.pagination import ResultCount
 from decks.tests.utils import (
     AjaxTestCase,
     BaseViewTestCase,
     generate_card,
     get_detail_card_list,
 )
+from decks.views.card_list import CardListView
+from decks.views.deck_lists import DeckListView
+from profiles.models import Follow
 
 
 class DeckListViewTestCase(BaseViewTestCase):
@@ -179,6 +202,238 @@ class DeckListViewTestCase(BaseViewTestCase):
                 query_decks, response.context["deck_list"], ordered=False
             )
 
+    def test_deck_list_prices(self):
+        """The public Decks can be sorted and filtered by their market price."""
+        cheap_deck, expensive_deck = Deck.objects.filter(is_public=True)[:2]
+        cards = [
+            generate_card(Card.Faction.MUNA, Card.Type.CHARACTER) for _ in range(2)
+        ]
+        Card.objects.filter(reference=cards[0].reference).update(last_price=100)
+        Card.objects.filter(reference=cards[1].reference).update(last_price=2000)
+        CardInDeck.objects.create(deck=cheap_deck, card=cards[0], quantity=3)
+        CardInDeck.objects.create(deck=expensive_deck, card=cards[1], quantity=2)
+
+        self.assertEqual(update_decks_total_price(Deck.objects.all()), 2)
+        # The Decks whose price didn't change aren't written again
+        self.assertEqual(update_decks_total_price(Deck.objects.all()), 0)
+
+        cheap_deck.refresh_from_db()
+        expensive_deck.refresh_from_db()
+        self.assertEqual(cheap_deck.total_price, 300)
+        self.assertEqual(expensive_deck.total_price, 4000)
+
+        url = reverse("deck-list")
+        response = self.client.get(url + "?order=expensive")
+        self.assertEqual(
+            list(response.context["deck_list"])[:2], [expensive_deck, cheap_deck]
+        )
+        response = self.client.get(url + "?order=cheapest")
+        self.assertEqual(
+            list(response.context["deck_list"])[:2], [cheap_deck, expensive_deck]
+        )
+        response = self.client.get(url + "?min_price=2.5&max_price=10")
+        self.assertQuerySetEqual(response.context["deck_list"], [cheap_deck])
+        response = self.client.get(url + "?min_price=wrong")
+        self.assertEqual(
+            len(response.context["deck_list"]),
+            Deck.objects.filter(is_public=True).count(),
+        )
+
+    def test_deck_list_pagination(self):
+        """The pages of Decks follow each other for every ordering, without repeating
+        or skipping any Deck.
+        """
+        decks = list(Deck.objects.filter(is_public=True).order_by("pk"))
+        Deck.objects.filter(pk=decks[0].pk).update(love_count=2, total_price=500)
+        Deck.objects.filter(pk=decks[1].pk).update(love_count=2, total_price=500)
+        # The ties are broken by the primary key
+        Deck.objects.filter(pk__in=[deck.pk for deck in decks[1:]]).update(
+            modified_at=decks[1].modified_at
+        )
+
+        url = reverse("deck-list")
+        for order in ["recent", "love", "views", "cheapest", "expensive"]:
+            with self.subTest(order=order):
+                response = self.client.get(url + f"?order={order}")
+                self.assertFalse(response.context["page_obj"].has_next())
+                with mock.patch.object(DeckListView, "paginate_by", 1):
+                    pages = self.get_all_pages(url + f"?order={order}", "deck_list")
+                self.assertEqual(pages, list(response.context["deck_list"]))
+                self.assertEqual(len(pages), len(decks))
+
+        with silence_logging():
+            response = self.client.get(url + "?cursor=wrong")
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_deck_list_count(self):
+        """The amount of Decks is cached for equivalent filters and estimated by the
+        planner above a threshold.
+        """
+        cache.clear()
+        url = reverse("deck-list")
+        response = self.client.get(url + "?faction=AX,MU")
+        self.assertEqual(
+            response.context["deck_count"],
+            ResultCount(len(response.context["deck_list"]), is_estimate=False),
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url + "?faction=MU,AX&order=love")
+        self.assertFalse(
+            any("COUNT(" in query["sql"] for query in queries.captured_queries)
+        )
+        self.assertEqual(
+            response.context["deck_count"].value, len(response.context["deck_list"])
+        )
+
+        # The following pages don't display the amount of decks
+        with mock.patch.object(DeckListView, "paginate_by", 1):
+            response = self.client.get(url)
+            response = self.client.get(
+                url + f"?cursor={response.context['page_obj'].next_cursor}"
+            )
+        self.assertNotIn("deck_count", response.context)
+
+        with self.settings(RESULT_COUNT_ESTIMATE_THRESHOLD=0):
+            response = self.client.get(url + "?faction=BR")
+        self.assertTrue(response.context["deck_count"].is_estimate)
+
+    def test_deck_list_viewer_context(self):
+        """The Decks loved by the requester and the users they follow are loaded once
+        per request, instead of being queried for each Deck.
+        """
+        deck = Deck.objects.filter(owner=self.other_user, is_public=True).first()
+        Follow.objects.create(follower=self.user, followed=self.other_user)
+        self.client.force_login(self.user)
+
+        url = reverse("deck-list")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        deck_queries = [
+            query["sql"]
+            for query in queries.captured_queries
+            if '"decks_deck"' in query["sql"]
+        ]
+        self.assertTrue(all("EXISTS" not in sql for sql in deck_queries))
+        self.assertEqual(
+            sum(
+                '"decks_lovepoint"' in query["sql"]
+                for query in queries.captured_queries
+            ),
+            1,
+        )
+        viewer = response.context["viewer"]
+        self.assertEqual(viewer.loved_deck_ids, set())
+        self.assertEqual(viewer.followed_user_ids, {self.other_user.pk})
+        self.assertContains(response, "fa-solid fa-star")
+
+        # The relationships aren't kept between requests
+        self.client.get(reverse("love-deck-id", kwargs={"pk": deck.pk}))
+        response = self.client.get(url)
+        self.assertEqual(response.context["viewer"].loved_deck_ids, {deck.pk})
+
+    def test_deck_list_views_order(self):
+        """The Decks are sorted by the view count copied from the hits, which is
+        displayed without querying the hits.
+        """
+        decks = list(Deck.objects.filter(is_public=True))
+        content_type = ContentType.objects.get_for_model(Deck)
+        for hits, deck in enumerate(decks[:2], start=1):
+            HitCount.objects.create(
+                content_type=content_type, object_pk=deck.pk, hits=hits
+            )
+
+        call_command("update_deck_view_counts", batch_size=1, stdout=StringIO())
+
+        for hits, deck in enumerate(decks[:2], start=1):
+            deck.refresh_from_db()
+            self.assertEqual(deck.view_count, hits)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("deck-list") + "?order=views")
+        self.assertEqual(list(response.context["deck_list"])[:2], decks[1::-1])
+        self.assertFalse(
+            any("hitcount" in query["sql"] for query in queries.captured_queries)
+        )
+
+    def test_deck_list_card_code_filters(self):
+        """Test the view of all the public Decks after filtering the query by the codes
+        of the cards they play.
+        """
+        for deck in Deck.objects.all():
+            deck.card_codes = get_deck_card_codes(deck)
+            deck.save()
+        card = CardInDeck.objects.filter(deck__is_public=True).first().card
+        public_decks = Deck.objects.filter(is_public=True)
+        playing_card = Q(cards__card_code=card.card_code)
+        playing_family = Q(cards__family_code=card.family_code)
+        missing_code = f"{card.faction}_99_C"
+
+        url = reverse("deck-list")
+        for query, expected_filter in [
+            (f"has:{card.card_code}", playing_card),
+            (f"has:{card.card_code} -has:{card.card_code}", Q(pk__in=[])),
+            (f"-has:{card.card_code}", ~Q(pk__in=public_decks.filter(playing_card))),
+            (f"family:{card.reference.lower()}", playing_family),
+            (f"has:{missing_code}|{card.card_code}", playing_card),
+            (f"has:{missing_code}", Q(pk__in=[])),
+        ]:
+            with self.subTest(query=query):
+                response = self.client.get(url + f"?query={quote(query)}")
+                self.assertQuerySetEqual(
+                    public_decks.filter(expected_filter).distinct(),
+                    response.context["deck_list"],
+                    ordered=False,
+                )
+
+    def test_deck_list_text_search(self):
+        """Test the view of all the public Decks after searching the texts of the
+        Decks, which are ranked by where the query appears.
+        """
+        hero = Card.objects.filter(type=Card.Type.HERO).first()
+        hero.name_fr = "Héroïne de test"
+        hero.save()
+        tag = Tag.objects.create(name="Aggro", type=Tag.Type.TYPE)
+        named_deck = Deck.objects.create(
+            owner=self.user, name="Midrange control", hero=hero, is_public=True
+        )
+        described_deck = Deck.objects.create(
+            owner=self.user,
+            name="Another deck",
+            description="A **midrange** list focused on *control*",
+            is_public=True,
+        )
+        described_deck.tags.add(tag)
+        Deck.objects.create(
+            owner=self.user, name="Midrange", description="Control", is_public=False
+        )
+
+        url = reverse("deck-list")
+        for query, expected_decks in [
+            ("midrange control", [named_deck, described_deck]),
+            ("contr midr", [named_deck, described_deck]),
+            ("aggro", [described_deck]),
+            ("héroïne", [named_deck]),
+            ("midrange missing", []),
+        ]:
+            with self.subTest(query=query):
+                response = self.client.get(url + f"?query={quote(query)}")
+                self.assertQuerySetEqual(response.context["deck_list"], expected_decks)
+
+        # The search document follows the changes of the Deck and its tags
+        described_deck.tags.remove(tag)
+        named_deck.name = "Aggro"
+        named_deck.save()
+        response = self.client.get(url + "?query=aggro")
+        self.assertQuerySetEqual(response.context["deck_list"], [named_deck])
+        # The listed Decks don't load the fields only used to filter them
+        deferred_fields = response.context["deck_list"][0].get_deferred_fields()
+        self.assertIn("search_vector", deferred_fields)
+        self.assertIn("card_codes", deferred_fields)
+
+        # An explicit order takes precedence over the relevance
+        response = self.client.get(url + "?query=midrange&order=recent")
+        self.assertQuerySetEqual(response.context["deck_list"], [described_deck])
+
     def test_deck_list_u_advanced_filters(self):
         """Test the view of all the public Decks after filtering the query by user."""
         # Search all the decks with the given name
@@ -227,17 +482,18 @@ class DeckDetailViewTestCase(BaseViewTestCase):
         self.assertIn("character_list", response.context)
         self.assertIn("spell_list", response.context)
         self.assertIn("permanent_list", response.context)
-        self.assertListEqual(
-            get_detail_card_list(deck, Card.Type.CHARACTER),
-            response.context["character_list"],
-        )
-        self.assertListEqual(
-            get_detail_card_list(deck, Card.Type.SPELL), response.context["spell_list"]
-        )
-        self.assertListEqual(
-            get_detail_card_list(deck, Card.Type.LANDMARK_PERMANENT),
-            response.context["permanent_list"],
-        )
+        for card_type, card_list in [
+            (Card.Type.CHARACTER, "character_list"),
+            (Card.Type.SPELL, "spell_list"),
+            (Card.Type.LANDMARK_PERMANENT, "permanent_list"),
+        ]:
+            self.assertListEqual(
+                get_detail_card_list(deck, card_type),
+                [
+                    (quantity, card.reference, price)
+                    for quantity, card, price in response.context[card_list]
+                ],
+            )
         self.assertIn("stats", response.context)
         self.assertIn("type_distribution", response.context["stats"])
         self.assertIn("total_count", response.context["stats"])
@@ -297,6 +553,54 @@ class DeckDetailViewTestCase(BaseViewTestCase):
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertTemplateUsed(response, "errors/404.html")
 
+    def test_deck_detail_prices(self):
+        """The cards of the Deck are displayed with their latest price."""
+        public_deck = Deck.objects.filter(is_public=True, owner=self.other_user).get()
+        cid = public_deck.cardindeck_set.first()
+        Card.objects.filter(reference=cid.card_id).update(last_price=150)
+        Card.objects.filter(reference=public_deck.hero_id).update(last_price=300)
+
+        response = self.client.get(public_deck.get_absolute_url())
+
+        card_lists = [
+            response.context["character_list"],
+            response.context["spell_list"],
+            response.context["permanent_list"],
+        ]
+        prices = {
+            card.reference: price
+            for card_list in card_lists
+            for _, card, price in card_list
+        }
+        self.assertEqual(prices[cid.card_id], 150)
+        self.assertEqual(response.context["display_price"], 300)
+
+    def test_deck_detail_snapshot(self):
+        """The detail of a Deck is stored on its first view and reused afterwards,
+        until the card catalog changes.
+        """
+        public_deck = Deck.objects.filter(is_public=True, owner=self.other_user).get()
+        self.assertFalse(DeckSnapshot.objects.filter(deck=public_deck).exists())
+
+        self.client.get(public_deck.get_absolute_url())
+        snapshot = DeckSnapshot.objects.get(deck=public_deck)
+        decklist = [f"1 {public_deck.hero_id}"] + [
+            f"{cid.quantity} {cid.card_id}"
+            for cid in public_deck.cardindeck_set.order_by("card_id")
+        ]
+        self.assertEqual(snapshot.decklist, "\n".join(decklist))
+
+        self.client.get(public_deck.get_absolute_url())
+        self.assertEqual(
+            DeckSnapshot.objects.get(deck=public_deck).updated_at, snapshot.updated_at
+        )
+
+        bump_catalog_version()
+        self.client.get(public_deck.get_absolute_url())
+        self.assertGreater(
+            DeckSnapshot.objects.get(deck=public_deck).updated_at, snapshot.updated_at
+        )
+
 
 class OwnDeckListViewTestCase(BaseViewTestCase):
     """Test case focusing on the Deck ListView of a user's own decks."""
@@ -319,6 +623,14 @@ class OwnDeckListViewTestCase(BaseViewTestCase):
             own_decks, response.context["deck_list"], ordered=False
         )
 
+        # The amount of decks is up to date right after creating a new one
+        Deck.objects.create(owner=self.user, name="New deck")
+        response = self.client.get(reverse("own-deck"))
+        self.assertEqual(
+            response.context["deck_count"],
+            ResultCount(Deck.objects.filter(owner=self.user).count(), False),
+        )
+
 
 class CardListViewTestCase(BaseViewTestCase):
     """Test case focusing on the Card ListView."""
@@ -537,7 +849,7 @@ class CardListViewTestCase(BaseViewTestCase):
         with self.subTest(filter=filter):
             response = self.client.get(url + filter)
             query_cards = Card.objects.exclude(type=Card.Type.HERO).order_by(
-                "stats__recall_cost", "reference"
+                "recall_cost", "reference"
             )
             self.assertQuerySetEqual(query_cards, response.context["card_list"])
 
@@ -546,7 +858,7 @@ class CardListViewTestCase(BaseViewTestCase):
         with self.subTest(filter=filter):
             response = self.client.get(url + filter)
             query_cards = Card.objects.exclude(type=Card.Type.HERO).order_by(
-                "-stats__main_cost", "-reference"
+                "-main_cost", "-reference"
             )
             self.assertQuerySetEqual(query_cards, response.context["card_list"])
 
@@ -572,7 +884,7 @@ class CardListViewTestCase(BaseViewTestCase):
         filter = f"?query={quote('hc=')}{value}"
         with self.subTest(filter=filter):
             response = self.client.get(url + filter)
-            query_cards = Card.objects.filter(stats__main_cost=value)
+            query_cards = Card.objects.filter(main_cost=value)
             self.assertQuerySetEqual(
                 query_cards, response.context["card_list"], ordered=False
             )
@@ -582,7 +894,7 @@ class CardListViewTestCase(BaseViewTestCase):
         filter = f"?query={quote('hc>')}{value}"
         with self.subTest(filter=filter):
             response = self.client.get(url + filter)
-            query_cards = Card.objects.filter(stats__main_cost__gt=value)
+            query_cards = Card.objects.filter(main_cost__gt=value)
             self.assertQuerySetEqual(
                 query_cards, response.context["card_list"], ordered=False
             )
@@ -592,7 +904,7 @@ class CardListViewTestCase(BaseViewTestCase):
         filter = f"?query={quote('hc>=')}{value}"
         with self.subTest(filter=filter):
             response = self.client.get(url + filter)
-            query_cards = Card.objects.filter(stats__main_cost__gte=value)
+            query_cards = Card.objects.filter(main_cost__gte=value)
             self.assertQuerySetEqual(
                 query_cards, response.context["card_list"], ordered=False
             )
@@ -602,7 +914,7 @@ class CardListViewTestCase(BaseViewTestCase):
         filter = f"?query={quote('hc<')}{value}"
         with self.subTest(filter=filter):
             response = self.client.get(url + filter)
-            query_cards = Card.objects.filter(stats__main_cost__lt=value)
+            query_cards = Card.objects.filter(main_cost__lt=value)
             self.assertQuerySetEqual(
                 query_cards, response.context["card_list"], ordered=False
             )
@@ -612,7 +924,7 @@ class CardListViewTestCase(BaseViewTestCase):
         filter = f"?query={quote('hc<=')}{value}"
         with self.subTest(filter=filter):
             response = self.client.get(url + filter)
-            query_cards = Card.objects.filter(stats__main_cost__lte=value)
+            query_cards = Card.objects.filter(main_cost__lte=value)
             self.assertQuerySetEqual(
                 query_cards, response.context["card_list"], ordered=False
             )
@@ -627,7 +939,7 @@ class CardListViewTestCase(BaseViewTestCase):
         filter = f"?query={quote('rc=')}{value}"
         with self.subTest(filter=filter):
             response = self.client.get(url + filter)
-            query_cards = Card.objects.filter(stats__recall_cost=value)
+            query_cards = Card.objects.filter(recall_cost=value)
             self.assertQuerySetEqual(
                 query_cards, response.context["card_list"], ordered=False
             )
@@ -637,7 +949,7 @@ class CardListViewTestCase(BaseViewTestCase):
         filter = f"?query={quote('rc>')}{value}"
         with self.subTest(filter=filter):
             response = self.client.get(url + filter)
-            query_cards = Card.objects.filter(stats__recall_cost__gt=value)
+            query_cards = Card.objects.filter(recall_cost__gt=value)
             self.assertQuerySetEqual(
                 query_cards, response.context["card_list"], ordered=False
             )
@@ -647,7 +959,7 @@ class CardListViewTestCase(BaseViewTestCase):
         filter = f"?query={quote('rc>=')}{value}"
         with self.subTest(filter=filter):
             response = self.client.get(url + filter)
-            query_cards = Card.objects.filter(stats__recall_cost__gte=value)
+            query_cards = Card.objects.filter(recall_cost__gte=value)
             self.assertQuerySetEqual(
                 query_cards, response.context["card_list"], ordered=False
             )
@@ -657,7 +969,7 @@ class CardListViewTestCase(BaseViewTestCase):
         filter = f"?query={quote('rc<')}{value}"
         with self.subTest(filter=filter):
             response = self.client.get(url + filter)
-            query_cards = Card.objects.filter(stats__recall_cost__lt=value)
+            query_cards = Card.objects.filter(recall_cost__lt=value)
             self.assertQuerySetEqual(
                 query_cards, response.context["card_list"], ordered=False
             )
@@ -667,11 +979,37 @@ class CardListViewTestCase(BaseViewTestCase):
         filter = f"?query={quote('rc<=')}{value}"
         with self.subTest(filter=filter):
             response = self.client.get(url + filter)
-            query_cards = Card.objects.filter(stats__recall_cost__lte=value)
+            query_cards = Card.objects.filter(recall_cost__lte=value)
             self.assertQuerySetEqual(
                 query_cards, response.context["card_list"], ordered=False
             )
 
+    def test_card_list_power_advanced_filters(self):
+        """Test the view of all the Cards after applying filters on the query to find
+        the Characters by their power in each region.
+        """
+        url = reverse("cards")
+
+        for stat, field in [
+            ("fp", "forest_power"),
+            ("mp", "mountain_power"),
+            ("op", "ocean_power"),
+        ]:
+            filter = f"?query={quote(f'{stat}>=')}5"
+            with self.subTest(filter=filter):
+                response = self.client.get(url + filter)
+                query_cards = Card.objects.filter(**{f"{field}__gte": 5})
+                self.assertQuerySetEqual(
+                    query_cards, response.context["card_list"], ordered=False
+                )
+
+        # Multiple filters are combined, and they aren't parsed within other words
+        filter = f"?query={quote('fp<3 op=2 troop:2')}"
+        with self.subTest(filter=filter):
+            response = self.client.get(url + filter)
+            self.assertEqual(len(response.context["query_tags"]), 3)
+            self.assertEqual(response.context["query_tags"][-1][2], "troop:2")
+
     def test_card_list_x_advanced_filters(self):
         """Test the view of all the Cards after applying a filter on the query to find
         the Cards with a specific word in its effects.
@@ -693,6 +1031,44 @@ class CardListViewTestCase(BaseViewTestCase):
             query_cards, response.context["card_list"], ordered=False
         )
 
+    def test_card_list_search_relevance(self):
+        """Test the view of all the Cards after searching by name, where the words can
+        be incomplete and the results are sorted by relevance.
+        """
+        card = generate_card(Card.Faction.LYRA, Card.Type.CHARACTER)
+        card.name = "Kojo"
+        card.save()
+        better_card = generate_card(Card.Faction.LYRA, Card.Type.CHARACTER)
+        better_card.name = "Sierra & Kojo, Kojo's Friend"
+        better_card.save()
+
+        response = self.client.get(reverse("cards") + "?query=kojo")
+        self.assertEqual(list(response.context["card_list"]), [better_card, card])
+
+        response = self.client.get(reverse("cards") + f"?query={quote('sier koj')}")
+        self.assertEqual(list(response.context["card_list"]), [better_card])
+
+        # The explicit order takes precedence over the relevance
+        response = self.client.get(reverse("cards") + "?query=kojo&order=name")
+        self.assertEqual(list(response.context["card_list"]), [card, better_card])
+
+    def test_card_list_pagination(self):
+        """The pages of Cards follow each other for every ordering, without repeating
+        or skipping any Card.
+        """
+        for name in ["Kojo", "Kojo's Friend", "Sierra & Kojo"]:
+            card = generate_card(Card.Faction.LYRA, Card.Type.CHARACTER)
+            card.name = name
+            card.save()
+
+        url = reverse("cards")
+        for params in ["order=name", "order=-rarity", "order=mana", "query=kojo"]:
+            with self.subTest(params=params):
+                response = self.client.get(url + f"?{params}")
+                with mock.patch.object(CardListView, "paginate_by", 1):
+                    pages = self.get_all_pages(url + f"?{params}", "card_list")
+                self.assertEqual(pages, list(response.context["card_list"]))
+
     def test_card_list_st_advanced_filters(self):
         """Test the view of all the Cards after applying a filter on the query to find
         the Cards with a subtype with a specific word in its name.
@@ -1,11 +1,17 @@
 from collections.abc import Generator
 from datetime import datetime
 from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
 from random import randint
+from threading import Thread
+import time
 
 from django.contrib.auth.models import User
+from django.db import connection
 from django.http import HttpResponse
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from config.tests.utils import silence_logging
 from decks.models import Card, CardInDeck, Comment, Deck, Set
@@ -123,18 +129,20 @@ def create_cid(
         )
 
 
-def get_detail_card_list(deck: Deck, card_type: Card.Type) -> list[int, Card]:
-    """Return the quantity and model of cards of the Deck filtered by their type.
+def get_detail_card_list(
+    deck: Deck, card_type: Card.Type
+) -> list[tuple[int, str, int | None]]:
+    """Return the quantity and reference of cards of the Deck filtered by their type.
 
     Args:
         deck (Deck): The deck containing the cards.
         card_type (Card.Type): The type of card to filter.
 
     Returns:
-        list[int, Card]: The list of cards with their amount.
+        list[tuple[int, str, int | None]]: The list of cards with their amount.
     """
     return [
-        (c.quantity, c.card, None)
+        (c.quantity, c.card.reference, None)
         for c in deck.cardindeck_set.all()
         if c.card.type == card_type
     ]
@@ -258,6 +266,31 @@ class BaseViewTestCase(TestCase):
             CardInDeck.objects.create(deck=public_deck, card=card, quantity=2)
             CardInDeck.objects.create(deck=private_deck, card=card, quantity=2)
 
+    def get_all_pages(self, url: str, context_name: str) -> list:
+        """Request every page of a list view by following the cursors, checking that
+        the results are never counted.
+
+        Args:
+            url (str): URL of the first page.
+            context_name (str): Name of the list in the view's context.
+
+        Returns:
+            list: The results of every page.
+        """
+        results = []
+        page_url = url
+        while page_url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(page_url)
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            self.assertFalse(
+                any("COUNT(" in query["sql"] for query in queries.captured_queries)
+            )
+            results += response.context[context_name]
+            page = response.context["page_obj"]
+            page_url = f"{url}&cursor={page.next_cursor}" if page.has_next() else None
+        return results
+
 
 class BaseFormTestCase(TestCase):
     """Test case focusing on the Forms."""
@@ -303,3 +336,78 @@ class BaseFormTestCase(TestCase):
         )
         Deck.objects.create(owner=cls.user, name=cls.DECK_NAME)
         Deck.objects.create(owner=cls.other_user, name=cls.DECK_NAME, is_public=True)
+
+
+class StubAlteredAPI:
+    """Local HTTP server imitating the card endpoint of the official API. It serves the
+    registered cards in any language and can be configured to delay or fail the
+    responses of specific locales.
+
+    It's meant to be used as a context manager, and its `url` should replace the
+    `ALTERED_API_BASE_URL` setting.
+    """
+
+    def __init__(self, delay: float = 0):
+        self.cards = {}
+        self.delay = delay
+        self.failing_locales = set()
+        self.requests = []
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                locale = self.headers.get("Accept-Language")
+                stub.requests.append((self.path, locale))
+                time.sleep(stub.delay)
+
+                reference = self.path.strip("/").split("/")[-1]
+                if locale in stub.failing_locales:
+                    self.send_response(HTTPStatus.INTERNAL_SERVER_ERROR)
+                    self.end_headers()
+                    return
+                if reference not in stub.cards:
+                    self.send_response(HTTPStatus.NOT_FOUND)
+                    self.end_headers()
+                    return
+
+                body = json.dumps(stub.cards[reference](locale)).encode()
+                self.send_response(HTTPStatus.OK)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def add_unique_card(self, reference: str, faction: Card.Faction) -> None:
+        """Register a unique character whose effect is written in the requested locale.
+
+        Args:
+            reference (str): Reference of the unique card.
+            faction (Card.Faction): Faction of the unique card.
+        """
+        self.cards[reference] = lambda locale: {
+            "mainFaction": {"reference": faction.value},
+            "imagePath": f"https://example.com/{locale}/{reference}.jpg",
+            "elements": {
+                "MAIN_COST": "1",
+                "RECALL_COST": "2",
+                "FOREST_POWER": "3",
+                "MOUNTAIN_POWER": "4",
+                "OCEAN_POWER": "5",
+                "MAIN_EFFECT": f"effect {locale}",
+            },
+        }
+
+    def __enter__(self) -> "StubAlteredAPI":
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.server.shutdown()
+        self.server.server_close()
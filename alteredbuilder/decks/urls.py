@@ -21,6 +21,11 @@ urlpatterns = [
         name="private-url-deck-detail",
     ),
     path("cards/", card_list_views.CardListView.as_view(), name="cards"),
+    path(
+        "cards/<str:reference>/prices/",
+        card_list_views.card_price_history,
+        name="card-price-history",
+    ),
     path(
         "collection/",
         collection_views.display_collection,
@@ -70,6 +75,16 @@ urlpatterns = [
         import_views.import_multiple_cards,
         name="import-multiple-cards",
     ),
+    path(
+        "import-multiple-cards/<int:pk>/",
+        import_views.import_multiple_cards_status,
+        name="import-multiple-cards-status",
+    ),
+    path(
+        "validate-decklists/",
+        import_views.validate_decklist,
+        name="validate-decklists",
+    ),
     path(
         "<int:deck_id>/embed/",
         embeds_views.deck_embed_view,
@@ -1,15 +1,28 @@
+from datetime import timedelta
+from http import HTTPStatus
 from typing import Any
 
-from django.db.models import F, Q
+from django.db.models import Q
 from django.db.models.query import QuerySet
+from django.http import HttpRequest, HttpResponse
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
+from django.views.decorators.http import require_GET
 from django.views.generic.list import ListView
 
+from api.utils import ApiJsonResponse
+from decks.card_catalog import card_catalog
 from decks.deck_utils import parse_card_query_syntax
-from decks.models import Card, CardInDeck, Deck, Set
+from decks.models import Card, CardInDeck, CardPriceRollup, Deck, Set
+from decks.pagination import KeysetPaginationMixin
 
 
-class CardListView(ListView):
+# Amount of days of price history returned by default
+DEFAULT_PRICE_HISTORY_DAYS = 365
+MAX_PRICE_HISTORY_DAYS = 5 * 365
+
+
+class CardListView(KeysetPaginationMixin, ListView):
     """View to list and filter all the Cards."""
 
     model = Card
@@ -128,22 +141,20 @@ class CardListView(ListView):
                 query_order = [order_param]
 
             elif clean_order_param in ["mana", "reserve"]:
-                # Due to the unique 1-to-1 relationship of the Card types, it is needed
-                # to use Coalesce to try and order by different fields
                 if clean_order_param == "mana":
-                    fields = "stats__main_cost"
+                    field = "main_cost"
                 else:
-                    fields = "stats__recall_cost"
-
-                mana_order = F(fields)
-                if desc:
-                    mana_order = mana_order.desc()
-                query_order = [mana_order]
+                    field = "recall_cost"
+                query_order = [f"-{field}" if desc else field]
 
+                # Heroes don't have a mana cost
                 qs = qs.exclude(type=Card.Type.HERO)
             # If the order is inversed, the "reference" used as the second clause of
             # ordering also needs to be reversed
             query_order += ["-reference" if desc else "reference"]
+        elif "relevance" in qs.query.annotations:
+            # Cards searched by name are sorted by how well they match the query
+            query_order = ["-relevance", "reference"]
         else:
             query_order = ["reference"]
 
@@ -233,3 +244,55 @@ class CardListView(ListView):
         ]
 
         return context
+
+
+@require_GET
+def card_price_history(request: HttpRequest, reference: str) -> HttpResponse:
+    """Return the price history of a card from its weekly or monthly rollups. Each
+    value is returned as an array with one element per period, to keep the payload
+    compact.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        reference (str): The card's reference.
+
+    Returns:
+        HttpResponse: The response object.
+    """
+    if card_catalog.get(reference) is None:
+        return ApiJsonResponse(_("Card not found"), HTTPStatus.NOT_FOUND)
+
+    periods = {period.label: period for period in CardPriceRollup.Period}
+    period = periods.get(request.GET.get("period", CardPriceRollup.Period.WEEK.label))
+    try:
+        days = int(request.GET.get("days", DEFAULT_PRICE_HISTORY_DAYS))
+    except ValueError:
+        days = None
+    if period is None or days is None or not 0 < days <= MAX_PRICE_HISTORY_DAYS:
+        return ApiJsonResponse(_("Invalid parameters"), HTTPStatus.BAD_REQUEST)
+
+    rollups = (
+        CardPriceRollup.objects.filter(
+            card__reference=reference,
+            period=period,
+            start_date__gte=timezone.now().date() - timedelta(days=days),
+        )
+        .order_by("start_date")
+        .values_list("start_date", "min_price", "avg_price", "max_price", "volume")
+    )
+    dates, min_prices, avg_prices, max_prices, volumes = (
+        zip(*rollups) if rollups else ([], [], [], [], [])
+    )
+
+    return ApiJsonResponse(
+        {
+            "reference": reference,
+            "period": period.label,
+            "dates": [start_date.isoformat() for start_date in dates],
+            "min": list(min_prices),
+            "avg": list(avg_prices),
+            "max": list(max_prices),
+            "volume": list(volumes),
+        },
+        HTTPStatus.OK,
+    )
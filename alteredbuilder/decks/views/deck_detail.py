@@ -7,19 +7,20 @@ from django.db.models import Count, Exists, OuterRef, Q
 from django.db.models.manager import Manager
 from django.http import Http404, HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import redirect
-from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from hitcount.views import HitCountDetailView
+from django.views.generic import DetailView
 
 from api.utils import ajax_request
 from decks.deck_utils import get_deck_details
-from decks.models import Comment, CommentVote, Deck, LovePoint, PrivateLink
+from decks.hit_buffer import hit_buffer
+from decks.models import Comment, CommentVote, Deck, PrivateLink
 from decks.forms import CommentForm, DeckMetadataForm, DeckTagsForm
-from profiles.models import Follow
 
 
-class DeckDetailView(HitCountDetailView):
-    """DetailView to display the detail of a Deck model."""
+class DeckDetailView(DetailView):
+    """DetailView to display the detail of a Deck model. The visit is counted as a hit
+    of the Deck, which is written in batches by the hit buffer.
+    """
 
     model = Deck
     count_hit = True
@@ -35,18 +36,6 @@ class DeckDetailView(HitCountDetailView):
         filter = Q(is_public=True)
         if self.request.user.is_authenticated:
             filter |= Q(owner=self.request.user)
-            qs = qs.annotate(
-                is_loved=Exists(
-                    LovePoint.objects.filter(
-                        deck=OuterRef("pk"), user=self.request.user
-                    )
-                ),
-                is_followed=Exists(
-                    Follow.objects.filter(
-                        followed=OuterRef("owner"), follower=self.request.user
-                    )
-                ),
-            )
         # I don't fancy making these queries here. Maybe I could store that information
         # on the UserProfile model
         qs = qs.annotate(
@@ -55,7 +44,9 @@ class DeckDetailView(HitCountDetailView):
         )
         return (
             qs.filter(filter)
-            .select_related("hero", "owner", "owner__profile", "copies_from")
+            .select_related(
+                "hero", "owner", "owner__profile", "copies_from", "snapshot"
+            )
             .prefetch_related("tags")
         )
 
@@ -80,6 +71,8 @@ class DeckDetailView(HitCountDetailView):
             initial={"tags": list(self.object.tags.values_list("pk", flat=True))}
         )
         context["comment_form"] = CommentForm()
+        if self.count_hit:
+            hit_buffer.add_hit(self.request, self.object.pk)
         comments_qs = Comment.objects.filter(deck=self.object).select_related(
             "user", "user__profile"
         )
@@ -137,11 +130,10 @@ class PrivateLinkDeckDetailView(LoginRequiredMixin, DeckDetailView):
         deck_id = self.kwargs["pk"]
         try:
             link = PrivateLink.objects.get(code=code, deck__id=deck_id)
-            link.last_accessed_at = timezone.now()
-            link.save(update_fields=["last_accessed_at"])
+            hit_buffer.add_access(link.code)
             return (
                 Deck.objects.filter(id=deck_id)
-                .select_related("hero", "owner", "owner__profile")
+                .select_related("hero", "owner", "owner__profile", "snapshot")
                 .annotate(
                     follower_count=Count("owner__followers", distinct=True),
                     following_count=Count("owner__following", distinct=True),
@@ -1,7 +1,9 @@
+import hashlib
+import json
 from typing import Any
 
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Exists, F, OuterRef
+from django.db.models import F
 from django.db.models.query import QuerySet
 from django.views.generic.list import ListView
 
@@ -9,16 +11,22 @@ from decks.deck_utils import (
     filter_by_faction,
     filter_by_legality,
     filter_by_other,
+    filter_by_price,
     filter_by_tags,
     filter_by_query,
 )
-from decks.models import Deck, LovePoint, Tag
-from profiles.models import Follow
+from decks.models import Deck, Tag
+from decks.pagination import CURSOR_PARAM, KeysetPaginationMixin, get_result_count
 
 
-class DeckListView(ListView):
-    """ListView to display the public decks.
-    If the user is authenticated, their decks are added to the context.
+# Filters holding comma-separated values, whose order doesn't change the results
+LIST_FILTER_PARAMS = ["faction", "legality", "tag", "other"]
+VALUE_FILTER_PARAMS = ["query", "min_price", "max_price"]
+
+
+class DeckListView(KeysetPaginationMixin, ListView):
+    """ListView to display the public decks. The decks loved by the requester and the
+    users they follow are read from the `viewer` in the template.
     """
 
     model = Deck
@@ -28,6 +36,8 @@ class DeckListView(ListView):
         .prefetch_related("tags")
     )
     paginate_by = 32
+    # Whether the decks are restricted to the user's, which are counted without caching
+    count_per_user = False
 
     def get_queryset(self) -> QuerySet[Deck]:
         """Return a queryset with the Decks that match the filters in the GET params.
@@ -37,7 +47,7 @@ class DeckListView(ListView):
         """
         qs = super().get_queryset()
 
-        # Retrieve the query and search by deck name, hero name or owner
+        # Retrieve the query and search by the deck's texts, hero, owner or cards
         query = self.request.GET.get("query")
         qs, self.query_tags = filter_by_query(qs, query)
 
@@ -57,28 +67,24 @@ class DeckListView(ListView):
         other_filters = self.request.GET.get("other")
         qs = filter_by_other(qs, other_filters, self.request.user)
 
-        if self.request.user.is_authenticated:
-            qs = qs.annotate(
-                is_loved=Exists(
-                    LovePoint.objects.filter(
-                        deck=OuterRef("pk"), user=self.request.user
-                    )
-                ),
-                is_followed=Exists(
-                    Follow.objects.filter(
-                        followed=OuterRef("owner"), follower=self.request.user
-                    )
-                ),
-            )
+        # Extract the price range filter
+        min_price = self.request.GET.get("min_price")
+        max_price = self.request.GET.get("max_price")
+        qs = filter_by_price(qs, min_price, max_price)
 
         order = self.request.GET.get("order")
         match (order):
             case "love":
                 qs = qs.order_by("-love_count", "-modified_at")
             case "views":
-                qs = qs.order_by(
-                    F("hit_count_generic__hits").desc(nulls_last=True), "-modified_at"
-                )
+                qs = qs.order_by("-view_count", "-modified_at")
+            case "cheapest":
+                qs = qs.order_by(F("total_price").asc(nulls_last=True), "-modified_at")
+            case "expensive":
+                qs = qs.order_by(F("total_price").desc(nulls_last=True), "-modified_at")
+            case None if "relevance" in qs.query.annotations:
+                # Decks searched by text are sorted by how well they match the query
+                qs = qs.order_by("-relevance", "-modified_at")
             case _:
                 qs = qs.order_by("-modified_at")
 
@@ -89,7 +95,9 @@ class DeckListView(ListView):
             "cards",
             "standard_legality_errors",
             "draft_legality_errors",
-        ).prefetch_related("hit_count_generic")
+            "search_vector",
+            "card_codes",
+        )
 
     def get_context_data(self, **kwargs) -> dict[str, Any]:
         """If the user is authenticated, add their loved decks to the context.
@@ -112,16 +120,52 @@ class DeckListView(ListView):
         if "order" in self.request.GET:
             context["order"] = self.request.GET["order"]
 
+        context["min_price"] = self.request.GET.get("min_price", "")
+        context["max_price"] = self.request.GET.get("max_price", "")
+
         if "query" in self.request.GET:
             context["query"] = self.request.GET.get("query")
             context["query_tags"] = self.query_tags
+        context["is_ranked"] = "relevance" in self.object_list.query.annotations
 
         context["tags"] = Tag.objects.order_by("-type", "pk").values_list(
             "name", flat=True
         )
 
+        # The following pages are appended by the infinite scroll, so only the first
+        # one displays the amount of decks
+        if CURSOR_PARAM not in self.request.GET:
+            context["deck_count"] = get_result_count(
+                self.object_list, self.get_count_cache_key()
+            )
+
         return context
 
+    def get_count_cache_key(self) -> str | None:
+        """Build the key to cache the amount of decks matching the filters in the GET
+        params. Equivalent filters (e.g. `faction=AX,BR` and `faction=BR,AX`) share the
+        same key. The decks of a single user aren't cached, as they change with the
+        user's own actions.
+
+        Returns:
+            str | None: The cache key, or None if the amount shouldn't be cached.
+        """
+        filters = {}
+        for param in LIST_FILTER_PARAMS:
+            if values := self.request.GET.get(param):
+                filters[param] = sorted(set(values.split(",")))
+        for param in VALUE_FILTER_PARAMS:
+            if value := self.request.GET.get(param, "").strip():
+                filters[param] = value
+
+        if self.count_per_user or "loved" in filters.get("other", []):
+            return None
+
+        digest = hashlib.sha256(
+            json.dumps(filters, sort_keys=True).encode()
+        ).hexdigest()
+        return f"{self.__class__.__name__}:count:{digest}"
+
 
 class OwnDeckListView(LoginRequiredMixin, DeckListView):
     """ListView to display the own decks."""
@@ -129,6 +173,7 @@ class OwnDeckListView(LoginRequiredMixin, DeckListView):
     model = Deck
     queryset = Deck.objects.select_related("owner", "hero").prefetch_related("tags")
     paginate_by = 24
+    count_per_user = True
     template_name = "decks/own_deck_list.html"
 
     def get_queryset(self) -> QuerySet[Deck]:
@@ -68,35 +68,44 @@ def update_deck(request: HttpRequest, pk: int) -> HttpResponse:
     """
     try:
         data = json.load(request)
+        summary = None
 
-        match data["action"]:
-            case "add":
-                # Not currently used
-                # The deck is retrieved for validation purposes
-                deck = Deck.objects.get(pk=pk, owner=request.user)
-                status = {"added": False}
-            case "delete":
-                deck = Deck.objects.get(pk=pk, owner=request.user)
-                remove_card_from_deck(deck, data["card_reference"])
-                status = {"deleted": True}
-            case "patch":
-                if not data["name"]:
-                    return ApiJsonResponse(
-                        _("The deck must have a name"), HTTPStatus.UNPROCESSABLE_ENTITY
-                    )
-                if pk == 0:
-                    deck = Deck.objects.create(
-                        owner=request.user, name=data["name"], is_public=True
-                    )
-                else:
+        # The Deck is locked until it's saved, so that concurrent edits are applied one
+        # after the other on its latest state
+        with transaction.atomic():
+            match data["action"]:
+                case "add":
+                    # Not currently used
+                    # The deck is retrieved for validation purposes
                     deck = Deck.objects.get(pk=pk, owner=request.user)
-                patch_deck(deck, data["name"], data["decklist"])
-                status = {"patched": True, "deck": deck.id}
-            case _:
-                raise KeyError("Invalid action")
-
-        update_deck_legality(deck)
-        deck.save()
+                    status = {"added": False}
+                case "delete":
+                    deck = Deck.objects.select_for_update().get(
+                        pk=pk, owner=request.user
+                    )
+                    summary = remove_card_from_deck(deck, data["card_reference"])
+                    status = {"deleted": True}
+                case "patch":
+                    if not data["name"]:
+                        return ApiJsonResponse(
+                            _("The deck must have a name"),
+                            HTTPStatus.UNPROCESSABLE_ENTITY,
+                        )
+                    if pk == 0:
+                        deck = Deck.objects.create(
+                            owner=request.user, name=data["name"], is_public=True
+                        )
+                    else:
+                        deck = Deck.objects.select_for_update().get(
+                            pk=pk, owner=request.user
+                        )
+                    summary = patch_deck(deck, data["name"], data["decklist"])
+                    status = {"patched": True, "deck": deck.id}
+                case _:
+                    raise KeyError("Invalid action")
+
+            update_deck_legality(deck, summary)
+            deck.save()
     except Deck.DoesNotExist:
         return ApiJsonResponse(_("Deck not found"), HTTPStatus.NOT_FOUND)
     except (Card.DoesNotExist, CardInDeck.DoesNotExist):
@@ -5,13 +5,14 @@ from django.http import Http404
 from django.shortcuts import render
 from django.views.decorators.clickjacking import xframe_options_exempt
 
-from decks.models import Card, Deck
+from decks.deck_utils import get_deck_snapshot, get_snapshot_card_lists
+from decks.models import Deck
 
 
 @xframe_options_exempt
 def deck_embed_view(request, deck_id):
     try:
-        deck = Deck.objects.get(pk=deck_id)
+        deck = Deck.objects.select_related("hero", "snapshot").get(pk=deck_id)
     except Deck.DoesNotExist:
         raise Http404("Deck does not exist")
 
@@ -19,6 +20,7 @@ def deck_embed_view(request, deck_id):
         raise PermissionDenied
 
     params: dict = request.GET
+    card_lists = get_snapshot_card_lists(get_deck_snapshot(deck))
 
     return render(
         request,
@@ -26,20 +28,9 @@ def deck_embed_view(request, deck_id):
         {
             "deck": {
                 "metadata": deck,
-                "characters": deck.cardindeck_set.filter(card__type=Card.Type.CHARACTER)
-                .select_related("card")
-                .order_by("card__stats__main_cost", "card__stats__recall_cost"),
-                "spells": deck.cardindeck_set.filter(card__type=Card.Type.SPELL)
-                .select_related("card")
-                .order_by("card__stats__main_cost", "card__stats__recall_cost"),
-                "permanents": deck.cardindeck_set.filter(
-                    card__type__in=[
-                        Card.Type.LANDMARK_PERMANENT,
-                        Card.Type.EXPEDITION_PERMANENT,
-                    ]
-                )
-                .select_related("card")
-                .order_by("card__stats__main_cost", "card__stats__recall_cost"),
+                "characters": get_embedded_cards(card_lists["character"]),
+                "spells": get_embedded_cards(card_lists["spell"]),
+                "permanents": get_embedded_cards(card_lists["permanent"]),
             },
             "view": {
                 "columns": safe_params(params, "columns", int, 2),
@@ -58,6 +49,10 @@ def deck_embed_view(request, deck_id):
     )
 
 
+def get_embedded_cards(card_list: list[tuple]) -> list[dict]:
+    return [{"quantity": quantity, "card": card} for quantity, card in card_list]
+
+
 def safe_params[T](params: dict, key: str, cast: Type[T], default: T = None) -> T:
     value = params.get(key, default)
     try:
@@ -8,16 +8,29 @@ from django.contrib.auth.models import User
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import render
 from django.utils.translation import gettext_lazy as _
+from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from django.views.generic.edit import FormView
 
 from api.utils import ApiJsonResponse
-from decks.deck_utils import create_new_deck, import_unique_card
-from decks.models import Card, DeckCopy, FavoriteCard
+from decks.deck_utils import (
+    create_new_deck,
+    enqueue_card_import_job,
+    import_unique_card,
+    recover_card_import_job,
+    validate_decklists,
+)
+from decks.models import Card, CardImportJob, DeckCopy, FavoriteCard
 from decks.forms import CardImportForm, DecklistForm
 from decks.exceptions import AlteredAPIError, CardAlreadyExists, MalformedDeckException
 
 
+# Maximum amount of unique cards that can be imported in a single job
+MAX_IMPORT_REFERENCES = 2000
+# Maximum amount of decklists that can be validated in a single request
+MAX_VALIDATED_DECKLISTS = 500
+
+
 class NewDeckFormView(LoginRequiredMixin, FormView):
     """FormView to manage the creation of a Deck.
     It requires being authenticated.
@@ -122,7 +135,9 @@ def import_card(request: HttpRequest) -> HttpResponse:
 @login_required
 @require_POST
 def import_multiple_cards(request: HttpRequest) -> HttpResponse:
-    """Receive the reference of a unique card and import it into the database.
+    """Receive the references of multiple unique cards and create a job to import them
+    into the database in the background. The job's progress can be polled on the
+    returned URL.
 
     Args:
         request (HttpRequest): The HTTP request object.
@@ -130,27 +145,63 @@ def import_multiple_cards(request: HttpRequest) -> HttpResponse:
     Returns:
         HttpResponse: The response object.
     """
-    success = []
-    failure = []
-
     try:
         data = json.loads(request.body)
     except json.decoder.JSONDecodeError:
         return ApiJsonResponse("Missing body", HTTPStatus.BAD_REQUEST)
 
-    if "references" not in data:
+    if not isinstance(data, dict) or not isinstance(data.get("references"), list):
         return ApiJsonResponse("Missing references", HTTPStatus.BAD_REQUEST)
+    if not all(isinstance(reference, str) for reference in data["references"]):
+        return ApiJsonResponse("Invalid references", HTTPStatus.BAD_REQUEST)
+
+    # Remove repeated references while keeping their order
+    references = list(dict.fromkeys(data["references"]))
+    if len(references) > MAX_IMPORT_REFERENCES:
+        return ApiJsonResponse(
+            f"Too many references (max. {MAX_IMPORT_REFERENCES})",
+            HTTPStatus.BAD_REQUEST,
+        )
+
+    job = CardImportJob.objects.create(user=request.user, references=references)
+    enqueue_card_import_job(job)
+
+    return ApiJsonResponse(
+        {"job": job.id, "url": job.get_absolute_url()}, HTTPStatus.ACCEPTED
+    )
 
-    references = data["references"]
 
-    for reference in references:
-        try:
-            import_card_by_reference(reference, request.user)
-            success.append(reference)
-        except AlteredAPIError:
-            failure.append(reference)
+@login_required
+def import_multiple_cards_status(request: HttpRequest, pk: int) -> HttpResponse:
+    """Return the progress of a job importing unique cards.
 
-    return ApiJsonResponse({"success": success, "failure": failure}, HTTPStatus.OK)
+    Args:
+        request (HttpRequest): The HTTP request object.
+        pk (int): The ID of the CardImportJob.
+
+    Returns:
+        HttpResponse: The response object.
+    """
+    try:
+        job = CardImportJob.objects.get(pk=pk, user=request.user)
+    except CardImportJob.DoesNotExist:
+        return ApiJsonResponse(_("Job not found"), HTTPStatus.NOT_FOUND)
+
+    # The job might have been lost if the process running it was stopped
+    if recover_card_import_job(job):
+        enqueue_card_import_job(CardImportJob.objects.get(pk=pk))
+
+    return ApiJsonResponse(
+        {
+            "status": job.get_status_display(),
+            "finished": job.status == CardImportJob.Status.FINISHED,
+            "total": len(job.references),
+            "processed": job.processed_count,
+            "success": job.success,
+            "failure": job.failure,
+        },
+        HTTPStatus.OK,
+    )
 
 
 def import_card_by_reference(reference: str, user: User):
@@ -176,3 +227,44 @@ def import_card_by_reference(reference: str, user: User):
         ) % {"card_name": card.name, "reference": reference}
 
     return {"message": message, "card": card}
+
+
+@csrf_exempt
+@require_POST
+def validate_decklist(request: HttpRequest) -> HttpResponse:
+    """Evaluate the legality of one or multiple text decklists on every game mode
+    without creating any Deck.
+
+    The body can either contain a single `decklist` or a list of `decklists`, each one
+    following the format of the DecklistForm.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponse: The response object.
+    """
+    try:
+        data = json.loads(request.body)
+    except json.decoder.JSONDecodeError:
+        return ApiJsonResponse(_("Invalid payload"), HTTPStatus.BAD_REQUEST)
+    if not isinstance(data, dict):
+        return ApiJsonResponse(_("Invalid payload"), HTTPStatus.BAD_REQUEST)
+
+    if isinstance(data.get("decklist"), str):
+        decklists = [data["decklist"]]
+    elif isinstance(data.get("decklists"), list) and all(
+        isinstance(decklist, str) for decklist in data["decklists"]
+    ):
+        decklists = data["decklists"]
+    else:
+        return ApiJsonResponse(_("Missing decklists"), HTTPStatus.BAD_REQUEST)
+
+    if len(decklists) > MAX_VALIDATED_DECKLISTS:
+        return ApiJsonResponse(
+            _("Too many decklists (max. %(count)s)")
+            % {"count": MAX_VALIDATED_DECKLISTS},
+            HTTPStatus.BAD_REQUEST,
+        )
+
+    return ApiJsonResponse({"results": validate_decklists(decklists)}, HTTPStatus.OK)
@@ -0,0 +1,15 @@
+# Gunicorn loads this file from the working directory, along with the options of the
+# command in the Dockerfile
+
+
+def post_worker_init(worker):
+    # The buffer's thread has to be started by each worker, as it isn't kept by fork
+    from decks.hit_buffer import hit_buffer
+
+    hit_buffer.start()
+
+
+def worker_exit(server, worker):
+    from decks.hit_buffer import hit_buffer
+
+    hit_buffer.shutdown()
@@ -0,0 +1,19 @@
+from django.http import HttpRequest
+from django.utils.functional import SimpleLazyObject
+
+from profiles.viewer import get_viewer_context
+
+
+def add_viewer(request: HttpRequest) -> dict:
+    """Context processor that adds the relationships of the requester with the
+    displayed Decks and users. They're only loaded if the template reads them.
+
+    Args:
+        request (HttpRequest): The HTTP request.
+
+    Returns:
+        dict: The context.
+    """
+    if not hasattr(request, "user"):
+        return {}
+    return {"viewer": SimpleLazyObject(lambda: get_viewer_context(request))}
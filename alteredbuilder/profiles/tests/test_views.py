@@ -10,6 +10,7 @@ from config.tests.utils import get_login_url, silence_logging
 from decks.models import Card, Deck
 from decks.tests.utils import generate_card
 from profiles.models import Follow
+from profiles.viewer import ViewerContext
 from profiles.views import ProfileListView
 
 
@@ -77,12 +78,8 @@ class ProfilesViewsTestCase(TestCase):
         self.assertTemplateUsed(response, "profiles/userprofile_detail.html")
 
         self.assertEqual(response.context["builder"], user)
-        with self.assertRaises(AttributeError):
-            response.context["builder"].is_followed
-
         self.assertQuerySetEqual(response.context["deck_list"], user_decks)
-        with self.assertRaises(AttributeError):
-            response.context["deck_list"][0].is_loved
+        self.assertEqual(response.context["viewer"], ViewerContext())
 
         self.assertDictEqual(
             dict(response.context["faction_distribution"]),
@@ -91,7 +88,8 @@ class ProfilesViewsTestCase(TestCase):
 
     def test_detail_view_authenticated(self):
         user = User.objects.get(username="user2")
-        self.client.force_login(User.objects.exclude(username="user2").first())
+        requester = User.objects.exclude(username="user2").first()
+        self.client.force_login(requester)
 
         response = self.client.get(user.profile.get_absolute_url())
 
@@ -100,9 +98,15 @@ class ProfilesViewsTestCase(TestCase):
         self.assertTemplateUsed(response, "profiles/userprofile_detail.html")
         self.assertIn("builder", response.context)
         self.assertEqual(response.context["builder"], user)
-        self.assertIsInstance(response.context["builder"].is_followed, bool)
         self.assertQuerySetEqual(response.context["deck_list"], user_decks)
-        self.assertIsInstance(response.context["deck_list"][0].is_loved, bool)
+        self.assertEqual(
+            response.context["viewer"].followed_user_ids,
+            set(
+                Follow.objects.filter(follower=requester).values_list(
+                    "followed_id", flat=True
+                )
+            ),
+        )
         self.assertIn("faction_distribution", response.context)
         self.assertDictEqual(
             dict(response.context["faction_distribution"]),
@@ -146,6 +150,9 @@ class ProfilesViewsTestCase(TestCase):
         self.assertTrue(
             Follow.objects.filter(follower=follower, followed=followed).exists()
         )
+        # The cached relationships of the follower are discarded
+        response = self.client.get(followed.profile.get_absolute_url())
+        self.assertIn(followed.pk, response.context["viewer"].followed_user_ids)
 
         # The follow operation is idempotent
         response = self.client.get(url)
@@ -220,15 +227,12 @@ class ProfilesViewsTestCase(TestCase):
         self.assertQuerySetEqual(
             response.context["followers"], followers, ordered=False
         )
-        with self.assertRaises(AttributeError):
-            response.context["followers"][0].is_followed
 
         followed = Follow.objects.filter(follower=user)
         self.assertQuerySetEqual(
             response.context["followed_users"], followed, ordered=False
         )
-        with self.assertRaises(AttributeError):
-            response.context["followed_users"][0].is_followed
+        self.assertEqual(response.context["viewer"], ViewerContext())
 
     def test_follow_list_view_authenticated(self):
         user = User.objects.get(username="user2")
@@ -244,10 +248,16 @@ class ProfilesViewsTestCase(TestCase):
         self.assertQuerySetEqual(
             response.context["followers"], followers, ordered=False
         )
-        self.assertIsInstance(response.context["followers"][0].is_followed, bool)
 
         followed = Follow.objects.filter(follower=user)
         self.assertQuerySetEqual(
             response.context["followed_users"], followed, ordered=False
         )
-        self.assertIsInstance(response.context["followed_users"][0].is_followed, bool)
+        self.assertEqual(
+            response.context["viewer"].followed_user_ids,
+            set(
+                Follow.objects.filter(follower__username="user3").values_list(
+                    "followed_id", flat=True
+                )
+            ),
+        )
@@ -0,0 +1,46 @@
+from dataclasses import dataclass
+
+from django.http import HttpRequest
+
+from decks.models import LovePoint
+from profiles.models import Follow
+
+
+@dataclass(frozen=True)
+class ViewerContext:
+    """Relationships of the requester with the displayed Decks and users. They're
+    loaded once per request, so that the listings don't need to be annotated for each
+    user and their queries are the same for every requester.
+    """
+
+    loved_deck_ids: frozenset[int] = frozenset()
+    followed_user_ids: frozenset[int] = frozenset()
+
+
+def get_viewer_context(request: HttpRequest) -> ViewerContext:
+    """Retrieve the relationships of the requester, which are loaded on the first
+    call and kept for the rest of the request.
+
+    Args:
+        request (HttpRequest): The HTTP request.
+
+    Returns:
+        ViewerContext: The requester's relationships, empty for anonymous users.
+    """
+    if not hasattr(request, "_viewer_context"):
+        request._viewer_context = load_viewer_context(request.user)
+    return request._viewer_context
+
+
+def load_viewer_context(user) -> ViewerContext:
+    if not user.is_authenticated:
+        return ViewerContext()
+
+    return ViewerContext(
+        loved_deck_ids=frozenset(
+            LovePoint.objects.filter(user=user).values_list("deck_id", flat=True)
+        ),
+        followed_user_ids=frozenset(
+            Follow.objects.filter(follower=user).values_list("followed_id", flat=True)
+        ),
+    )
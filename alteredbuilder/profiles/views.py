@@ -6,7 +6,7 @@ import uuid
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Count, Exists, F, OuterRef, Q, Sum
+from django.db.models import Count, F, Q, Sum
 from django.db.models.query import QuerySet
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import get_object_or_404, redirect
@@ -16,7 +16,7 @@ from django.views.generic.edit import FormView
 from django.views.generic.list import ListView
 from hitcount.models import Hit
 
-from decks.models import Card, Deck, LovePoint
+from decks.models import Card, Deck
 from profiles.forms import UserProfileForm
 from profiles.models import Follow, UserProfile
 from trends.models import UserTrend
@@ -45,22 +45,11 @@ class ProfileListView(ListView):
             .filter(profile__is_spam=False)
             .order_by("-date_joined")[: self.USER_COUNT_DISPLAY]
         )
-
-        # If the requester is authenticated, annotate the user list indicating if the
-        # requester follows any of them
-        if self.request.user.is_authenticated:
-            qs = qs.annotate(
-                is_followed=Exists(
-                    Follow.objects.filter(
-                        followed=OuterRef("pk"), follower=self.request.user
-                    )
-                )
-            )
         return qs
 
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
-        """Add the most viewed and most followed users to the context and if they're
-        followed by the requester. It also adds general metrics of the platform.
+        """Add the most viewed and most followed users to the context. It also adds
+        general metrics of the platform.
 
         Returns:
             dict[str, Any]: The view's context.
@@ -87,22 +76,6 @@ class ProfileListView(ListView):
             .order_by("-follower_count")[: self.USER_COUNT_DISPLAY]
         )
 
-        # Annotate the querysets indicating whether the requester follows the users
-        if self.request.user.is_authenticated:
-            most_viewed_users = most_viewed_users.annotate(
-                is_followed=Exists(
-                    Follow.objects.filter(
-                        followed=OuterRef("pk"), follower=self.request.user
-                    )
-                )
-            )
-            most_followed_users = most_followed_users.annotate(
-                is_followed=Exists(
-                    Follow.objects.filter(
-                        followed=OuterRef("pk"), follower=self.request.user
-                    )
-                )
-            )
         context["most_viewed_users"] = most_viewed_users
         context["most_followed_users"] = most_followed_users
 
@@ -154,17 +127,6 @@ class FollowersListView(ListView):
             "follower__profile"
         )
 
-        # Annotate the records indicating whether the users are followed by the
-        # requester
-        if self.request.user.is_authenticated:
-            qs = qs.annotate(
-                is_followed=Exists(
-                    Follow.objects.filter(
-                        followed=OuterRef("follower"), follower=self.request.user
-                    )
-                )
-            )
-
         return qs
 
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
@@ -179,19 +141,10 @@ class FollowersListView(ListView):
         # Add the displayed user
         context["builder"] = self.builder
 
-        # Extract the followed users and if they're being followed by the requester
-        followed_users = Follow.objects.filter(follower=self.builder).select_related(
-            "followed__profile", "follower__profile"
-        )
-        if self.request.user.is_authenticated:
-            followed_users = followed_users.annotate(
-                is_followed=Exists(
-                    Follow.objects.filter(
-                        followed=OuterRef("followed"), follower=self.request.user
-                    )
-                )
-            )
-        context["followed_users"] = followed_users
+        # Extract the followed users
+        context["followed_users"] = Follow.objects.filter(
+            follower=self.builder
+        ).select_related("followed__profile", "follower__profile")
 
         return context
 
@@ -206,7 +159,7 @@ class ProfileDetailView(DetailView):
 
     def get_queryset(self) -> QuerySet[Any]:
         """Return a queryset with the requested profile, including the amount of
-        followers, followed users and if it's followed by the requester.
+        followers and followed users.
 
         Returns:
             QuerySet[User]: The requested user and its profile.
@@ -222,16 +175,6 @@ class ProfileDetailView(DetailView):
             )
         )
 
-        # Annotate if it's followed by the requester
-        if self.request.user.is_authenticated:
-            qs = qs.annotate(
-                is_followed=Exists(
-                    Follow.objects.filter(
-                        follower=self.request.user, followed=OuterRef("pk")
-                    )
-                )
-            )
-
         return qs
 
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
@@ -243,20 +186,12 @@ class ProfileDetailView(DetailView):
         context = super().get_context_data(**kwargs)
 
         # Extract the user's decks
-        deck_list = Deck.objects.filter(
-            owner=self.object, is_public=True
-        ).select_related("hero")
-
-        # Annotate the Decks if they're loved by the requester
-        if self.request.user.is_authenticated:
-            deck_list = deck_list.annotate(
-                is_loved=Exists(
-                    LovePoint.objects.filter(
-                        deck=OuterRef("pk"), user=self.request.user
-                    )
-                )
-            )
-
+        # The search vector and card codes are only used to filter the decks
+        deck_list = (
+            Deck.objects.filter(owner=self.object, is_public=True)
+            .select_related("hero")
+            .defer("search_vector", "card_codes")
+        )
         context["deck_list"] = deck_list
 
         # Generate the faction distribution
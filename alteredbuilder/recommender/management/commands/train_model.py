@@ -20,8 +20,7 @@ from xgboost import XGBClassifier
 
 from config.commands import BaseCommand
 from config.utils import get_user_agent
-from decks.deck_utils import card_code_from_reference
-from decks.models import Card
+from decks.models import Card, card_code_from_reference
 from recommender.model_utils import RecommenderHelper
 from recommender.models import Tournament, TournamentDeck, TrainedModel
 
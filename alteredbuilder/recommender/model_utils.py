@@ -58,12 +58,13 @@ class RecommenderHelper:
                 .filter(
                     faction=faction,
                     rarity__in=[Card.Rarity.COMMON, Card.Rarity.RARE],
-                    is_legal=True, is_main_set=True
+                    is_legal=True,
+                    is_main_set=True,
                 )
                 .exclude(type=Card.Type.HERO)
                 .exclude(is_alt_art=True)
                 .exclude(is_promo=True)
-                .only("reference", "type")
+                .only("reference", "type", "card_code", "family_code")
             )
 
             exceptions = cls.SPECIAL_ADDITIONS.get(faction, [])
@@ -71,7 +72,7 @@ class RecommenderHelper:
                 cards = cards.union(
                     Card.objects.annotate(release_date=F("set__release_date"))
                     .filter(reference__in=exceptions)
-                    .only("reference", "type")
+                    .only("reference", "type", "card_code", "family_code")
                 )
 
             cards = cards.order_by("set__release_date", "reference")
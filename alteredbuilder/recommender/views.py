@@ -3,13 +3,12 @@ from http import HTTPMethod, HTTPStatus
 import json
 
 from django.conf import settings
-from django.db.models import Case, IntegerField, Q, When
 from django.http import HttpRequest, JsonResponse
 from django.utils.translation import gettext_lazy as _
 
-from decks.deck_utils import card_code_from_reference, family_code_from_reference
+from decks.card_catalog import card_catalog
 from decks.game_modes import StandardGameMode
-from decks.models import Card
+from decks.models import card_code_from_reference, family_code_from_reference
 from decks.templatetags.deck_styles import cdn_image_url
 from recommender.model_utils import RecommenderHelper
 
@@ -92,37 +91,31 @@ def get_next_card(request: HttpRequest) -> JsonResponse:
         if not filtered_cards:
             return JsonResponse({"recommended_cards": []}, status=HTTPStatus.OK)
 
-        query = Q()
-        order_cases = []
-        for index, reference in enumerate(filtered_cards):
-            query |= Q(reference__contains=reference, faction=faction)
-            order_cases.append(When(reference__contains=reference, then=index))
-
-        object_cards = (
-            Card.objects.filter(query)
-            .annotate(order=Case(*order_cases, output_field=IntegerField()))
-            .exclude(rarity=Card.Rarity.UNIQUE)
-            .exclude(set__code="COREKS")
-            .exclude(is_alt_art=True)
-            .exclude(is_promo=True)
-            .order_by("order")
-        )
-
-        filtered_cards = []
-        for card in object_cards:
-
-            filtered_cards.append(
-                {
-                    "reference": card.reference,
-                    "image": cdn_image_url(card.image_url),
-                    "name": card.name,
-                    "type": card.type,
-                    "rarity": card.rarity,
-                    "family": card.get_card_code(),
-                }
-            )
+        # The catalog's card code index doesn't include unique cards
+        recommendations = []
+        for card_code in filtered_cards:
+            for card in card_catalog.by_card_code(card_code):
+                if (
+                    card.faction != faction
+                    or card.set_code == "COREKS"
+                    or card.is_alt_art
+                    or card.is_promo
+                ):
+                    continue
+                recommendations.append(
+                    {
+                        "reference": card.reference,
+                        "image": cdn_image_url(card.image_url),
+                        "name": card.name,
+                        "type": card.type,
+                        "rarity": card.rarity,
+                        "family": card.get_card_code(),
+                    }
+                )
         # Return the recommendations as a response
-        return JsonResponse({"recommended_cards": filtered_cards}, status=HTTPStatus.OK)
+        return JsonResponse(
+            {"recommended_cards": recommendations}, status=HTTPStatus.OK
+        )
 
     except json.JSONDecodeError:
         return JsonResponse(
@@ -1,13 +1,12 @@
 from datetime import timedelta
 from typing import Any, Optional
 
-from django.db.models import Exists, OuterRef, Q
+from django.db.models import OuterRef, Q
 from django.db.models.query import QuerySet
 from django.utils.timezone import localdate
 from django.views.generic.base import TemplateView
 
-from decks.models import Card, Deck, LovePoint
-from profiles.models import Follow
+from decks.models import Card, Deck
 from trends.models import CardTrend, FactionTrend, HeroTrend
 
 
@@ -174,23 +173,8 @@ class HomeView(TemplateView):
                 & Q(trend__faction=faction)
             )
             .select_related("owner", "hero")
-            .prefetch_related("hit_count_generic")
+            # The search vector and card codes are only used to filter the decks
+            .defer("search_vector", "card_codes")
         )
 
-        # If the user is authenticated, include whether the user likes any of the decks
-        # or follows the creator
-        if self.request.user.is_authenticated:
-            deck_trends = deck_trends.annotate(
-                is_loved=Exists(
-                    LovePoint.objects.filter(
-                        deck=OuterRef("pk"), user=self.request.user
-                    )
-                ),
-                is_followed=Exists(
-                    Follow.objects.filter(
-                        followed=OuterRef("owner"), follower=self.request.user
-                    )
-                ),
-            )
-
         return deck_trends.order_by("trend__ranking")